@@ -23,22 +23,34 @@ enable or disable the program's operating indicator (feedback).
 MIT License
 """
 import os
+import re
+import sys
 from sys import platform
 from argparse import ArgumentParser, Namespace
 from typing import TypeVar, Union
 from pathlib import Path
 from textwrap import fill
+from itertools import islice
 
 from count_files.utils.file_handlers import is_supported_filetype
 from count_files.utils.viewing_modes import show_2columns, show_start_message, \
-    show_result_for_total, show_result_for_search_files, show_ext_grouped_by_type
+    show_result_for_total, show_result_for_search_files, show_ext_grouped_by_type, \
+    show_report, show_watch_table, show_duplicates
 from count_files.platforms import get_current_os
+from count_files.utils.progress import Progress
+from count_files.utils.output_writer import OutputWriter
+from count_files.utils.path_list import read_paths
+from count_files.utils.content_search import compile_content_pattern, filter_by_content
+from count_files.utils.record_formats import RecordWriter, file_records, folder_records, extension_records, \
+    duplicate_records
 from count_files.settings import SUPPORTED_TYPE_INFO_MESSAGE, NOT_SUPPORTED_TYPE_MESSAGE, \
-    DEFAULT_PREVIEW_SIZE, START_TEXT_WIDTH
+    DEFAULT_PREVIEW_SIZE, START_TEXT_WIDTH, OUTPUT_FORMATS
 from count_files.utils.help_system_extension import HelpCmd
 from count_files.utils.help_text import topics
 from count_files.utils.decorators import exceptions_decorator
 from count_files.utils.group_extensions import ext_and_group_dict
+from count_files.utils.scan_index import ScanIndex
+from count_files.utils.exclude_rules import ExcludeRules, read_exclude_file
 
 
 parser = ArgumentParser(
@@ -75,6 +87,42 @@ parser.add_argument('-c', '--case-sensitive', action='store_true', default=False
 parser.add_argument('-nf', '--no-feedback', action='store_true', default=False,
                     help=topics['no-feedback']['short'])
 
+parser.add_argument('-w', '--workers', type=int, default=1,
+                    help=topics['workers']['short'])
+
+parser.add_argument('-ord', '--ordered', action='store_true', default=False,
+                    help=topics['ordered']['short'])
+
+parser.add_argument('-pr', '--processes', type=int, default=1,
+                    help=topics['processes']['short'])
+
+parser.add_argument('-ix', '--index', action='store_true', default=False,
+                    help=topics['index']['short'])
+
+parser.add_argument('-md', '--max-depth', type=int, metavar='N',
+                    help=topics['max-depth']['short'])
+
+parser.add_argument('-ex', '--exclude', type=str, action='append', metavar='PATTERN',
+                    help=topics['exclude']['short'])
+
+parser.add_argument('-exf', '--exclude-from', type=str, action='append', metavar='FILE',
+                    help=topics['exclude-from']['short'])
+
+parser.add_argument('-gi', '--gitignore', action='store_true', default=False,
+                    help=topics['gitignore']['short'])
+
+parser.add_argument('-ofs', '--one-file-system', action='store_true', default=False,
+                    help=topics['one-file-system']['short'])
+
+parser.add_argument('-fsl', '--follow-symlinks', action='store_true', default=False,
+                    help=topics['follow-symlinks']['short'])
+
+parser.add_argument('-stdin', '--from-stdin', action='store_true', default=False,
+                    help=topics['from-stdin']['short'])
+
+parser.add_argument('-fmt', '--format', type=str, choices=OUTPUT_FORMATS,
+                    help=topics['format']['short'])
+
 parser.add_argument('-hc', '--help-cmd', action='store_true', default=False,
                     help=topics['help-cmd']['short'])
 
@@ -91,6 +139,12 @@ total_group.add_argument('-sf', '--show-folders', action='store_true', default=F
 total_group.add_argument('-ts', '--total-size', action='store_true', default=False,
                          help=topics['total-size']['short'])
 
+total_group.add_argument('-fsz', '--folder-sizes', action='store_true', default=False,
+                         help=topics['folder-sizes']['short'])
+
+total_group.add_argument('-sq', '--size-quantiles', action='store_true', default=False,
+                         help=topics['size-quantiles']['short'])
+
 
 count_group = parser.add_argument_group('File counting by extension'.upper(),
                                         description=topics['count-group']['short'])
@@ -101,13 +155,31 @@ count_group.add_argument('-alpha', '--sort-alpha', action='store_true', default=
 count_group.add_argument('-g', '--group', action='store_true', default=False,
                          help=topics['group']['short'])
 
+count_group.add_argument('-rep', '--report', action='store_true', default=False,
+                         help=topics['report']['short'])
+
+count_group.add_argument('-wa', '--watch', action='store_true', default=False,
+                         help=topics['watch']['short'])
+
+count_group.add_argument('-dup', '--duplicates', action='store_true', default=False,
+                         help=topics['duplicates']['short'])
+
+count_group.add_argument('-ln', '--lines', action='store_true', default=False,
+                         help=topics['lines']['short'])
+
+count_group.add_argument('-sb', '--skip-binary', action='store_true', default=False,
+                         help=topics['skip-binary']['short'])
+
+count_group.add_argument('-sn', '--sniff', action='store_true', default=False,
+                         help=topics['sniff']['short'])
+
 search_group = parser.add_argument_group('File searching by extension or by pattern'.upper(),
                                          description=topics['search-group']['short'])
 
 search_group.add_argument('-fe', '--file-extension', type=str,
                           help=topics['file-extension']['short'])
 
-search_group.add_argument('-fm', '--filename-match', type=str, dest='pattern',
+search_group.add_argument('-fm', '--filename-match', type=str, dest='pattern', action='append',
                           help=topics['filename-match']['short'])
 
 search_group.add_argument('-p', '--preview', action='store_true', default=False,
@@ -119,6 +191,24 @@ search_group.add_argument('-ps', '--preview-size', type=int, default=DEFAULT_PRE
 search_group.add_argument('-fs', '--file-sizes', action='store_true', default=False,
                           help=topics['file-sizes']['short'])
 
+search_group.add_argument('-lim', '--limit', type=int, metavar='N',
+                          help=topics['limit']['short'])
+
+search_group.add_argument('-exs', '--exists', action='store_true', default=False,
+                          help=topics['exists']['short'])
+
+search_group.add_argument('-ct', '--contains', type=str, metavar='PATTERN',
+                          help=topics['contains']['short'])
+
+search_group.add_argument('-re', '--regex', action='store_true', default=False,
+                          help=topics['regex']['short'])
+
+search_group.add_argument('-o', '--output', type=str, metavar='FILE',
+                          help=topics['output']['short'])
+
+search_group.add_argument('-0', '--null', action='store_true', default=False,
+                          help=topics['null']['short'])
+
 parser._positionals.title = parser._positionals.title.upper()
 parser._optionals.title = parser._optionals.title.upper()
 
@@ -162,14 +252,120 @@ def main_flow(*args: [argparse_namespace_object, Union[bytes, str]]):
         location = os.getcwd()
         loc_text = ' the current directory'
     else:
-        location = os.path.expanduser(args.path)
+        # normalized once, so that the found paths are listed without normalizing each of them
+        location = os.path.normpath(os.path.expanduser(args.path))
         loc_text = ':\n' + os.path.normpath(location)
 
     if not os.path.exists(location):
         parser.exit(status=1, message=f'The path {location} '
                                       f'does not exist, or there may be a typo in it.')
 
-    if not include_hidden and current_os.is_hidden_file_or_dir(location):
+    if args.workers < 1:
+        parser.exit(status=1, message='The number of workers must be a positive integer.\n')
+
+    if args.processes < 1:
+        parser.exit(status=1, message='The number of processes must be a positive integer.\n')
+
+    if args.max_depth is not None and args.max_depth < 1:
+        parser.exit(status=1, message='The maximum depth must be a positive integer.\n')
+
+    if args.limit is not None and args.limit < 1:
+        parser.exit(status=1, message='The limit must be a positive integer.\n')
+
+    if (args.limit is not None or args.exists) and not (args.pattern or extension):
+        parser.exit(status=1, message='The --limit and --exists arguments are only available '
+                                      'for searching by extension or by pattern (-fe, -fm).\n')
+
+    if (args.contains is not None or args.regex) and not (args.pattern or extension):
+        parser.exit(status=1, message='The --contains and --regex arguments are only available '
+                                      'for searching by extension or by pattern (-fe, -fm).\n')
+
+    if args.regex and args.contains is None:
+        parser.exit(status=1, message='The --regex argument is only available with the --contains argument.\n')
+
+    content_pattern = None
+    if args.contains is not None:
+        try:
+            content_pattern = compile_content_pattern(args.contains, regex=args.regex,
+                                                      case_sensitive=args.case_sensitive)
+        except re.error as e:
+            parser.exit(status=1, message=f'The --contains pattern is not a valid regular expression: {e}.\n')
+
+    if args.output is not None and (args.exists or not (args.pattern or extension or args.format)):
+        parser.exit(status=1, message='The --output argument is only available '
+                                      'for listing the found files (-fe, -fm without --exists) '
+                                      'or with the --format argument.\n')
+
+    if args.null and (args.exists or args.format or args.preview or args.file_sizes
+                      or not (args.pattern or extension)):
+        parser.exit(status=1, message='The --null argument is only available '
+                                      'for listing the found files (-fe, -fm without --exists), '
+                                      'not with the --format, --preview or --file-sizes arguments.\n')
+
+    if args.from_stdin and (args.pattern or extension or args.watch or args.index):
+        parser.exit(status=1, message='The --from-stdin argument is only available '
+                                      'for counting files (-t, table, --report), '
+                                      'not with the --watch or --index arguments.\n')
+
+    if args.from_stdin and (args.no_recursion or args.max_depth is not None or args.exclude
+                            or args.exclude_from or args.gitignore or args.one_file_system
+                            or args.follow_symlinks):
+        parser.exit(status=1, message='The files listed with --from-stdin are counted as they are, '
+                                      'the --no-recursion, --max-depth, --exclude, --exclude-from, '
+                                      '--gitignore, --one-file-system and --follow-symlinks arguments '
+                                      'are not available.\n')
+
+    if args.format and (args.watch or args.preview):
+        parser.exit(status=1, message='The --format argument is not available '
+                                      'in the watch mode or with the --preview argument.\n')
+
+    if args.duplicates and (args.extension or args.pattern or extension or args.report or args.watch or args.sniff):
+        parser.exit(status=1, message='The --duplicates argument is not available with the --total, '
+                                      '--file-extension, --filename-match, --report, --watch '
+                                      'or --sniff arguments.\n')
+
+    if args.lines and (args.extension or args.pattern or extension or args.report or args.watch
+                       or args.duplicates or args.sniff or args.group or args.processes > 1):
+        parser.exit(status=1, message='The --lines argument is only available for the table '
+                                      'with file extensions, not with the --total, --file-extension, '
+                                      '--filename-match, --report, --watch, --duplicates, --sniff, '
+                                      '--group or --processes arguments.\n')
+
+    if args.processes > 1 and (args.report or args.watch or args.duplicates or args.pattern or extension):
+        parser.exit(status=1, message='The --processes argument is only available for counting files '
+                                      'by extension and with the --total argument, not with the --report, '
+                                      '--watch, --duplicates, --file-extension or --filename-match arguments.\n')
+
+    if args.skip_binary and not args.lines:
+        parser.exit(status=1, message='The --skip-binary argument is only available with the --lines argument.\n')
+
+    if args.sniff and (args.extension or args.report or args.watch
+                       or (args.pattern or extension) and not args.preview):
+        parser.exit(status=1, message='The --sniff argument is only available for counting files by extension '
+                                      '(table, --group) and the --preview of files without extension, '
+                                      'not with the --total, --report or --watch arguments, '
+                                      'nor with --file-extension or --filename-match without --preview.\n')
+
+    if extension and not args.pattern and args.preview:
+        if extension == '.' and not args.sniff or not is_supported_filetype(extension.lower()):
+            parser.exit(status=1, message=NOT_SUPPORTED_TYPE_MESSAGE)
+
+    if args.folder_sizes and not (args.extension and args.show_folders and args.total_size):
+        parser.exit(status=1, message='The --folder-sizes argument is only available '
+                                      'with the --total, --show-folders and --total-size arguments.\n')
+
+    if args.size_quantiles and not (args.total_size or args.file_sizes or args.report):
+        parser.exit(status=1, message='The --size-quantiles argument is only available '
+                                      'with the --total-size, --file-sizes or --report arguments.\n')
+
+    if args.watch and (args.follow_symlinks or args.index or args.workers > 1):
+        parser.exit(status=1, message='The --follow-symlinks, --index and --workers arguments '
+                                      'are not available in the watch mode.\n')
+
+    if args.index and args.processes > 1:
+        parser.exit(status=1, message='The --index argument is not available with the --processes argument.\n')
+
+    if not include_hidden and not args.from_stdin and current_os.is_hidden_file_or_dir(location):
         # skip check if path is a local drive
         if platform.startswith('win') and len(Path(location).parents) == 0:
             pass
@@ -178,81 +374,361 @@ def main_flow(*args: [argparse_namespace_object, Union[bytes, str]]):
                                           f' has hidden folders.\n'
                                           f'Use the --all argument to include hidden files and folders.')
 
-    print("")
+    # persistent scan index, only the directories modified since the previous scan are listed
+    index = ScanIndex(location) if args.index else None
+
+    # exclude rules in the .gitignore format, excluded folders are not walked
+    exclude_patterns = list(args.exclude or [])
+    for filename in args.exclude_from or []:
+        try:
+            exclude_patterns.extend(read_exclude_file(filename))
+        except OSError as e:
+            parser.exit(status=1, message=f'Cannot read the exclude file {filename}: {e.strerror}.\n')
+    exclude = ExcludeRules(location, exclude_patterns, gitignore=args.gitignore) \
+        if exclude_patterns or args.gitignore else None
+    if exclude is not None and exclude.invalid:
+        parser.exit(status=1, message=f'Not a valid exclude pattern: {exclude.invalid[0]}.\n')
+
+    # --from-stdin: the paths are read from the list instead of walking the location
+    paths = None
+    if args.from_stdin:
+        paths = read_paths(sys.stdin.buffer)
+        location = 'the list of paths from stdin'
+
+    # the list of found files (or the records in the --format) is written to stdout
+    # (in blocks, if it is redirected) or to the --output file
+    output = None
+    if (args.pattern or extension or args.format) and not args.exists:
+        try:
+            if args.null:
+                # NUL-terminated paths for xargs -0, without the messages for the screen
+                output = OutputWriter(filename=args.output, terminal=False, terminator='\0')
+            else:
+                output = OutputWriter(filename=args.output)
+        except OSError as e:
+            parser.exit(status=1, message=f'Cannot write the output file {args.output}: {e.strerror}.\n')
+    # messages for the screen: not in the --format, with --null or if the list goes to a pipe
+    show_messages = not args.exists and not args.format and not args.null \
+        and not (output is not None and output.piped)
+
+    if show_messages:
+        print("")
     # Parser total_group
     # getting the total number of files for -t .. (all extensions), -t . and -t extension_name
     if args.extension:
-        print(fill(show_start_message(args.extension, args.case_sensitive, recursive,
-                                      include_hidden, location, 'total'),
-                   width=START_TEXT_WIDTH),
-              end="\n\n")
-        data = current_os.search_files(dirpath=location,
-                                       extension=args.extension,
-                                       include_hidden=include_hidden,
-                                       recursive=recursive,
-                                       case_sensitive=args.case_sensitive)
-        total_result = show_result_for_total(data, total_size=args.total_size,
-                                             show_folders=args.show_folders,
-                                             no_feedback=args.no_feedback,
-                                             recursive=recursive)
+        if show_messages:
+            print(fill(show_start_message(args.extension, args.case_sensitive, recursive,
+                                          include_hidden, location, 'total'),
+                       width=START_TEXT_WIDTH),
+                  end="\n\n")
+        progress = Progress(enabled=not args.no_feedback, expected_dirs=index and len(index.dirs))
+        if args.processes > 1 and recursive and not args.follow_symlinks and paths is None:
+            # subtrees are processed in a pool of processes, the records are shown as they come
+            data = current_os.search_folders_in_processes(dirpath=location,
+                                                          extension=args.extension,
+                                                          include_hidden=include_hidden,
+                                                          case_sensitive=args.case_sensitive,
+                                                          total_size=args.total_size,
+                                                          size_quantiles=args.size_quantiles,
+                                                          show_folders=args.show_folders or bool(args.format),
+                                                          workers=args.workers,
+                                                          processes=args.processes,
+                                                          exclude=exclude,
+                                                          max_depth=args.max_depth,
+                                                          one_file_system=args.one_file_system,
+                                                          progress=progress)
+        else:
+            # one record for each folder, counted from the directory listings of the walk
+            data = current_os.search_folders(dirpath=location,
+                                             extension=args.extension,
+                                             recursive=recursive,
+                                             include_hidden=include_hidden,
+                                             case_sensitive=args.case_sensitive,
+                                             total_size=args.total_size,
+                                             size_quantiles=args.size_quantiles,
+                                             workers=args.workers,
+                                             ordered=args.ordered,
+                                             index=index,
+                                             exclude=exclude,
+                                             max_depth=args.max_depth,
+                                             one_file_system=args.one_file_system,
+                                             follow_symlinks=args.follow_symlinks,
+                                             progress=progress,
+                                             paths=paths)
+        if args.format:
+            # one record for each folder with found files
+            total_result = 0
+            fields = ['folder', 'count'] + (['size'] if args.total_size else [])
+            with RecordWriter(args.format, fields, output) as writer:
+                for record in folder_records(data, total_size=args.total_size):
+                    writer.write(record)
+                    total_result += record['count']
+            progress.close()
+            output.close()
+        else:
+            total_result = show_result_for_total(data, total_size=args.total_size,
+                                                 size_quantiles=args.size_quantiles,
+                                                 show_folders=args.show_folders,
+                                                 folder_sizes=args.folder_sizes,
+                                                 progress=progress,
+                                                 recursive=recursive)
+        if index is not None:
+            index.save()
         return total_result
 
     # Parser search_group: search file names by pattern, --filename-match
     if args.pattern:
-        print(fill(show_start_message(args.pattern, args.case_sensitive, recursive,
-                                      include_hidden, location, 'pattern'),
-                   width=START_TEXT_WIDTH),
-              end="\n\n")
+        if show_messages:
+            print(fill(show_start_message(', '.join(args.pattern), args.case_sensitive, recursive,
+                                          include_hidden, location, 'pattern'),
+                       width=START_TEXT_WIDTH),
+                  end="\n\n")
 
         # getting data list with Unix shell-style wildcards: *, ?, [seq], [!seq]
+        # all the patterns (-fm can be repeated) are matched in one walk
         data = current_os.search_files_by_pattern(dirpath=location,
                                                   pattern=args.pattern,
                                                   recursive=recursive,
                                                   include_hidden=include_hidden,
-                                                  case_sensitive=args.case_sensitive)
+                                                  case_sensitive=args.case_sensitive,
+                                                  workers=args.workers,
+                                                  ordered=args.ordered,
+                                                  index=index,
+                                                  exclude=exclude,
+                                                  max_depth=args.max_depth,
+                                                  one_file_system=args.one_file_system,
+                                                  follow_symlinks=args.follow_symlinks,
+                                                  entries=args.file_sizes)
+        files = data
+        if content_pattern is not None:
+            # only the files whose content matches, searched in a pool of threads
+            files = filter_by_content(data, content_pattern)
+        # --exists: only the exit status, the walk is stopped at the first found file
+        if args.exists:
+            found = next(files, None) is not None
+            files.close()  # cancels the content searches started ahead (--contains)
+            data.close()
+            if index is not None:
+                index.save()
+            parser.exit(status=0 if found else 1)
 
         # preview behavior is similar to --file-extension .. (all extensions)
         # in this case, the preview will only be displayed for files with a supported extension
-        len_files = show_result_for_search_files(files=data,
-                                                 file_sizes=args.file_sizes,
-                                                 preview=args.preview,
-                                                 preview_size=args.preview_size)
-
+        if args.format:
+            # one record for each found file
+            fields = ['path', 'folder'] + (['size'] if args.file_sizes else [])
+            with RecordWriter(args.format, fields, output) as writer:
+                len_files = writer.write_all(file_records(islice(files, args.limit), file_sizes=args.file_sizes))
+        else:
+            len_files = show_result_for_search_files(files=islice(files, args.limit),
+                                                     file_sizes=args.file_sizes,
+                                                     size_quantiles=args.size_quantiles,
+                                                     preview=args.preview,
+                                                     preview_size=args.preview_size,
+                                                     output=output,
+                                                     sniff=args.sniff)
+        # the search was stopped by --limit only if there is at least one more file
+        stopped = len_files == args.limit and next(files, None) is not None
+        files.close()  # cancels the content searches started ahead (--contains)
+        data.close()  # stops the walk if the search was ended by --limit
+        output.close()
+        if stopped and show_messages:
+            print(f'   The search was stopped after {args.limit} file(s) (--limit).\n')
+        if index is not None:
+            index.save()
         return len_files
 
     # Parser search_group: search and list files by extension, --file-extension
     if extension:
-        print(fill(show_start_message(extension, args.case_sensitive, recursive, include_hidden, location),
-                   width=START_TEXT_WIDTH),
-              end="\n\n")
-        if args.preview:
-            if extension == '.' or not is_supported_filetype(extension.lower()):
-                parser.exit(status=1, message=NOT_SUPPORTED_TYPE_MESSAGE)
-
+        if show_messages:
+            print(fill(show_start_message(extension, args.case_sensitive, recursive, include_hidden, location),
+                       width=START_TEXT_WIDTH),
+                  end="\n\n")
         # getting data list for -fe .. (all extensions), -fe . and -fe extension_name
-        data = (f for f in current_os.search_files(dirpath=location,
-                                                   extension=extension,
-                                                   include_hidden=include_hidden,
-                                                   recursive=recursive,
-                                                   case_sensitive=args.case_sensitive))
-        # display the result as a list
-        len_files = show_result_for_search_files(files=data,
-                                                 file_sizes=args.file_sizes,
-                                                 preview=args.preview,
-                                                 preview_size=args.preview_size)
+        data = current_os.search_files(dirpath=location,
+                                       extension=extension,
+                                       include_hidden=include_hidden,
+                                       recursive=recursive,
+                                       case_sensitive=args.case_sensitive,
+                                       workers=args.workers,
+                                       ordered=args.ordered,
+                                       index=index,
+                                       exclude=exclude,
+                                       max_depth=args.max_depth,
+                                       one_file_system=args.one_file_system,
+                                       follow_symlinks=args.follow_symlinks,
+                                       entries=args.file_sizes)
+        files = data
+        if content_pattern is not None:
+            # only the files whose content matches, searched in a pool of threads
+            files = filter_by_content(data, content_pattern)
+        # --exists: only the exit status, the walk is stopped at the first found file
+        if args.exists:
+            found = next(files, None) is not None
+            files.close()  # cancels the content searches started ahead (--contains)
+            data.close()
+            if index is not None:
+                index.save()
+            parser.exit(status=0 if found else 1)
 
+        # display the result as a list
+        if args.format:
+            # one record for each found file
+            fields = ['path', 'folder'] + (['size'] if args.file_sizes else [])
+            with RecordWriter(args.format, fields, output) as writer:
+                len_files = writer.write_all(file_records(islice(files, args.limit), file_sizes=args.file_sizes))
+        else:
+            len_files = show_result_for_search_files(files=islice(files, args.limit),
+                                                     file_sizes=args.file_sizes,
+                                                     size_quantiles=args.size_quantiles,
+                                                     preview=args.preview,
+                                                     preview_size=args.preview_size,
+                                                     output=output,
+                                                     sniff=args.sniff)
+        # the search was stopped by --limit only if there is at least one more file
+        stopped = len_files == args.limit and next(files, None) is not None
+        files.close()  # cancels the content searches started ahead (--contains)
+        data.close()  # stops the walk if the search was ended by --limit
+        output.close()
+        if stopped and show_messages:
+            print(f'   The search was stopped after {args.limit} file(s) (--limit).\n')
+        if index is not None:
+            index.save()
         return len_files
 
+    # Parser count_group: duplicate files grouped by size, partial hash and full hash, --duplicates
+    if args.duplicates:
+        if show_messages:
+            print(fill(show_start_message(None, args.case_sensitive, recursive, include_hidden, location),
+                       width=START_TEXT_WIDTH),
+                  end="\n\n")
+        groups = current_os.find_duplicates(dirpath=location,
+                                            recursive=recursive,
+                                            include_hidden=include_hidden,
+                                            workers=args.workers,
+                                            no_feedback=args.no_feedback,
+                                            index=index,
+                                            exclude=exclude,
+                                            max_depth=args.max_depth,
+                                            one_file_system=args.one_file_system,
+                                            follow_symlinks=args.follow_symlinks,
+                                            paths=paths)
+        if index is not None:
+            index.save()
+        if args.format:
+            # one record for each file of each group of duplicates
+            with RecordWriter(args.format, ['group', 'path', 'size', 'extension'], output) as writer:
+                writer.write_all(duplicate_records(groups, case_sensitive=args.case_sensitive))
+            output.close()
+            return sum(len(paths) - 1 for size, paths in groups)
+        return show_duplicates(groups, case_sensitive=args.case_sensitive, sort_alpha=sort_alpha)
+
+    # Parser count_group: extension table, sizes, folders and totals in one traversal, --report
+    if args.report:
+        if show_messages:
+            print(fill(show_start_message(None, args.case_sensitive, recursive, include_hidden, location),
+                       width=START_TEXT_WIDTH),
+                  end="\n\n")
+        report = current_os.collect_report(dirpath=location,
+                                           recursive=recursive,
+                                           include_hidden=include_hidden,
+                                           case_sensitive=args.case_sensitive,
+                                           show_folders=args.show_folders and recursive,
+                                           workers=args.workers,
+                                           ordered=args.ordered,
+                                           no_feedback=args.no_feedback,
+                                           index=index,
+                                           exclude=exclude,
+                                           max_depth=args.max_depth,
+                                           one_file_system=args.one_file_system,
+                                           follow_symlinks=args.follow_symlinks,
+                                           size_quantiles=args.size_quantiles,
+                                           paths=paths)
+        if index is not None:
+            index.save()
+        if args.format:
+            # one record for each extension, with the combined size of its files
+            if sort_alpha:
+                data = sorted(report['extensions'].items(), key=lambda item: (item[0].casefold(), item[0]))
+            else:
+                data = report['extensions'].most_common()
+            fields = ['extension', 'count', 'size'] + (['group'] if args.group else [])
+            with RecordWriter(args.format, fields, output) as writer:
+                writer.write_all(extension_records(data, ext_sizes=report['ext_sizes'],
+                                                   ext_and_group=ext_and_group_dict if args.group else None))
+            output.close()
+            return report['files']
+        return show_report(report, sort_alpha=sort_alpha, group=args.group, ext_and_group=ext_and_group_dict)
+
+    # Parser count_group: counting all files by extension and redrawing the table on changes, --watch
+    if args.watch:
+        print(fill(show_start_message(None, args.case_sensitive, recursive, include_hidden, location),
+                   width=START_TEXT_WIDTH),
+              end="\n\n")
+        try:
+            for data in current_os.watch_files_by_extension(dirpath=location,
+                                                            recursive=recursive,
+                                                            include_hidden=include_hidden,
+                                                            case_sensitive=args.case_sensitive,
+                                                            exclude=exclude,
+                                                            max_depth=args.max_depth,
+                                                            one_file_system=args.one_file_system):
+                show_watch_table(data, sort_alpha=sort_alpha)
+        except OSError as e:
+            parser.exit(status=1, message=f'The watch mode is not available: {e}\n')
+
     # Parser count_group: counting all files by extension
-    print(fill(show_start_message(None, args.case_sensitive, recursive, include_hidden, location),
-               width=START_TEXT_WIDTH),
-          end="\n\n"
-          )
-    data = current_os.count_files_by_extension(dirpath=location,
-                                               no_feedback=args.no_feedback,
-                                               include_hidden=include_hidden,
-                                               recursive=recursive,
-                                               case_sensitive=args.case_sensitive)
+    if show_messages:
+        print(fill(show_start_message(None, args.case_sensitive, recursive, include_hidden, location),
+                   width=START_TEXT_WIDTH),
+              end="\n\n"
+              )
+    lines = None
+    if args.lines:
+        # the files and their lines, the files are read in a pool of threads
+        data, lines = current_os.count_lines_by_extension(dirpath=location,
+                                                          no_feedback=args.no_feedback,
+                                                          include_hidden=include_hidden,
+                                                          recursive=recursive,
+                                                          case_sensitive=args.case_sensitive,
+                                                          workers=args.workers,
+                                                          index=index,
+                                                          exclude=exclude,
+                                                          max_depth=args.max_depth,
+                                                          one_file_system=args.one_file_system,
+                                                          follow_symlinks=args.follow_symlinks,
+                                                          paths=paths,
+                                                          skip_binary=args.skip_binary)
+    else:
+        data = current_os.count_files_by_extension(dirpath=location,
+                                                   no_feedback=args.no_feedback,
+                                                   include_hidden=include_hidden,
+                                                   recursive=recursive,
+                                                   case_sensitive=args.case_sensitive,
+                                                   workers=args.workers,
+                                                   processes=args.processes,
+                                                   index=index,
+                                                   exclude=exclude,
+                                                   max_depth=args.max_depth,
+                                                   one_file_system=args.one_file_system,
+                                                   follow_symlinks=args.follow_symlinks,
+                                                   paths=paths,
+                                                   sniff=args.sniff)
+    if index is not None:
+        index.save()
+
+    if args.format:
+        # one record for each extension
+        if sort_alpha:
+            data = sorted(data.items(), key=lambda item: (item[0].casefold(), item[0]))
+        else:
+            data = data.most_common()
+        fields = ['extension', 'count'] + (['lines'] if args.lines else []) + (['group'] if args.group else [])
+        with RecordWriter(args.format, fields, output) as writer:
+            writer.write_all(extension_records(data, ext_and_group=ext_and_group_dict if args.group else None,
+                                               ext_lines=lines))
+        output.close()
+        parser.exit(status=0)
 
     # if empty sequence
     if not data:
@@ -278,12 +754,12 @@ def main_flow(*args: [argparse_namespace_object, Union[bytes, str]]):
         # sort extensions alphabetically, with uppercase versions on top
         sort_key = lambda data: (data[0].casefold(), data[0])
         data = sorted(data.items(), key=sort_key)
-        show_2columns(data, max_word_width, total_occurrences)
+        show_2columns(data, max_word_width, total_occurrences, lines=lines)
         parser.exit(status=0)
     else:
         # sort extensions by frequency for each file extension
         data = data.most_common()
-        show_2columns(data, max_word_width, total_occurrences)
+        show_2columns(data, max_word_width, total_occurrences, lines=lines)
         parser.exit(status=0)
 
 
@@ -1,16 +1,34 @@
 import os
 import sys
-import fnmatch
+import errno
+import stat
+import queue
+import threading
+import time
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, List, Tuple, Optional, Dict, Callable, Union
+from functools import partial
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 try:
     import ctypes
 except:
     pass
 
-from count_files.settings import TERM_WIDTH
-from count_files.utils.file_handlers import get_file_extension
+from count_files.settings import SHARD_MAX_DEPTH, SHARDS_PER_PROCESS, WATCH_INTERVAL
+from count_files.utils.file_handlers import get_name_suffix, normalize_extension, count_extensions, \
+    compile_filename_patterns
+from count_files.utils.scan_index import ScanIndex, IndexEntry
+from count_files.utils.path_patterns import PathPatterns, is_path_pattern
+from count_files.utils.exclude_rules import ExcludeRules
+from count_files.utils.size_stats import SizeStats, get_file_size
+from count_files.utils.progress import Progress
+from count_files.utils.path_list import PathEntry, group_paths
+from count_files.utils.file_sniffing import FileSniffer
+from count_files.utils.duplicates import group_duplicates
+from count_files.utils.line_counts import LineCounter
+from count_files.utils.inotify import Inotify, IN_CREATE, IN_DELETE, IN_MOVED_FROM, IN_MOVED_TO, \
+    IN_ISDIR, IN_IGNORED, IN_Q_OVERFLOW
 
 
 class BaseOS(object):
@@ -40,8 +58,353 @@ class BaseOS(object):
         """
         return False
 
+    def is_hidden_entry(self, *args, **kwargs) -> bool:
+        """The function determines whether the directory entry itself is hidden.
+
+        Overwritten in subclasses for certain OS.
+        Unlike def is_hidden_file_or_dir, only the entry's own attribute is checked,
+        the parent folders are not. Used in def walk, where hidden folders are pruned,
+        so every entry listed inherits the "not hidden" state of its parent folder.
+
+        :return: False by default for instance of BaseOS
+        """
+        return False
+
+    def scan_dir(self, root: str,
+                 include_hidden: bool = True) -> Optional[Tuple[List[os.DirEntry], List[os.DirEntry]]]:
+        """List one directory with os.scandir().
+
+        Used in def walk. The cached file type information of each os.DirEntry
+        is used to separate subdirectories from regular files.
+        :param root: full/path/to/folder
+        :param include_hidden: True(default) -> list all entries, False -> skip hidden entries
+        :return: tuple (dirs, files) with os.DirEntry objects
+        or None if the directory cannot be listed (e.g. permission denied)
+        """
+        dirs = []
+        files = []
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if not include_hidden and self.is_hidden_entry(entry):
+                        continue
+                    try:
+                        if entry.is_dir():
+                            dirs.append(entry)
+                        elif entry.is_file():
+                            files.append(entry)
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        return dirs, files
+
+    def scan_dir_indexed(self, root: str, include_hidden: bool,
+                         index: ScanIndex) -> Optional[Tuple[List[IndexEntry], List[IndexEntry]]]:
+        """List one directory using the scan index.
+
+        Used in def walk if the index is specified. If the modification time
+        of the directory has not changed since the previous scan,
+        the listing is taken from the index, otherwise it is listed with def scan_dir
+        and the index is updated. The index stores all entries, hidden ones are filtered here.
+        :param root: full/path/to/folder
+        :param include_hidden: True -> list all entries, False -> skip hidden entries
+        :param index: ScanIndex object (utils/scan_index.py)
+        :return: tuple (dirs, files) with IndexEntry objects
+        or None if the directory cannot be listed (e.g. permission denied)
+        """
+        listing = index.scan_dir(root, scan=self.scan_dir, is_hidden=self.is_hidden_entry)
+        if listing is None or include_hidden:
+            return listing
+        dirs, files = listing
+        return [d for d in dirs if not d.hidden], [f for f in files if not f.hidden]
+
+    @staticmethod
+    def scan_dir_excluded(root: str, scan: Callable[[str], Optional[tuple]],
+                          exclude: ExcludeRules) -> Optional[Tuple[list, list]]:
+        """List one directory and remove the excluded entries.
+
+        Used in def walk if exclude rules are specified (utils/exclude_rules.py).
+        Excluded folders are removed before the walk descends into them.
+        :param root: full/path/to/folder
+        :param scan: function listing the directory, returns (dirs, files) or None
+        :param exclude: ExcludeRules object
+        :return: tuple (dirs, files) or None if the directory cannot be listed
+        """
+        listing = scan(root)
+        if listing is None:
+            return None
+        return exclude.filter(root, *listing)
+
+    @staticmethod
+    def subdirs_to_walk(dirs: List[os.DirEntry], follow_symlinks: bool = False, device: int = None,
+                        visited: Dict[Tuple[int, int], str] = None) -> List[str]:
+        """Return the paths of subdirectories to descend into.
+
+        By default, symbolic links to directories are not followed (like os.walk).
+        If the device or the visited directories are specified, each subdirectory is checked
+        with one stat() call (the stat info of os.DirEntry has no device on Windows,
+        and IndexEntry objects have no stat info at all).
+        :param dirs: list with os.DirEntry objects
+        :param follow_symlinks: False(default) or True -> also descend into symbolic links to directories
+        :param device: optional, st_dev of the walked file system,
+        subdirectories on other devices (mount points) are skipped
+        :param visited: optional, dict with the identity (st_dev, st_ino) of each walked directory,
+        directories reached again (symlink loops, bind mounts) are skipped. Updated here,
+        dict.setdefault() is atomic, so the threads of def walk_parallel can share it.
+        :return: list with full paths, in the listed order
+        """
+        paths = []
+        for d in dirs:
+            try:
+                if not follow_symlinks and d.is_symlink():
+                    continue
+                if device is not None or visited is not None:
+                    st = os.stat(d.path)
+                    if device is not None and st.st_dev != device:
+                        continue
+                    if visited is not None and visited.setdefault((st.st_dev, st.st_ino), d.path) != d.path:
+                        continue
+            except OSError:
+                continue
+            paths.append(d.path)
+        return paths
+
+    def walk(self, dirpath: str, recursive: bool = True, include_hidden: bool = True,
+             workers: int = 1, ordered: bool = False, index: ScanIndex = None,
+             exclude: ExcludeRules = None, max_depth: int = None, one_file_system: bool = False,
+             follow_symlinks: bool = False,
+             paths: Iterable[str] = None) -> Iterable[Tuple[str, List[os.DirEntry], List[os.DirEntry]]]:
+        """Walk the directory tree top-down using os.scandir().
+
+        Similar to os.walk(), but yields os.DirEntry objects instead of names,
+        so the file type information cached by scandir() is reused
+        and no extra stat() call is needed for each file found.
+        As with os.walk(), the list of subdirectories can be modified in place
+        to prune the walk (not available if workers > 1 and ordered is False).
+        Symbolic links to directories are listed, but not followed (unless follow_symlinks is True).
+        Directories that cannot be listed (e.g. permission denied) are skipped.
+
+        If include_hidden is False, hidden files are left out and hidden folders
+        are removed from the walk itself, so their contents are never listed.
+        If dirpath itself is hidden (or is inside a hidden folder), nothing is yielded.
+
+        If workers > 1, directories are listed concurrently by a pool of threads.
+        By default, the directories are yielded in the order in which they are listed.
+        With ordered=True, they are yielded in the same order as with a single worker
+        (subdirectories are still listed ahead in the background).
+
+        If the scan index is specified, only the directories modified since the previous scan
+        are listed, the other listings are taken from the index (IndexEntry objects,
+        with the same attributes as os.DirEntry).
+
+        If exclude rules are specified, the excluded files are left out
+        and the excluded folders are removed from the walk, like hidden folders.
+
+        If max_depth is specified, the directories deeper than max_depth levels
+        are never listed: 1 -> only dirpath (the same as recursive=False),
+        2 -> dirpath and its subdirectories, etc. The deepest walked directories
+        still have their subdirectories in dirs, as with os.walk().
+
+        With one_file_system=True, the walk does not descend into directories
+        on other file systems (mount points), like find -xdev.
+        With follow_symlinks=True, symbolic links to directories are followed,
+        and each directory is walked only once, even if it can be reached by several paths
+        (symlink loops, bind mounts): the identity (st_dev, st_ino) of each walked directory is kept.
+
+        If paths are specified (e.g. read from stdin), no directory is listed:
+        the given file paths are grouped by their folders (def walk_paths),
+        dirpath and the other arguments of the walk are not used.
+
+        :param dirpath: full/path/to/folder
+        :param recursive: True(default) or False (list only the top directory)
+        :param include_hidden: True(default) -> walk all files and folders,
+        False -> skip hidden files and do not descend into hidden folders
+        :param workers: number of threads listing directories, 1(default) -> no threads
+        :param ordered: False(default) or True -> deterministic order if workers > 1
+        :param index: optional, ScanIndex object (utils/scan_index.py), None(default) -> don't use
+        :param exclude: optional, ExcludeRules object (utils/exclude_rules.py), None(default) -> don't use
+        :param max_depth: optional, the number of levels to walk, None(default) -> unlimited
+        :param one_file_system: False(default) or True -> stay on the file system of dirpath
+        :param follow_symlinks: False(default) or True -> follow symbolic links to directories
+        :param paths: optional, file paths to be used instead of the walk, None(default) -> walk dirpath
+        :return: object <class 'generator'> with tuples (root, dirs, files),
+        root - full/path/to/folder, dirs - subdirectories, files - regular files
+        (os.DirEntry objects in the order returned by the operating system)
+        """
+        if paths is not None:
+            yield from self.walk_paths(paths, include_hidden=include_hidden)
+            return
+        # skip check if path is a local drive (Windows), as in CLI
+        if not include_hidden and Path(dirpath).parents and self.is_hidden_file_or_dir(dirpath):
+            return
+        if index is None:
+            scan = partial(self.scan_dir, include_hidden=include_hidden)
+        else:
+            scan = partial(self.scan_dir_indexed, include_hidden=include_hidden, index=index)
+        if exclude:
+            scan = partial(self.scan_dir_excluded, scan=scan, exclude=exclude)
+        if not recursive:
+            max_depth = 1
+        subdirs = self.subdirs_to_walk
+        if (one_file_system or follow_symlinks) and max_depth != 1:
+            try:
+                st = os.stat(dirpath)
+            except OSError:
+                return
+            subdirs = partial(self.subdirs_to_walk, follow_symlinks=follow_symlinks,
+                              device=st.st_dev if one_file_system else None,
+                              visited={(st.st_dev, st.st_ino): dirpath} if follow_symlinks else None)
+        if workers > 1 and max_depth != 1:
+            if ordered:
+                yield from self.walk_ordered(dirpath, scan, workers, max_depth, subdirs)
+            else:
+                yield from self.walk_parallel(dirpath, scan, workers, max_depth, subdirs)
+            return
+        # stack items: (full/path/to/folder, depth), dirpath is at depth 1
+        stack = [(dirpath, 1)]
+        while stack:
+            root, depth = stack.pop()
+            listing = scan(root)
+            if listing is None:
+                continue
+            dirs, files = listing
+            yield root, dirs, files
+            if max_depth is not None and depth >= max_depth:
+                continue
+            # reversed, so that the subdirectories are walked in the listed order (like os.walk)
+            stack.extend((path, depth + 1) for path in reversed(subdirs(dirs)))
+
+    def walk_paths(self, paths: Iterable[str],
+                   include_hidden: bool = True) -> Iterable[Tuple[str, List[PathEntry], List[PathEntry]]]:
+        """Group the given file paths by their folders, like the listings of def walk.
+
+        Used in def walk if the paths are specified (--from-stdin).
+        The paths of folders, special files and files that do not exist are skipped.
+        If include_hidden is False, the files in hidden folders (checked once for each folder)
+        and the hidden files themselves are left out.
+        :param paths: file paths, full or relative to the current directory
+        :param include_hidden: True(default) or False -> skip hidden files and the files in hidden folders
+        :return: object <class 'generator'> with tuples (root, [], files),
+        files - PathEntry objects (utils/path_list.py)
+        """
+        hidden_roots = {}
+        for root, files in group_paths(paths):
+            if not include_hidden:
+                hidden = hidden_roots.get(root)
+                if hidden is None:
+                    hidden = hidden_roots[root] = self.is_hidden_file_or_dir(os.path.abspath(root))
+                if hidden:
+                    continue
+                files = [f for f in files if not self.is_hidden_entry(f)]
+            files = [f for f in files if f.is_file()]
+            if files:
+                yield root, [], files
+
+    def walk_parallel(self, dirpath: str, scan: Callable[[str], Optional[tuple]],
+                      workers: int, max_depth: int = None, subdirs: Callable[[list], List[str]] = None
+                      ) -> Iterable[Tuple[str, List[os.DirEntry], List[os.DirEntry]]]:
+        """Walk the directory tree with a pool of threads sharing one directory queue.
+
+        Used in def walk. Each thread takes the next directory from the shared queue,
+        lists it and puts its subdirectories back into the queue,
+        so idle threads always pick up the pending work.
+        Results are yielded as soon as they are ready, the order is not deterministic.
+        The threads are stopped if the generator is closed before the walk is finished.
+        An exception raised in a thread is re-raised in the caller.
+        :param dirpath: full/path/to/folder
+        :param scan: function listing one directory, returns (dirs, files) or None (see def scan_dir)
+        :param workers: number of threads
+        :param max_depth: optional, the number of levels to walk, None(default) -> unlimited
+        :param subdirs: function returning the subdirectories to descend into,
+        None(default) -> def subdirs_to_walk
+        :return: object <class 'generator'> with tuples (root, dirs, files)
+        """
+        subdirs = subdirs or self.subdirs_to_walk
+        tasks = queue.Queue()
+        results = queue.Queue()
+        stop = threading.Event()
+
+        def worker():
+            while True:
+                task = tasks.get()
+                if task is None:
+                    return
+                root, depth = task
+                try:
+                    listing = None if stop.is_set() else scan(root)
+                    paths = []
+                    descend = max_depth is None or depth < max_depth
+                    if listing is not None and descend and not stop.is_set():
+                        paths = subdirs(listing[0])
+                        for path in paths:
+                            tasks.put((path, depth + 1))
+                except Exception as exc:
+                    # the error is re-raised by the consumer, otherwise it would wait forever
+                    results.put((root, exc, 0))
+                    continue
+                # subdirectories are queued before the result, so the pending count stays positive
+                results.put((root, listing, len(paths)))
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+        for t in threads:
+            t.start()
+        tasks.put((dirpath, 1))
+        pending = 1
+        try:
+            while pending:
+                root, listing, queued = results.get()
+                if isinstance(listing, Exception):
+                    raise listing
+                pending += queued - 1
+                if listing is not None:
+                    yield (root,) + listing
+        finally:
+            stop.set()
+            for _ in threads:
+                tasks.put(None)
+
+    def walk_ordered(self, dirpath: str, scan: Callable[[str], Optional[tuple]],
+                     workers: int, max_depth: int = None, subdirs: Callable[[list], List[str]] = None
+                     ) -> Iterable[Tuple[str, List[os.DirEntry], List[os.DirEntry]]]:
+        """Walk the directory tree with a pool of threads, in a deterministic order.
+
+        Used in def walk. Subdirectories are listed ahead by the thread pool,
+        but the results are yielded in the same order as in a single-threaded walk,
+        so the output can be compared between runs.
+        :param dirpath: full/path/to/folder
+        :param scan: function listing one directory, returns (dirs, files) or None (see def scan_dir)
+        :param workers: number of threads
+        :param max_depth: optional, the number of levels to walk, None(default) -> unlimited
+        :param subdirs: function returning the subdirectories to descend into,
+        None(default) -> def subdirs_to_walk
+        :return: object <class 'generator'> with tuples (root, dirs, files)
+        """
+        subdirs = subdirs or self.subdirs_to_walk
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            stack = [(dirpath, 1, executor.submit(scan, dirpath))]
+            try:
+                while stack:
+                    root, depth, future = stack.pop()
+                    listing = future.result()
+                    if listing is None:
+                        continue
+                    dirs, files = listing
+                    yield root, dirs, files
+                    if max_depth is not None and depth >= max_depth:
+                        continue
+                    children = [(path, depth + 1, executor.submit(scan, path))
+                                for path in subdirs(dirs)]
+                    stack.extend(reversed(children))
+            finally:
+                for root, depth, future in stack:
+                    future.cancel()
+
     def search_files(self, dirpath: str, extension: str, recursive: bool = True,
-                     include_hidden: bool = False, case_sensitive: bool = False) -> Iterable[str]:
+                     include_hidden: bool = False, case_sensitive: bool = False,
+                     workers: int = 1, ordered: bool = False, index: ScanIndex = None,
+                     exclude: ExcludeRules = None, max_depth: int = None, one_file_system: bool = False,
+                     follow_symlinks: bool = False, entries: bool = False) -> Iterable[str]:
         """Find all files in a given directory with and without the extension.
 
         :param dirpath: full/path/to/folder
@@ -50,42 +413,77 @@ class BaseOS(object):
         :param include_hidden: False -> exclude hidden, True -> include hidden, counting all files
         :param case_sensitive: False -> ignore case in extensions,
         True -> distinguish case variations in extensions
+        :param workers: number of threads listing directories, 1(default) -> no threads
+        :param ordered: False(default) or True -> the same order of paths for any number of workers
+        :param index: optional, ScanIndex object (utils/scan_index.py) to reuse the previous scan
+        :param exclude: optional, ExcludeRules object (utils/exclude_rules.py) to skip files and folders
+        :param max_depth: optional, the number of levels to walk, None(default) -> unlimited
+        :param one_file_system: False(default) or True -> do not descend into other file systems
+        :param follow_symlinks: False(default) or True -> follow symbolic links to directories
+        :param entries: False(default) or True -> yield os.DirEntry objects instead of paths,
+        so that their cached stat info can be reused
         :return: object <class 'generator'> with full paths to all found files
+        (or os.DirEntry/IndexEntry objects if entries is True)
+        """
+        for root, dirs, files in self.walk(dirpath, recursive=recursive, include_hidden=include_hidden,
+                                           workers=workers, ordered=ordered, index=index, exclude=exclude,
+                                           max_depth=max_depth, one_file_system=one_file_system,
+                                           follow_symlinks=follow_symlinks):
+            for f in self.files_with_extension(files, extension, case_sensitive):
+                yield f if entries else f.path
+
+    @staticmethod
+    def files_with_extension(files: List[os.DirEntry], extension: str,
+                             case_sensitive: bool = False) -> Iterable[str]:
+        """Select the files with the given extension from one directory listing.
+
+        Used in def search_files and def folder_total.
+        :param files: list with os.DirEntry objects
+        :param extension: extension name (txt, py), '.'(without extension) or '..' (all extensions)
+        :param case_sensitive: False -> ignore case in extensions,
+        True -> distinguish case variations in extensions
+        :return: object <class 'generator'> with the selected os.DirEntry objects
         """
         # this part used for -fe .. or -t .. (all extensions)
         if extension == '..':
-            for root, dirs, files in os.walk(dirpath):
-                for f in files:
-                    f_path = os.path.join(root, f)
-                    if not os.path.isfile(f_path):
-                        continue
-                    if include_hidden or not self.is_hidden_file_or_dir(f_path):
-                        yield f_path
-                if not recursive:
-                    break
+            yield from files
         # this part used for: -fe . or -fe extension_name, -t . or -t extension_name
         else:
             ext = extension if case_sensitive else extension.upper()
-            for root, dirs, files in os.walk(dirpath):
-                for f in files:
-                    f_path = os.path.join(root, f)
-                    f_extension = get_file_extension(f_path, case_sensitive=case_sensitive)
-                    if f_extension != ext or not os.path.isfile(f_path):
-                        continue
-                    if include_hidden or not self.is_hidden_file_or_dir(f_path):
-                        yield f_path
-                if not recursive:
-                    break
+            for f in files:
+                if normalize_extension(get_name_suffix(f.name), case_sensitive) == ext:
+                    yield f
 
     def count_files_by_extension(self, dirpath: str, no_feedback: bool = False, recursive: bool = True,
-                                 include_hidden: bool = False, case_sensitive: bool = False) -> Counter:
+                                 include_hidden: bool = False, case_sensitive: bool = False,
+                                 workers: int = 1, processes: int = 1, index: ScanIndex = None,
+                                 exclude: ExcludeRules = None, max_depth: int = None, one_file_system: bool = False,
+                                 follow_symlinks: bool = False, paths: Iterable[str] = None,
+                                 sniff: bool = False) -> Counter:
         """Count all files in a given directory by their extensions.
 
+        If processes > 1, the directory tree is split into subtrees (def split_tree),
+        which are counted in a pool of processes. The partial counters are merged.
+        With follow_symlinks, the files are always counted in the current process,
+        so that each directory is walked only once.
+        With sniff, the files without extension are counted by their content type
+        ('[ELF]', '[TEXT]', ..., see utils/file_sniffing.py) instead of '[no extension]'.
+
         :param dirpath: full/path/to/folder
-        :param no_feedback: True or False(default, prints processed file names in one line)
+        :param no_feedback: True or False(default, shows the progress on stderr, see utils/progress.py)
         :param recursive: True(default, recursive search/count) or False
         :param include_hidden: False -> exclude hidden, True -> include hidden, counting all files
         :param case_sensitive: False -> ignore case in extensions, True -> distinguish case variations in extensions
+        :param workers: number of threads listing directories, 1(default) -> no threads
+        :param processes: number of worker processes, 1(default) -> count in the current process
+        :param index: optional, ScanIndex object (utils/scan_index.py) to reuse the previous scan
+        (not used if processes > 1)
+        :param exclude: optional, ExcludeRules object (utils/exclude_rules.py) to skip files and folders
+        :param max_depth: optional, the number of levels to walk, None(default) -> unlimited
+        :param one_file_system: False(default) or True -> do not descend into other file systems
+        :param follow_symlinks: False(default) or True -> follow symbolic links to directories
+        :param paths: optional, file paths to be counted instead of walking dirpath (see def walk)
+        :param sniff: False(default) or True -> read the first bytes of the files without extension
         :return: Counter() with extensions (keys: str)and their frequencies (values: int)
         if case_sensitive(extensions are displayed as is):
         Counter({'txt': 15, 'py': 15, 'pyc': 13, '[no extension]': 8, ...})
@@ -94,42 +492,556 @@ class BaseOS(object):
         """
         counters = Counter()
         dirpath = os.path.expanduser(dirpath)
+        if processes > 1 and recursive and max_depth != 1 and not follow_symlinks and paths is None:
+            return self.count_files_by_extension_in_processes(dirpath, no_feedback=no_feedback,
+                                                              include_hidden=include_hidden,
+                                                              case_sensitive=case_sensitive,
+                                                              workers=workers, processes=processes,
+                                                              exclude=exclude, max_depth=max_depth,
+                                                              one_file_system=one_file_system, sniff=sniff)
 
-        def count_file_extensions(files: Iterable[str], no_feedback: bool = no_feedback):
-            for f in files:
-                extension = get_file_extension(f, case_sensitive=case_sensitive)
-                if extension == '.':
-                    extension = '[no extension]'
-                counters[extension] += 1
-                if not no_feedback:
-                    print("\r" + os.path.basename(f)[:TERM_WIDTH - 1].ljust(TERM_WIDTH - 1), end="")
-
-        if recursive:
-            if include_hidden:
-                for root, dirs, files in os.walk(dirpath):
-                    count_file_extensions(files)
-            else:
-                for root, dirs, files in os.walk(dirpath):
-                    only_these = [f for f in files
-                                  if not self.is_hidden_file_or_dir(os.path.join(root, f))]
-                    count_file_extensions(only_these)
-        else:
-            with os.scandir(dirpath) as directory:
-                # if True return all files
-                if include_hidden:
-                    only_these = [f for f in directory if f.is_file()]
+        sniffer = FileSniffer() if sniff else None
+        try:
+            with Progress(enabled=not no_feedback, expected_dirs=index and len(index.dirs)) as progress:
+                for root, dirs, files in self.walk(dirpath, recursive=recursive, include_hidden=include_hidden,
+                                                   workers=workers, index=index, exclude=exclude,
+                                                   max_depth=max_depth, one_file_system=one_file_system,
+                                                   follow_symlinks=follow_symlinks, paths=paths):
+                    # each directory listing is classified in one batch and added to the counters in bulk
+                    counters.update(count_extensions((f.name for f in files), case_sensitive=case_sensitive))
+                    if sniffer is not None:
+                        sniffer.add(f for f in files if not get_name_suffix(f.name))
+                    progress.update(files=len(files))
+        finally:
+            if sniffer is not None:
+                sniffer.close()
+        if sniffer is not None:
+            self.replace_no_extension(counters, sniffer.counts)
+        return counters
+
+    @staticmethod
+    def replace_no_extension(counters: Counter, content_types: Counter):
+        """Replace the files without extension with their content types in the counters.
+
+        Used in def count_files_by_extension and def count_files_by_extension_in_processes with sniff.
+        :param counters: Counter() with extensions, including '[no extension]'
+        :param content_types: Counter() from FileSniffer (utils/file_sniffing.py),
+        the files that were not classified are counted as '[no extension]'
+        :return: counters are changed in place
+        """
+        counters['[no extension]'] -= sum(content_types.values())
+        counters.update(content_types)
+        if counters['[no extension]'] <= 0:
+            del counters['[no extension]']
+
+    def count_lines_by_extension(self, dirpath: str, no_feedback: bool = False, recursive: bool = True,
+                                 include_hidden: bool = False, case_sensitive: bool = False,
+                                 workers: int = 1, index: ScanIndex = None,
+                                 exclude: ExcludeRules = None, max_depth: int = None, one_file_system: bool = False,
+                                 follow_symlinks: bool = False, paths: Iterable[str] = None,
+                                 skip_binary: bool = False) -> Tuple[Counter, Counter]:
+        """Count all files in a given directory and their lines by extension.
+
+        The files of each directory listing are read in a pool of threads (utils/line_counts.py),
+        while the walk goes on.
+        :param dirpath: full/path/to/folder
+        :param no_feedback: True or False(default, shows the progress on stderr, see utils/progress.py)
+        :param recursive: True(default, recursive search/count) or False
+        :param include_hidden: False -> exclude hidden, True -> include hidden, counting all files
+        :param case_sensitive: False -> ignore case in extensions, True -> distinguish case variations in extensions
+        :param workers: number of threads listing directories, 1(default) -> no threads
+        :param index: optional, ScanIndex object (utils/scan_index.py) to reuse the previous scan
+        :param exclude: optional, ExcludeRules object (utils/exclude_rules.py) to skip files and folders
+        :param max_depth: optional, the number of levels to walk, None(default) -> unlimited
+        :param one_file_system: False(default) or True -> do not descend into other file systems
+        :param follow_symlinks: False(default) or True -> follow symbolic links to directories
+        :param paths: optional, file paths to be counted instead of walking dirpath (see def walk)
+        :param skip_binary: False(default) or True -> binary files (with NUL bytes) are counted with 0 lines
+        :return: tuple (files, lines), Counter() objects with extensions
+        (see def count_files_by_extension) and the number of files or lines
+        """
+        dirpath = os.path.expanduser(dirpath)
+        with LineCounter(skip_binary=skip_binary) as counter, \
+                Progress(enabled=not no_feedback, expected_dirs=index and len(index.dirs)) as progress:
+            for root, dirs, files in self.walk(dirpath, recursive=recursive, include_hidden=include_hidden,
+                                               workers=workers, index=index, exclude=exclude,
+                                               max_depth=max_depth, one_file_system=one_file_system,
+                                               follow_symlinks=follow_symlinks, paths=paths):
+                counter.add((normalize_extension(get_name_suffix(f.name), case_sensitive, '[no extension]'), f)
+                            for f in files)
+                progress.update(files=len(files))
+        return counter.files, counter.lines
+
+    def split_tree(self, dirpath: str, include_hidden: bool, min_shards: int,
+                   exclude: ExcludeRules = None, max_depth: int = None,
+                   one_file_system: bool = False) -> Tuple[List[str], List[Tuple[str, List[os.DirEntry]]]]:
+        """Split the directory tree into subtrees (shards) for processing in parallel.
+
+        The top-level directories under dirpath are the shards.
+        If there are fewer than min_shards of them, the split goes one level deeper
+        (up to SHARD_MAX_DEPTH levels, but not below max_depth), so that the work is spread more evenly.
+        The directories above the shards are listed here,
+        their files must be processed by the caller.
+        :param dirpath: full/path/to/folder
+        :param include_hidden: False -> skip hidden files and folders, True -> include them
+        :param min_shards: desired minimum number of subtrees
+        :param exclude: optional, ExcludeRules object (utils/exclude_rules.py) to skip files and folders
+        :param max_depth: optional, the number of levels to walk, None(default) -> unlimited
+        :param one_file_system: False(default) or True -> do not descend into other file systems
+        :return: tuple (shards, listed),
+        shards - list with full paths to the subtrees that have not been listed,
+        listed - list with tuples (root, files) for the directories listed while splitting
+        """
+        # skip check if path is a local drive (Windows), as in CLI
+        if not include_hidden and Path(dirpath).parents and self.is_hidden_file_or_dir(dirpath):
+            return [], []
+        device = None
+        if one_file_system:
+            try:
+                device = os.stat(dirpath).st_dev
+            except OSError:
+                return [], []
+        shards = [dirpath]
+        listed = []
+        for depth in range(1, SHARD_MAX_DEPTH + 1):
+            if len(shards) >= min_shards or (max_depth is not None and depth >= max_depth):
+                break
+            next_level = []
+            for root in shards:
+                if exclude:
+                    listing = self.scan_dir_excluded(root, partial(self.scan_dir, include_hidden=include_hidden),
+                                                     exclude)
                 else:
-                    only_these = [f for f in directory if f.is_file()
-                                  and not self.is_hidden_file_or_dir(os.path.join(dirpath, f))]
-                count_file_extensions(only_these)
+                    listing = self.scan_dir(root, include_hidden)
+                if listing is None:
+                    continue
+                dirs, files = listing
+                listed.append((root, files))
+                next_level.extend(self.subdirs_to_walk(dirs, device=device))
+            shards = next_level
+        return shards, listed
 
-        if not no_feedback:
-            print("\r".ljust(TERM_WIDTH - 1))  # Clean the feedback text before proceeding.
+    @staticmethod
+    def subtree_max_depth(dirpath: str, subtree: str, max_depth: Optional[int]) -> Optional[int]:
+        """Return the max_depth for the walk of a subtree, so that the whole walk stops at max_depth.
+
+        Used in def count_files_by_extension_in_processes, def search_folders_in_processes
+        and def watch_files_by_extension.
+        :param dirpath: full/path/to/folder (at depth 1)
+        :param subtree: full/path/to/folder/subfolder below dirpath
+        :param max_depth: the number of levels to walk from dirpath, None -> unlimited
+        :return: the number of levels to walk from subtree, None -> unlimited
+        """
+        if max_depth is None:
+            return None
+        relative = os.path.relpath(subtree, dirpath)
+        return max_depth if relative == os.curdir else max_depth - relative.count(os.sep) - 1
+
+    def count_files_by_extension_in_processes(self, dirpath: str, no_feedback: bool = False,
+                                              include_hidden: bool = False, case_sensitive: bool = False,
+                                              workers: int = 1, processes: int = 2,
+                                              exclude: ExcludeRules = None, max_depth: int = None,
+                                              one_file_system: bool = False, sniff: bool = False) -> Counter:
+        """Count all files in a given directory by their extensions, using a pool of processes.
+
+        Used in def count_files_by_extension if processes > 1.
+        Each subtree from def split_tree is counted in a worker process
+        (def count_in_subtree), the partial counters are merged here.
+        :param dirpath: full/path/to/folder
+        :param no_feedback: True or False(default, shows the progress on stderr after each subtree)
+        :param include_hidden: False -> exclude hidden, True -> include hidden, counting all files
+        :param case_sensitive: False -> ignore case in extensions, True -> distinguish case variations in extensions
+        :param workers: number of threads listing directories in each process
+        :param processes: number of worker processes
+        :param exclude: optional, ExcludeRules object (utils/exclude_rules.py) to skip files and folders
+        :param max_depth: optional, the number of levels to walk, None(default) -> unlimited
+        :param one_file_system: False(default) or True -> do not descend into other file systems
+        :param sniff: False(default) or True -> count the files without extension by content type
+        :return: Counter() with extensions (keys: str)and their frequencies (values: int)
+        """
+        counters = Counter()
+        shards, listed = self.split_tree(dirpath, include_hidden, min_shards=processes * SHARDS_PER_PROCESS,
+                                         exclude=exclude, max_depth=max_depth,
+                                         one_file_system=one_file_system)
+        for root, files in listed:
+            counters.update(count_extensions((f.name for f in files), case_sensitive=case_sensitive))
+        if sniff:
+            with FileSniffer() as sniffer:
+                for root, files in listed:
+                    sniffer.add(f for f in files if not get_name_suffix(f.name))
+            self.replace_no_extension(counters, sniffer.counts)
+        tasks = [(shard, include_hidden, case_sensitive, workers, exclude,
+                  self.subtree_max_depth(dirpath, shard, max_depth), one_file_system, sniff) for shard in shards]
+        with ProcessPoolExecutor(max_workers=processes) as executor, \
+                Progress(enabled=not no_feedback) as progress:
+            progress.update(files=sum(counters.values()), dirs=0)
+            for subtree_counters in executor.map(count_in_subtree, tasks):
+                counters.update(subtree_counters)
+                progress.update(files=sum(subtree_counters.values()), dirs=0)
         return counters
 
-    def search_files_by_pattern(self, dirpath: str, pattern: str,
+    def search_folders(self, dirpath: str, extension: str, recursive: bool = True,
+                       include_hidden: bool = False, case_sensitive: bool = False,
+                       total_size: bool = False, size_quantiles: bool = False,
+                       workers: int = 1, ordered: bool = False, index: ScanIndex = None,
+                       exclude: ExcludeRules = None, max_depth: int = None, one_file_system: bool = False,
+                       follow_symlinks: bool = False, progress: Progress = None,
+                       paths: Iterable[str] = None) -> Iterable[Tuple[str, int, Optional[SizeStats]]]:
+        """Get the number of found files (and their size info) in each folder.
+
+        Used in CLI for --total. The files are counted for each directory listing of the walk,
+        one record is yielded for each folder with at least one found file,
+        so the paths of the files are neither yielded nor split to find their folders.
+        :param dirpath: full/path/to/folder
+        :param extension: extension name (txt, py), '.'(without extension) or '..' (all extensions)
+        :param recursive: True(default) or False
+        :param include_hidden: False -> exclude hidden, True -> include hidden, counting all files
+        :param case_sensitive: False -> ignore case in extensions,
+        True -> distinguish case variations in extensions
+        :param total_size: True -> collect the size info, False(default) -> don't collect
+        :param size_quantiles: True -> also collect the size histogram, False(default) -> don't collect
+        :param workers: number of threads listing directories, 1(default) -> no threads
+        :param ordered: False(default) or True -> the same order of folders for any number of workers
+        :param index: optional, ScanIndex object (utils/scan_index.py) to reuse the previous scan
+        :param exclude: optional, ExcludeRules object (utils/exclude_rules.py) to skip files and folders
+        :param max_depth: optional, the number of levels to walk, None(default) -> unlimited
+        :param one_file_system: False(default) or True -> do not descend into other file systems
+        :param follow_symlinks: False(default) or True -> follow symbolic links to directories
+        :param progress: optional, Progress object (utils/progress.py) updated for each folder
+        :param paths: optional, file paths to be counted instead of walking dirpath (see def walk)
+        :return: object <class 'generator'> with tuples (root, files_amount, sizes),
+        root - full/path/to/folder, sizes - SizeStats object (utils/size_stats.py) or None if total_size is False
+        """
+        for root, dirs, files in self.walk(dirpath, recursive=recursive, include_hidden=include_hidden,
+                                           workers=workers, ordered=ordered, index=index, exclude=exclude,
+                                           max_depth=max_depth, one_file_system=one_file_system,
+                                           follow_symlinks=follow_symlinks, paths=paths):
+            if progress is not None:
+                progress.update(files=len(files))
+            record = self.folder_total(root, files, extension, case_sensitive, total_size, size_quantiles)
+            if record is not None:
+                yield record
+
+    def folder_total(self, root: str, files: List[os.DirEntry], extension: str, case_sensitive: bool = False,
+                     total_size: bool = False,
+                     size_quantiles: bool = False) -> Optional[Tuple[str, int, Optional[SizeStats]]]:
+        """Get the number of found files (and their size info) in one directory listing.
+
+        Used in def search_folders and def search_folders_in_processes.
+        The sizes are taken from the stat info of the directory entries (def get_file_size).
+        :param root: full/path/to/folder
+        :param files: list with os.DirEntry objects
+        :param extension: extension name (txt, py), '.'(without extension) or '..' (all extensions)
+        :param case_sensitive: False -> ignore case in extensions,
+        True -> distinguish case variations in extensions
+        :param total_size: True -> collect the size info, False(default) -> don't collect
+        :param size_quantiles: True -> also collect the size histogram, False(default) -> don't collect
+        :return: tuple (root, files_amount, sizes) or None if no files were found
+        """
+        found = files if extension == '..' else list(self.files_with_extension(files, extension, case_sensitive))
+        if not found:
+            return None
+        sizes = None
+        if total_size:
+            sizes = SizeStats(quantiles=size_quantiles)
+            for f in found:
+                try:
+                    sizes.add(get_file_size(f))
+                except OSError:
+                    continue  # removed in the meantime
+        return root, len(found), sizes
+
+    def search_folders_in_processes(self, dirpath: str, extension: str, include_hidden: bool = False,
+                                    case_sensitive: bool = False, total_size: bool = False,
+                                    size_quantiles: bool = False, show_folders: bool = False,
+                                    workers: int = 1, processes: int = 2,
+                                    exclude: ExcludeRules = None, max_depth: int = None,
+                                    one_file_system: bool = False,
+                                    progress: Progress = None) -> Iterable[Tuple[str, int, Optional[SizeStats]]]:
+        """Get the number of found files (and their size info) in each folder, using a pool of processes.
+
+        Used in CLI instead of def search_folders for --total with --processes.
+        Each subtree from def split_tree is processed in a worker process (def total_in_subtree),
+        its records are yielded as soon as the subtree is done.
+        If show_folders is False, each worker process merges the records of its subtree into one,
+        so that only the totals are passed between processes.
+        :param dirpath: full/path/to/folder
+        :param extension: extension name (txt, py), '.'(without extension) or '..' (all extensions)
+        :param include_hidden: False -> exclude hidden, True -> include hidden, counting all files
+        :param case_sensitive: False -> ignore case in extensions,
+        True -> distinguish case variations in extensions
+        :param total_size: True -> collect the size info, False(default) -> don't collect
+        :param size_quantiles: True -> also collect the size histogram, False(default) -> don't collect
+        :param show_folders: True -> one record for each folder, False(default) -> one record for each subtree
+        :param workers: number of threads listing directories in each process
+        :param processes: number of worker processes
+        :param exclude: optional, ExcludeRules object (utils/exclude_rules.py) to skip files and folders
+        :param max_depth: optional, the number of levels to walk, None(default) -> unlimited
+        :param one_file_system: False(default) or True -> do not descend into other file systems
+        :param progress: optional, Progress object (utils/progress.py) updated for each record
+        (only the found files are counted)
+        :return: object <class 'generator'> with tuples (root, files_amount, sizes), see def search_folders
+        """
+        shards, listed = self.split_tree(dirpath, include_hidden, min_shards=processes * SHARDS_PER_PROCESS,
+                                         exclude=exclude, max_depth=max_depth,
+                                         one_file_system=one_file_system)
+        for root, files in listed:
+            record = self.folder_total(root, files, extension, case_sensitive, total_size, size_quantiles)
+            if record is not None:
+                if progress is not None:
+                    progress.update(files=record[1], dirs=0)
+                yield record
+        tasks = [(shard, extension, include_hidden, case_sensitive, workers, total_size, show_folders, exclude,
+                  self.subtree_max_depth(dirpath, shard, max_depth), one_file_system, size_quantiles)
+                 for shard in shards]
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for records in executor.map(total_in_subtree, tasks):
+                for record in records:
+                    if progress is not None:
+                        progress.update(files=record[1], dirs=0)
+                    yield record
+
+    def collect_report(self, dirpath: str, recursive: bool = True, include_hidden: bool = False,
+                       case_sensitive: bool = False, show_folders: bool = False,
+                       workers: int = 1, ordered: bool = False, no_feedback: bool = False,
+                       index: ScanIndex = None, exclude: ExcludeRules = None, max_depth: int = None,
+                       one_file_system: bool = False, follow_symlinks: bool = False,
+                       size_quantiles: bool = False, paths: Iterable[str] = None) -> dict:
+        """Collect the extension counts, the totals, the sizes and the folders in one traversal.
+
+        Used in CLI for --report instead of separate runs of def count_files_by_extension,
+        def search_files (--total) and def show_result_for_total.
+        The size of each file is taken from a single stat() call.
+        :param dirpath: full/path/to/folder
+        :param recursive: True(default) or False
+        :param include_hidden: False -> exclude hidden, True -> include hidden, counting all files
+        :param case_sensitive: False -> ignore case in extensions, True -> distinguish case variations in extensions
+        :param show_folders: True -> count the files in each folder, False(default) -> don't count
+        :param workers: number of threads listing directories, 1(default) -> no threads
+        :param ordered: False(default) or True -> the same order of folders for any number of workers
+        :param no_feedback: True or False(default, shows the progress on stderr, see utils/progress.py)
+        :param index: optional, ScanIndex object (utils/scan_index.py) to reuse the previous scan
+        :param exclude: optional, ExcludeRules object (utils/exclude_rules.py) to skip files and folders
+        :param max_depth: optional, the number of levels to walk, None(default) -> unlimited
+        :param one_file_system: False(default) or True -> do not descend into other file systems
+        :param follow_symlinks: False(default) or True -> follow symbolic links to directories
+        :param size_quantiles: False(default) or True -> also collect the size histogram for quantiles
+        :param paths: optional, file paths to be counted instead of walking dirpath (see def walk)
+        :return: dict with items:
+        'extensions' - Counter() with extensions and their frequencies (see def count_files_by_extension),
+        'ext_sizes' - Counter() with extensions and the combined size of their files,
+        'files' - total number of files,
+        'sizes' - SizeStats object (utils/size_stats.py),
+        'folders' - dict with items like {'full/path/to/folder': files_amount}, empty if not show_folders
+        """
+        extensions = Counter()
+        ext_sizes = Counter()
+        folders = {}
+        files_amount = 0
+        sizes = SizeStats(quantiles=size_quantiles)
+        dirpath = os.path.expanduser(dirpath)
+        with Progress(enabled=not no_feedback, expected_dirs=index and len(index.dirs)) as progress:
+            for root, dirs, files in self.walk(dirpath, recursive=recursive, include_hidden=include_hidden,
+                                               workers=workers, ordered=ordered, index=index, exclude=exclude,
+                                               max_depth=max_depth, one_file_system=one_file_system,
+                                               follow_symlinks=follow_symlinks, paths=paths):
+                progress.update(files=len(files))
+                if not files:
+                    continue
+                for f in files:
+                    extension = normalize_extension(get_name_suffix(f.name), case_sensitive, '[no extension]')
+                    extensions[extension] += 1
+                    try:
+                        file_size = f.stat().st_size
+                    except OSError:
+                        continue
+                    ext_sizes[extension] += file_size
+                    sizes.add(file_size)
+                files_amount += len(files)
+                if show_folders:
+                    folders[root] = len(files)
+        return {'extensions': extensions, 'ext_sizes': ext_sizes, 'files': files_amount,
+                'sizes': sizes, 'folders': folders}
+
+    def find_duplicates(self, dirpath: str, recursive: bool = True, include_hidden: bool = False,
+                        workers: int = 1, no_feedback: bool = False, index: ScanIndex = None,
+                        exclude: ExcludeRules = None, max_depth: int = None, one_file_system: bool = False,
+                        follow_symlinks: bool = False, paths: Iterable[str] = None) -> List[Tuple[int, List[str]]]:
+        """Find the duplicate files (the files with identical content).
+
+        The files are grouped by size from the stat info of the walk,
+        then only the files with the same size are hashed (see utils/duplicates.py).
+        Empty files are not counted. Hard links to the same file are counted once.
+        :param dirpath: full/path/to/folder
+        :param recursive: True(default) or False
+        :param include_hidden: False -> exclude hidden, True -> include hidden, counting all files
+        :param workers: number of threads listing directories, 1(default) -> no threads
+        :param no_feedback: True or False(default, shows the progress on stderr, see utils/progress.py)
+        :param index: optional, ScanIndex object (utils/scan_index.py) to reuse the previous scan
+        :param exclude: optional, ExcludeRules object (utils/exclude_rules.py) to skip files and folders
+        :param max_depth: optional, the number of levels to walk, None(default) -> unlimited
+        :param one_file_system: False(default) or True -> do not descend into other file systems
+        :param follow_symlinks: False(default) or True -> follow symbolic links to directories
+        :param paths: optional, file paths to be checked instead of walking dirpath (see def walk)
+        :return: list with tuples (size, paths) of the identical files, largest wasted space first
+        """
+        # the first file of each size, and the files of the sizes found more than once
+        # (by the identity of the file, so that hard links are not duplicates)
+        first = {}
+        same_size = {}
+        dirpath = os.path.expanduser(dirpath)
+        with Progress(enabled=not no_feedback, expected_dirs=index and len(index.dirs)) as progress:
+            for root, dirs, files in self.walk(dirpath, recursive=recursive, include_hidden=include_hidden,
+                                               workers=workers, index=index, exclude=exclude,
+                                               max_depth=max_depth, one_file_system=one_file_system,
+                                               follow_symlinks=follow_symlinks, paths=paths):
+                progress.update(files=len(files))
+                for f in files:
+                    try:
+                        st = f.stat()
+                    except OSError:
+                        continue
+                    if not st.st_size:
+                        continue
+                    identity = (st.st_dev, st.st_ino) if st.st_ino else f.path
+                    group = same_size.get(st.st_size)
+                    if group is not None:
+                        group.setdefault(identity, f.path)
+                    elif st.st_size in first:
+                        first_identity, first_path = first[st.st_size]
+                        if first_identity != identity:
+                            same_size[st.st_size] = {first_identity: first_path, identity: f.path}
+                            del first[st.st_size]
+                    else:
+                        first[st.st_size] = (identity, f.path)
+        del first
+        return group_duplicates((size, list(group.values())) for size, group in same_size.items())
+
+    def watch_files_by_extension(self, dirpath: str, recursive: bool = True, include_hidden: bool = False,
+                                 case_sensitive: bool = False, interval: float = WATCH_INTERVAL,
+                                 exclude: ExcludeRules = None, max_depth: int = None,
+                                 one_file_system: bool = False) -> Iterable[Counter]:
+        """Count all files by their extensions and keep the counts up to date.
+
+        Used in CLI for --watch. After the initial count, each watched folder is subscribed
+        to the inotify events (utils/inotify.py, Linux only), and the counts are updated
+        as files are created, deleted or renamed, without rescanning the tree.
+        New folders are counted and watched, removed folders are subtracted.
+        If the event queue overflows, the tree is counted again.
+        Raises OSError if inotify is not available or the watch limit is reached
+        (see /proc/sys/fs/inotify/max_user_watches).
+
+        :param dirpath: full/path/to/folder
+        :param recursive: True(default, recursive count) or False
+        :param include_hidden: False -> exclude hidden, True -> include hidden, counting all files
+        :param case_sensitive: False -> ignore case in extensions, True -> distinguish case variations in extensions
+        :param interval: minimal interval between two results in seconds, WATCH_INTERVAL(default)
+        :param exclude: optional, ExcludeRules object (utils/exclude_rules.py) to skip files and folders
+        :param max_depth: optional, the number of levels to walk, None(default) -> unlimited
+        :param one_file_system: False(default) or True -> do not descend into other file systems
+        :return: object <class 'generator'> with Counter() (see def count_files_by_extension),
+        the first one after the initial count, then at most once per interval if the counts have changed.
+        Runs until interrupted.
+        """
+        dirpath = os.path.expanduser(dirpath)
+        counters = Counter()
+        # folders: {'full/path/to/folder': {'file name': 'extension', ...}, ...}
+        folders = {}
+        # watches: {watch descriptor: 'full/path/to/folder', ...}
+        watches = {}
+
+        def extension_of(name: str) -> str:
+            return normalize_extension(get_name_suffix(name), case_sensitive, '[no extension]')
+
+        def subtract(extension: str):
+            counters[extension] -= 1
+            if counters[extension] <= 0:
+                del counters[extension]
+
+        def add_tree(path: str):
+            path_max_depth = self.subtree_max_depth(dirpath, path, max_depth)
+            if path_max_depth is not None and path_max_depth < 1:
+                return  # deeper than max_depth
+            for root, dirs, files in self.walk(path, recursive=recursive, include_hidden=include_hidden,
+                                               exclude=exclude, max_depth=path_max_depth,
+                                               one_file_system=one_file_system):
+                try:
+                    wd = inotify.add_watch(root)
+                except OSError as e:
+                    if e.errno == errno.ENOSPC:
+                        raise OSError(e.errno, 'inotify watch limit reached, '
+                                               'see /proc/sys/fs/inotify/max_user_watches', root)
+                    continue  # removed or not readable in the meantime
+                watches[wd] = root
+                names = folders.setdefault(root, {})
+                for f in files:
+                    if f.name not in names:
+                        names[f.name] = extension_of(f.name)
+                        counters[names[f.name]] += 1
+
+        def remove_tree(path: str):
+            prefix = os.path.join(path, '')
+            for root in [r for r in folders if r == path or r.startswith(prefix)]:
+                for extension in folders.pop(root).values():
+                    subtract(extension)
+            for wd in [wd for wd, root in watches.items() if root == path or root.startswith(prefix)]:
+                inotify.rm_watch(wd)
+                del watches[wd]
+
+        inotify = Inotify()
+        try:
+            add_tree(dirpath)
+            yield Counter(counters)
+            last_time = time.monotonic()
+            changed = False
+            while True:
+                timeout = max(0.0, interval - (time.monotonic() - last_time)) if changed else None
+                for wd, mask, cookie, name in inotify.read_events(timeout):
+                    if mask & IN_Q_OVERFLOW:
+                        remove_tree(dirpath)
+                        add_tree(dirpath)
+                        changed = True
+                        continue
+                    root = watches.get(wd)
+                    if root is None:
+                        continue
+                    if mask & IN_IGNORED:
+                        # the watched folder was deleted, its files are already subtracted
+                        del watches[wd]
+                        continue
+                    path = os.path.join(root, name)
+                    if not include_hidden and self.is_hidden_file_or_dir(path):
+                        continue
+                    if exclude and exclude.is_excluded(exclude.rules_for(root), root, name, bool(mask & IN_ISDIR)):
+                        continue
+                    if mask & IN_ISDIR:
+                        if mask & (IN_CREATE | IN_MOVED_TO) and recursive:
+                            add_tree(path)
+                        elif mask & (IN_DELETE | IN_MOVED_FROM):
+                            remove_tree(path)
+                    else:
+                        names = folders.setdefault(root, {})
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            if name not in names and os.path.isfile(path):
+                                names[name] = extension_of(name)
+                                counters[names[name]] += 1
+                        elif mask & (IN_DELETE | IN_MOVED_FROM) and name in names:
+                            subtract(names.pop(name))
+                    changed = True
+                if changed and time.monotonic() - last_time >= interval:
+                    yield Counter(counters)
+                    last_time = time.monotonic()
+                    changed = False
+        finally:
+            inotify.close()
+
+    def search_files_by_pattern(self, dirpath: str, pattern: Union[str, Iterable[str]],
                                 recursive: bool = True, include_hidden: bool = False,
-                                case_sensitive: bool = False) -> Iterable[str]:
+                                case_sensitive: bool = False, workers: int = 1,
+                                ordered: bool = False, index: ScanIndex = None,
+                                exclude: ExcludeRules = None, max_depth: int = None,
+                                one_file_system: bool = False, follow_symlinks: bool = False,
+                                entries: bool = False) -> Iterable[str]:
         """Search for file names matching given pattern(including extension).
 
         Used Unix shell-style wildcards: https://docs.python.org/3/library/fnmatch.html
@@ -140,31 +1052,106 @@ class BaseOS(object):
         Note that the filename separator ('/' on Unix) is not special to this module.
         Similarly, filenames starting with a period are not special for this module,
         and are matched by the * and ? patterns.
+        Several patterns are compiled into one regular expression (def compile_filename_patterns),
+        a file name matching any of them is found in the same walk.
+        Patterns with folders (src/*/test_*.py, docs/**/*.md) are matched against the path
+        relative to dirpath, ** matches zero or more folders (utils/path_patterns.py).
+        Folders that cannot contain a matching file are not walked at all.
+        In this case, the walk with workers > 1 is always ordered, so that it can be pruned.
 
         :param dirpath: full/path/to/folder
-        :param pattern: string with *, ?, [seq], [!seq] or only string(exact filename match)
+        :param pattern: string with *, ?, [seq], [!seq] or only string(exact filename match),
+        or list with such strings
         :param recursive: recursive(default) or non-recursive search
         :param include_hidden: if False, exclude hidden files(default),
         if True - include hidden files
         :param case_sensitive: if False, ignore case in extensions(default),
         if True - distinguish case variations in extensions
+        :param workers: number of threads listing directories, 1(default) -> no threads
+        :param ordered: False(default) or True -> the same order of paths for any number of workers
+        :param index: optional, ScanIndex object (utils/scan_index.py) to reuse the previous scan
+        :param exclude: optional, ExcludeRules object (utils/exclude_rules.py) to skip files and folders
+        :param max_depth: optional, the number of levels to walk, None(default) -> unlimited
+        :param one_file_system: False(default) or True -> do not descend into other file systems
+        :param follow_symlinks: False(default) or True -> follow symbolic links to directories
+        :param entries: False(default) or True -> yield os.DirEntry objects instead of paths
         :return: object <class 'generator'> with full paths to all found files
         """
-        pattern = pattern if case_sensitive else pattern.lower()
-        for root, dirs, files in os.walk(dirpath):
+        patterns = [pattern] if isinstance(pattern, str) else list(pattern)
+        if any(is_path_pattern(p) for p in patterns):
+            yield from self.search_files_by_path_pattern(dirpath, patterns, recursive=recursive,
+                                                         include_hidden=include_hidden,
+                                                         case_sensitive=case_sensitive,
+                                                         workers=workers, index=index, exclude=exclude,
+                                                         max_depth=max_depth, one_file_system=one_file_system,
+                                                         follow_symlinks=follow_symlinks, entries=entries)
+            return
+        match = compile_filename_patterns(patterns, case_sensitive=case_sensitive).match
+        for root, dirs, files in self.walk(dirpath, recursive=recursive, include_hidden=include_hidden,
+                                           workers=workers, ordered=ordered, index=index, exclude=exclude,
+                                           max_depth=max_depth, one_file_system=one_file_system,
+                                           follow_symlinks=follow_symlinks):
             for f in files:
-                f_path = os.path.join(root, f)
-                if not os.path.isfile(f_path):
-                    continue
-                result = fnmatch.fnmatchcase(f, pattern) if case_sensitive \
-                    else fnmatch.fnmatch(f.lower(), pattern)
-                if result:
-                    if include_hidden or not self.is_hidden_file_or_dir(f_path):
-                        yield f_path
-                else:
-                    continue
-            if not recursive:
-                break
+                if match(f.name):
+                    yield f if entries else f.path
+
+    def search_files_by_path_pattern(self, dirpath: str, patterns: List[str],
+                                     recursive: bool = True, include_hidden: bool = False,
+                                     case_sensitive: bool = False, workers: int = 1,
+                                     index: ScanIndex = None, exclude: ExcludeRules = None,
+                                     max_depth: int = None, one_file_system: bool = False,
+                                     follow_symlinks: bool = False, entries: bool = False) -> Iterable[str]:
+        """Search for files whose paths relative to dirpath match given patterns.
+
+        Used in def search_files_by_pattern if any pattern contains folders.
+        The state of each folder (see utils/path_patterns.py) is computed from the state
+        of its parent, subfolders with an empty state are removed from the walk.
+        The walk is depth-first (ordered=True), so only the states of the subfolders
+        of the folders on the current path are kept; the states of the subfolders
+        that are not walked (max_depth, unreadable folders) are dropped with their parent.
+        :param dirpath: full/path/to/folder
+        :param patterns: list with path patterns (src/**/test_*.py) and/or file name patterns (*.py)
+        :param recursive: recursive(default) or non-recursive search
+        :param include_hidden: if False, exclude hidden files(default), if True - include hidden files
+        :param case_sensitive: if False, ignore case(default), if True - distinguish case variations
+        :param workers: number of threads listing directories, 1(default) -> no threads
+        :param index: optional, ScanIndex object (utils/scan_index.py) to reuse the previous scan
+        :param exclude: optional, ExcludeRules object (utils/exclude_rules.py) to skip files and folders
+        :param max_depth: optional, the number of levels to walk, None(default) -> unlimited
+        :param one_file_system: False(default) or True -> do not descend into other file systems
+        :param follow_symlinks: False(default) or True -> follow symbolic links to directories
+        :param entries: False(default) or True -> yield os.DirEntry objects instead of paths
+        :return: object <class 'generator'> with full paths to all found files
+        """
+        path_patterns = PathPatterns(patterns, case_sensitive=case_sensitive)
+        # the folders from dirpath down to the current one, with the states of their subfolders
+        # that are not walked yet: list with tuples (root, {'full/path/to/subfolder': state})
+        parents = []
+        for root, dirs, files in self.walk(dirpath, recursive=recursive, include_hidden=include_hidden,
+                                           workers=workers, ordered=True, index=index, exclude=exclude,
+                                           max_depth=max_depth, one_file_system=one_file_system,
+                                           follow_symlinks=follow_symlinks):
+            if root == dirpath:
+                state = path_patterns.start
+            else:
+                while root not in parents[-1][1]:
+                    parents.pop()
+                state = parents[-1][1].pop(root)
+            if recursive:
+                d_states = {}
+                kept = []
+                for d in dirs:
+                    d_state = path_patterns.enter(state, d.name)
+                    if d_state:
+                        d_states[d.path] = d_state
+                        kept.append(d)
+                dirs[:] = kept
+                if d_states:
+                    parents.append((root, d_states))
+            match = path_patterns.file_matcher(state)
+            for f in files:
+                if match(f.name):
+                    yield f if entries else f.path
 
 
 class WinOS(BaseOS):
@@ -204,6 +1191,20 @@ class WinOS(BaseOS):
                 return True  # if hidden, exit the loop, otherwise go to the next path
         return False
 
+    def is_hidden_entry(self, entry: os.DirEntry) -> bool:
+        """The function determines whether the directory entry itself is hidden.
+
+        Windows: testing the FILE_ATTRIBUTE_HIDDEN for file or folder.
+        On Windows, the attributes are cached by os.scandir(),
+        so no additional system call is made.
+        :param entry: os.DirEntry object
+        :return: True if hidden or False if not
+        """
+        try:
+            return bool(entry.stat(follow_symlinks=False).st_file_attributes & stat.FILE_ATTRIBUTE_HIDDEN)
+        except (AttributeError, OSError):
+            return False
+
 
 class UnixOS(BaseOS):
     """Subclass to work with Unix-like systems."""
@@ -226,6 +1227,56 @@ class UnixOS(BaseOS):
         """
         return bool('/.' in filepath)
 
+    def is_hidden_entry(self, entry: os.DirEntry) -> bool:
+        """The function determines whether the directory entry itself is hidden.
+
+        Linux, Mac OS, iOS: testing for the dot character at the start of the name.
+        :param entry: os.DirEntry object
+        :return: True if hidden or False if not
+        """
+        return entry.name.startswith('.')
+
+
+def count_in_subtree(args: tuple) -> Counter:
+    """Count all files in one subtree by their extensions. Runs in a worker process.
+
+    Used in def count_files_by_extension_in_processes.
+    :param args: tuple (dirpath, include_hidden, case_sensitive, workers, exclude, max_depth, one_file_system, sniff)
+    :return: Counter() with extensions (keys: str)and their frequencies (values: int)
+    """
+    dirpath, include_hidden, case_sensitive, workers, exclude, max_depth, one_file_system, sniff = args
+    return get_current_os().count_files_by_extension(dirpath, no_feedback=True,
+                                                     include_hidden=include_hidden,
+                                                     case_sensitive=case_sensitive,
+                                                     workers=workers, exclude=exclude, max_depth=max_depth,
+                                                     one_file_system=one_file_system, sniff=sniff)
+
+
+def total_in_subtree(args: tuple) -> List[Tuple[str, int, Optional[SizeStats]]]:
+    """Get the number of found files (and their size info) in one subtree. Runs in a worker process.
+
+    Used in def search_folders_in_processes.
+    :param args: tuple (dirpath, extension, include_hidden, case_sensitive,
+    workers, total_size, show_folders, exclude, max_depth, one_file_system, size_quantiles)
+    :return: list with tuples (root, files_amount, sizes), see def search_folders,
+    if show_folders is False, only one tuple with the totals of the subtree (or an empty list)
+    """
+    (dirpath, extension, include_hidden, case_sensitive, workers, total_size, show_folders,
+     exclude, max_depth, one_file_system, size_quantiles) = args
+    records = get_current_os().search_folders(dirpath, extension, include_hidden=include_hidden,
+                                              case_sensitive=case_sensitive, total_size=total_size,
+                                              size_quantiles=size_quantiles, workers=workers, exclude=exclude,
+                                              max_depth=max_depth, one_file_system=one_file_system)
+    if show_folders:
+        return list(records)
+    files_amount = 0
+    sizes = SizeStats(quantiles=size_quantiles) if total_size else None
+    for root, amount, folder_sizes in records:
+        files_amount += amount
+        if total_size:
+            sizes.merge(folder_sizes)
+    return [(dirpath, files_amount, sizes)] if files_amount else []
+
 
 def get_current_os():
     """The function to determine the OS in which the program operates.
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 # encoding: utf-8
+import os
 import shutil
 import platform
 
@@ -14,6 +15,93 @@ START_TEXT_WIDTH = min(TERM_WIDTH, 100)
 DEFAULT_EXTENSION_COL_WIDTH = 9
 DEFAULT_FREQ_COL_WIDTH = 5
 MAX_TABLE_WIDTH = 80
+# max number of distinct file name suffixes cached by def normalize_extension
+EXTENSION_CACHE_SIZE = 4096
+
+# ====================[ Parallel processing settings ]====================
+# desired number of subtrees per worker process for --processes (load balancing)
+SHARDS_PER_PROCESS = 4
+# how many levels below the path may be listed to split the tree into subtrees
+SHARD_MAX_DEPTH = 3
+
+# ====================[ Scan index settings ]====================
+INDEX_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                         'count-files')
+INDEX_VERSION = 1
+# directories modified less than 2 seconds before the scan are listed again next time
+INDEX_RACY_MTIME_NS = 2 * 10 ** 9
+
+# ====================[ Watch mode settings ]====================
+# minimal interval between two redraws of the table in seconds
+WATCH_INTERVAL = 1.0
+# bytes read from the inotify file descriptor at once
+INOTIFY_BUFFER_SIZE = 64 * 1024
+
+# ====================[ Size statistics settings ]====================
+# quantiles of the file sizes shown with --size-quantiles
+SIZE_QUANTILES = (0.5, 0.9, 0.99)
+# each power of two is split into 2**SIZE_HISTOGRAM_BITS buckets of the size histogram,
+# the relative error of the quantiles is below 1 / 2**SIZE_HISTOGRAM_BITS
+SIZE_HISTOGRAM_BITS = 3
+
+# ====================[ Progress settings ]====================
+# minimal interval between two redraws of the progress line in seconds
+PROGRESS_INTERVAL = 0.2
+
+# ====================[ Output settings ]====================
+# number of characters of the found file paths collected before they are written to a pipe or a file
+OUTPUT_BUFFER_SIZE = 256 * 1024
+# machine-readable formats of the results (--format), see utils/record_formats.py
+OUTPUT_FORMATS = ('json', 'ndjson', 'csv')
+# bytes of the path list read from stdin at once (--from-stdin)
+PATH_LIST_CHUNK_SIZE = 1024 * 1024
+
+# ====================[ Preview settings ]====================
+# number of threads reading the previews of the next found files (--preview)
+PREVIEW_WORKERS = 4
+# max number of previews read ahead of the printed one
+PREVIEW_PREFETCH = 16
+# max number of bytes read from a file for each character of the preview (the longest UTF-8 character)
+PREVIEW_BYTES_PER_CHAR = 4
+# size of each read for the preview in bytes
+PREVIEW_CHUNK_SIZE = 8 * 1024
+
+# ====================[ Content sniffing settings ]====================
+# number of bytes read from the beginning of each file without extension (--sniff)
+SNIFF_HEADER_SIZE = 512
+# number of threads reading the headers
+SNIFF_WORKERS = 8
+# number of files collected from the directory listings before their headers are read in parallel
+SNIFF_BATCH_SIZE = 256
+
+# ====================[ Content search settings ]====================
+# number of threads searching the content of the found files (--contains)
+CONTENT_WORKERS = 8
+# max number of files searched ahead of the listed one
+CONTENT_PREFETCH = 64
+# size of each read if the file cannot be memory-mapped, in bytes
+CONTENT_CHUNK_SIZE = 1024 * 1024
+# bytes kept from the previous read, so that the matches across two reads are found
+# (at least the length of the pattern, so the literal strings are always found)
+CONTENT_CHUNK_OVERLAP = 4096
+
+# ====================[ Duplicates settings ]====================
+# number of threads hashing the files with the same size (--duplicates)
+DUPLICATES_WORKERS = 8
+# size of the first and the last block of the file in the partial hash, in bytes
+DUPLICATES_BLOCK_SIZE = 4 * 1024
+# size of each read for the full hash, in bytes
+DUPLICATES_CHUNK_SIZE = 1024 * 1024
+
+# ====================[ Line counting settings ]====================
+# number of threads counting the lines of the files (--lines)
+LINES_WORKERS = 8
+# size of each read in bytes, the line breaks are counted in each chunk at once
+LINES_CHUNK_SIZE = 1024 * 1024
+# number of files collected from the directory listings before their lines are counted in parallel
+LINES_BATCH_SIZE = 256
+# number of bytes at the beginning of the file checked for NUL bytes (binary files, --skip-binary)
+LINES_BINARY_PROBE = 8000
 
 # ====================[ iOS/Pythonista specific settings ]====================
 IPAD_FONT_SIZE = 15
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""Search in the content of the found files (--contains).
+
+The pattern (a literal string or a regular expression with --regex) is compiled once
+for bytes, so the files are searched without decoding.
+Each file is memory-mapped and searched at once; if it cannot be mapped (e.g. a special file),
+it is read in chunks of CONTENT_CHUNK_SIZE (settings.py), keeping the last CONTENT_CHUNK_OVERLAP bytes
+(or the length of the pattern, if it is longer) of the previous read, so in this case
+a regular expression match longer than that can be missed.
+The files are searched in a pool of threads, CONTENT_PREFETCH files ahead of the listed one,
+and the matching files are yielded in the order in which they were found.
+"""
+import os
+import re
+import mmap
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Pattern, TypeVar
+
+from count_files.settings import CONTENT_WORKERS, CONTENT_PREFETCH, CONTENT_CHUNK_SIZE, CONTENT_CHUNK_OVERLAP
+
+T = TypeVar('T')
+
+
+def compile_content_pattern(pattern: str, regex: bool = False, case_sensitive: bool = False) -> Pattern:
+    """Compile the pattern for searching in bytes.
+
+    The pattern is encoded in UTF-8. Case-insensitive matching applies to ASCII letters only.
+    :param pattern: literal string or regular expression
+    :param regex: False(default) -> literal string, True -> regular expression
+    :param case_sensitive: False(default) -> ignore case, True -> distinguish case variations
+    :return: compiled regular expression, use .search(data)
+    Raises re.error if the regular expression is not valid.
+    """
+    data = pattern.encode('utf-8', 'surrogateescape')
+    flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+    return re.compile(data if regex else re.escape(data), flags)
+
+
+def file_contains(filepath: str, pattern: Pattern, chunk_size: int = CONTENT_CHUNK_SIZE) -> bool:
+    """Check whether the content of the file matches the pattern.
+
+    :param filepath: full/path/to/file
+    :param pattern: compiled pattern from def compile_content_pattern
+    :param chunk_size: size of each read if the file cannot be memory-mapped, CONTENT_CHUNK_SIZE(default)
+    :return: True if there is a match, False otherwise (also if the file cannot be read)
+    """
+    try:
+        with open(filepath, 'rb') as f:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return pattern.search(data) is not None
+            except (ValueError, OSError):
+                # empty files and files that cannot be mapped
+                pass
+            # a match across two reads is found if it is not longer than the overlap,
+            # the escaped literal string is not shorter than the string itself
+            overlap = max(CONTENT_CHUNK_OVERLAP, len(pattern.pattern))
+            data = f.read(chunk_size)
+            while pattern.search(data) is None:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return False
+                data = data[-overlap:] + chunk
+            return True
+    except OSError:
+        return False
+
+
+def filter_by_content(files: Iterable[T], pattern: Pattern, workers: int = CONTENT_WORKERS,
+                      prefetch: int = CONTENT_PREFETCH) -> Iterable[T]:
+    """Keep the found files whose content matches the pattern, in the order of the files.
+
+    The files are taken from the iterable only as far as they are searched
+    (e.g. the search stopped by --limit or --exists does not walk much further).
+    :param files: paths or os.DirEntry objects of the found files
+    :param pattern: compiled pattern from def compile_content_pattern
+    :param workers: number of threads, CONTENT_WORKERS(default)
+    :param prefetch: max number of files searched ahead, CONTENT_PREFETCH(default)
+    :return: object <class 'generator'> with the matching files
+    """
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for f in files:
+                pending.append((f, executor.submit(file_contains, os.fspath(f), pattern)))
+                if len(pending) > prefetch:
+                    f, future = pending.popleft()
+                    if future.result():
+                        yield f
+            while pending:
+                f, future = pending.popleft()
+                if future.result():
+                    yield f
+        finally:
+            # the search was stopped: the files that are not searched yet are not needed
+            for f, future in pending:
+                future.cancel()
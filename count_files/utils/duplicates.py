@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""Duplicate files (--duplicates), found in stages, so that most files are never read.
+
+1. The files are grouped by size, using the stat info from the walk (see def find_duplicates in platforms.py).
+Only the files with the same size can be duplicates.
+2. The files with the same size are grouped by the hash of their first and last blocks
+(DUPLICATES_BLOCK_SIZE in settings.py). For small files, this hash covers the whole file.
+3. The files that still have the same size and partial hash are grouped by the hash of their whole content.
+The files are hashed in a pool of threads (DUPLICATES_WORKERS).
+The duplicates are summarized by extension (def duplicates_by_extension):
+in each group, the first file is the original and the other ones are its copies.
+"""
+import os
+import hashlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, Executor
+from typing import Iterable, List, Tuple, Optional, Callable
+
+from count_files.utils.file_handlers import get_name_suffix, normalize_extension
+from count_files.settings import DUPLICATES_WORKERS, DUPLICATES_BLOCK_SIZE, DUPLICATES_CHUNK_SIZE
+
+
+def partial_hash(filepath: str, size: int, block_size: int = DUPLICATES_BLOCK_SIZE) -> Optional[bytes]:
+    """Return the hash of the first and the last block of the file.
+
+    If the file is not larger than two blocks, the whole file is hashed.
+    :param filepath: full/path/to/file
+    :param size: the size of the file from the walk
+    :param block_size: the size of each block, DUPLICATES_BLOCK_SIZE(default)
+    :return: digest, None if the file cannot be read
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    try:
+        with open(filepath, 'rb') as f:
+            if size <= 2 * block_size:
+                digest.update(f.read())
+            else:
+                digest.update(f.read(block_size))
+                f.seek(-block_size, 2)
+                digest.update(f.read(block_size))
+    except OSError:
+        return None
+    return digest.digest()
+
+
+def full_hash(filepath: str, size: int, chunk_size: int = DUPLICATES_CHUNK_SIZE) -> Optional[bytes]:
+    """Return the hash of the whole content of the file.
+
+    :param filepath: full/path/to/file
+    :param size: the size of the file from the walk (not used, the same arguments as def partial_hash)
+    :param chunk_size: size of each read, DUPLICATES_CHUNK_SIZE(default)
+    :return: digest, None if the file cannot be read
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    try:
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.digest()
+
+
+def split_by_hash(groups: Iterable[Tuple[int, List[str]]], hash_file: Callable[[str, int], Optional[bytes]],
+                  executor: Executor) -> List[Tuple[int, List[str]]]:
+    """Split the groups of files with the same size by the hash of their content.
+
+    Used in def group_duplicates.
+    :param groups: tuples (size, paths)
+    :param hash_file: def partial_hash or def full_hash
+    :param executor: the pool of threads for hashing
+    :return: list with tuples (size, paths) of the files with the same size and hash,
+    the files with a unique hash (or that cannot be read) are left out
+    """
+    items = [(path, size) for size, paths in groups for path in paths]
+    by_hash = {}
+    for (path, size), digest in zip(items, executor.map(hash_file, *zip(*items))):
+        if digest is not None:
+            by_hash.setdefault((size, digest), []).append(path)
+    return [(size, paths) for (size, digest), paths in by_hash.items() if len(paths) > 1]
+
+
+def group_duplicates(size_groups: Iterable[Tuple[int, List[str]]],
+                     workers: int = DUPLICATES_WORKERS) -> List[Tuple[int, List[str]]]:
+    """Find the duplicate files among the files with the same size.
+
+    :param size_groups: tuples (size, paths) of the files with the same size (stage 1)
+    :param workers: number of threads, DUPLICATES_WORKERS(default)
+    :return: list with tuples (size, sorted paths) of the identical files,
+    sorted by the wasted space (size * (number of copies - 1)), largest first
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        groups = split_by_hash(size_groups, partial_hash, executor)
+        # the partial hash of small files covers the whole content
+        duplicates = [(size, paths) for size, paths in groups if size <= 2 * DUPLICATES_BLOCK_SIZE]
+        duplicates.extend(split_by_hash(((size, paths) for size, paths in groups
+                                         if size > 2 * DUPLICATES_BLOCK_SIZE), full_hash, executor))
+    duplicates = [(size, sorted(paths)) for size, paths in duplicates]
+    return sorted(duplicates, key=lambda group: (-group[0] * (len(group[1]) - 1), group[1][0]))
+
+
+def duplicates_by_extension(groups: List[Tuple[int, List[str]]],
+                            case_sensitive: bool = False) -> Tuple[Counter, Counter]:
+    """Count the copies (all files of each group except the first one) and the wasted space by extension.
+
+    :param groups: list with tuples (size, paths) from def group_duplicates
+    :param case_sensitive: False -> ignore case in extensions, True -> distinguish case variations in extensions
+    :return: tuple (copies, wasted), Counter() objects with extensions
+    (as in def count_files_by_extension, platforms.py) and the number of copies or the wasted space in bytes
+    """
+    copies = Counter()
+    wasted = Counter()
+    for size, paths in groups:
+        for path in paths[1:]:
+            extension = normalize_extension(get_name_suffix(os.path.basename(path)), case_sensitive,
+                                            '[no extension]')
+            copies[extension] += 1
+            wasted[extension] += size
+    return copies, wasted
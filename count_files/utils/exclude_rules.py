@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""Exclude rules with the .gitignore syntax.
+
+Rules come from the --exclude and --exclude-from arguments (relative to the specified path)
+and, with --gitignore, from the .gitignore files found during the walk
+(relative to the folder of each .gitignore file).
+The rules are compiled once. Each listed directory is filtered before it is walked,
+so the contents of excluded folders (node_modules, build/, __pycache__) are never listed.
+
+Supported syntax (https://git-scm.com/docs/gitignore):
+blank lines and lines starting with # are ignored,
+!pattern - include again the files excluded by a previous pattern,
+pattern/ - matches only folders,
+a pattern with a slash at the beginning or in the middle is relative to the folder of the rules,
+other patterns match the file or folder name at any level below it,
+*, ?, [seq], [!seq] - as in Unix shell-style wildcards, but never match a slash,
+**/ - zero or more folders, /** at the end - everything inside.
+"""
+import os
+import re
+from typing import List, Tuple, Optional, Iterable, Callable
+
+# the folder of the git repository data is always skipped with --gitignore
+GIT_DIR = '.git'
+GITIGNORE = '.gitignore'
+
+
+def translate_rule(pattern: str) -> str:
+    """Translate one .gitignore pattern (without ! and trailing /) to a regular expression.
+
+    The expression is matched against the path relative to the folder of the rules,
+    with / as the separator.
+    :param pattern: e.g. 'node_modules', '/build', 'docs/**/*.md'
+    :return: regular expression as a string
+    """
+    anchored = '/' in pattern
+    if pattern.startswith('/'):
+        pattern = pattern[1:]
+    i, n = 0, len(pattern)
+    result = []
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i) and (i == 0 or pattern[i - 1] == '/'):
+            result.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i) and i + 2 == n and (i == 0 or pattern[i - 1] == '/'):
+            result.append('.*')
+            i += 2
+        elif c == '*':
+            result.append('[^/]*')
+            i += 1
+        elif c == '?':
+            result.append('[^/]')
+            i += 1
+        elif c == '[':
+            j = i + 1
+            if j < n and pattern[j] in '!^':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+            if j >= n:
+                result.append('\\[')
+                i += 1
+            else:
+                stuff = pattern[i + 1:j].replace('\\', '\\\\')
+                if stuff[0] in '!^':
+                    stuff = '^' + stuff[1:]
+                result.append(f'[{stuff}]')
+                i = j + 1
+        elif c == '\\' and i + 1 < n:
+            result.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            result.append(re.escape(c))
+            i += 1
+    regex = ''.join(result)
+    if not anchored:
+        regex = '(?:.*/)?' + regex
+    return f'(?s:{regex})\\Z'
+
+
+class RuleSet(object):
+    """Compiled rules from one source (--exclude arguments or one .gitignore file)."""
+
+    def __init__(self, base: str, lines: Iterable[str]):
+        """
+        :param base: full/path/to/folder, the patterns are relative to it
+        :param lines: lines in the .gitignore format
+        """
+        self.base_prefix = os.path.join(base, '')
+        flags = re.IGNORECASE if os.name == 'nt' else 0
+        # rules: list with tuples (match function, negate, only folders)
+        self.rules = []  # type: List[Tuple[Callable, bool, bool]]
+        # lines that cannot be compiled (e.g. the range [z-a]) are skipped, as git does
+        self.invalid = []  # type: List[str]
+        regexes = []
+        for line in lines:
+            line = line.rstrip('\r\n')
+            if not line.endswith('\\ '):
+                line = line.rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            regex = translate_rule(line)
+            try:
+                match = re.compile(regex, flags).match
+            except re.error:
+                self.invalid.append(('!' if negate else '') + line + ('/' if dir_only else ''))
+                continue
+            regexes.append((regex, dir_only))
+            self.rules.append((match, negate, dir_only))
+        # without ! patterns the order does not matter: one combined regex for folders and one for files
+        self.ordered = any(negate for match, negate, dir_only in self.rules)
+        self.dir_match = self.file_match = None
+        if not self.ordered:
+            dir_regexes = [regex for regex, dir_only in regexes]
+            file_regexes = [regex for regex, dir_only in regexes if not dir_only]
+            if dir_regexes:
+                self.dir_match = re.compile('|'.join(dir_regexes), flags).match
+            if file_regexes:
+                self.file_match = re.compile('|'.join(file_regexes), flags).match
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """Check a path against the rules, the last matching rule wins.
+
+        :param path: path relative to the folder of the rules, with / as the separator
+        :param is_dir: True for folders
+        :return: True -> excluded, False -> included again by a ! pattern, None -> no rule matches
+        """
+        if not self.ordered:
+            match = self.dir_match if is_dir else self.file_match
+            return True if match is not None and match(path) else None
+        for match, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if match(path):
+                return not negate
+        return None
+
+
+class ExcludeRules(object):
+    """All exclude rules for one walk.
+
+    Usage:
+    exclude = ExcludeRules(path, patterns=['node_modules', 'build/'], gitignore=True)
+    current_os.count_files_by_extension(path, exclude=exclude)
+    """
+
+    def __init__(self, base: str, patterns: Iterable[str] = (), gitignore: bool = False):
+        """
+        :param base: full/path/to/folder to be walked
+        :param patterns: lines in the .gitignore format, relative to base
+        :param gitignore: True -> also read the .gitignore files found during the walk
+        """
+        self.base = base
+        self.base_prefix = os.path.join(base, '')
+        self.gitignore = gitignore
+        root_rules = RuleSet(base, patterns)
+        self.root_rules = (root_rules,) if root_rules else ()
+        # the given patterns that are not valid, see RuleSet.invalid
+        self.invalid = root_rules.invalid
+        # cache: {'full/path/to/folder': tuple with RuleSet objects}, used with gitignore only
+        self.cache = {}
+
+    def __getstate__(self) -> dict:
+        """Only the compiled rules are passed to worker processes, the cache is not."""
+        state = self.__dict__.copy()
+        state['cache'] = {}
+        return state
+
+    def __bool__(self) -> bool:
+        return bool(self.root_rules) or self.gitignore
+
+    def rules_for(self, root: str) -> Tuple[RuleSet, ...]:
+        """Return the rules that apply to the entries of a folder, from the top down.
+
+        With gitignore, the rules of the parent folders are taken from the cache
+        (or read, if the walk started below them, e.g. in worker processes).
+        :param root: full/path/to/folder
+        :return: tuple with RuleSet objects
+        """
+        if not self.gitignore:
+            return self.root_rules
+        rules = self.cache.get(root)
+        if rules is None:
+            if root == self.base or not root.startswith(self.base_prefix):
+                rules = self.root_rules
+            else:
+                rules = self.rules_for(os.path.dirname(root))
+            own = self.read_gitignore(root)
+            if own:
+                rules = rules + (own,)
+            self.cache[root] = rules
+        return rules
+
+    @staticmethod
+    def read_gitignore(root: str) -> Optional[RuleSet]:
+        """Read and compile the .gitignore file of a folder.
+
+        :param root: full/path/to/folder
+        :return: RuleSet or None if there is no readable .gitignore file
+        """
+        try:
+            with open(os.path.join(root, GITIGNORE), 'r', encoding='utf-8', errors='replace') as f:
+                return RuleSet(root, f.readlines())
+        except OSError:
+            return None
+
+    def is_excluded(self, rules: Tuple[RuleSet, ...], root: str, name: str, is_dir: bool) -> bool:
+        """Check one entry of a folder, the deepest matching rules win.
+
+        :param rules: from def rules_for(root)
+        :param root: full/path/to/folder
+        :param name: file or folder name
+        :param is_dir: True for folders
+        :return: True if the entry is excluded
+        """
+        if is_dir and self.gitignore and name == GIT_DIR:
+            return True
+        for rule_set in reversed(rules):
+            relative = root[len(rule_set.base_prefix):].replace(os.sep, '/') \
+                if root.startswith(rule_set.base_prefix) else ''
+            excluded = rule_set.match(f'{relative}/{name}' if relative else name, is_dir)
+            if excluded is not None:
+                return excluded
+        return False
+
+    def filter(self, root: str, dirs: list, files: list) -> Tuple[list, list]:
+        """Remove the excluded entries from one directory listing.
+
+        Used in def walk (platforms.py), so excluded folders are never listed.
+        :param root: full/path/to/folder
+        :param dirs: subdirectories, os.DirEntry or IndexEntry objects
+        :param files: files, os.DirEntry or IndexEntry objects
+        :return: tuple (dirs, files) without the excluded entries
+        """
+        rules = self.rules_for(root)
+        if not rules and not self.gitignore:
+            return dirs, files
+        dirs = [d for d in dirs if not self.is_excluded(rules, root, d.name, True)]
+        if rules:
+            files = [f for f in files if not self.is_excluded(rules, root, f.name, False)]
+        return dirs, files
+
+
+def read_exclude_file(filename: str) -> List[str]:
+    """Read the patterns for --exclude-from, one pattern per line (.gitignore format).
+
+    :param filename: path/to/file
+    :return: list with lines
+    """
+    with open(os.path.expanduser(filename), 'r', encoding='utf-8', errors='replace') as f:
+        return f.readlines()
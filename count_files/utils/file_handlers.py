@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
 # encoding: utf-8
 import os
+import re
+import sys
+import fnmatch
 from itertools import chain
-from typing import List, Tuple, Dict
+from functools import lru_cache
+from collections import Counter
+from typing import List, Tuple, Dict, Iterable, Pattern
 
-from count_files.settings import SUPPORTED_TYPES
+from count_files.settings import SUPPORTED_TYPES, EXTENSION_CACHE_SIZE
 
 
 def get_file_extension(filepath: str, case_sensitive: bool = False) -> str:
@@ -20,14 +25,71 @@ def get_file_extension(filepath: str, case_sensitive: bool = False) -> str:
     :return: extension name (txt, py) or '.' (for files without extension).
     If case_sensitive==False, return in uppercase.
     """
-    extension = os.path.splitext(filepath)[1][1:]
-    if extension:
-        if case_sensitive:
-            return extension
-        else:
-            return extension.upper()
-    else:
-        return '.'
+    return normalize_extension(get_name_suffix(os.path.basename(filepath)), case_sensitive)
+
+
+def get_name_suffix(filename: str) -> str:
+    """Return the raw suffix of a file name, the same as os.path.splitext(filename)[1][1:].
+
+    Leading dots are not extension separators: .gitignore -> '', ..txt -> ''.
+    Used in def get_file_extension and def count_extensions.
+    :param filename: file name without folders
+    :return: suffix as is (txt, Py) or '' (for files without extension)
+    """
+    head, dot, suffix = filename.rpartition('.')
+    if not dot or not head.strip('.'):
+        return ''
+    return suffix
+
+
+@lru_cache(maxsize=EXTENSION_CACHE_SIZE)
+def normalize_extension(suffix: str, case_sensitive: bool = False, no_extension: str = '.') -> str:
+    """Return the extension name for a raw suffix from def get_name_suffix.
+
+    The results are cached (a tree usually has only a few hundred distinct suffixes)
+    and interned, so that all counters share one string object for each extension.
+    :param suffix: txt, Py or ''
+    :param case_sensitive: False -> ignore case in extensions,
+    True -> distinguish case variations in extensions
+    :param no_extension: returned for files without extension, '.'(default) or '[no extension]'
+    :return: extension name (TXT, PY), or no_extension
+    """
+    if not suffix:
+        return no_extension
+    return sys.intern(suffix if case_sensitive else suffix.upper())
+
+
+def count_extensions(filenames: Iterable[str], case_sensitive: bool = False) -> Counter:
+    """Count the file names of one directory listing by extension.
+
+    The raw suffixes are counted first, so each distinct suffix is normalized only once
+    per listing and the result can be added to the total Counter in bulk.
+    Used in platforms.py
+    :param filenames: file names without folders
+    :param case_sensitive: False -> ignore case in extensions,
+    True -> distinguish case variations in extensions
+    :return: Counter() with extensions and their frequencies, files without extension
+    are counted as '[no extension]': Counter({'TXT': 3, '[no extension]': 1})
+    """
+    counters = Counter()
+    for suffix, freq in Counter(map(get_name_suffix, filenames)).items():
+        counters[normalize_extension(suffix, case_sensitive, '[no extension]')] += freq
+    return counters
+
+
+def compile_filename_patterns(patterns: Iterable[str], case_sensitive: bool = False) -> Pattern:
+    """Compile Unix shell-style wildcard patterns into one regular expression.
+
+    Each pattern is translated with fnmatch.translate() and the results are combined,
+    so one call of match() checks a file name against all the patterns.
+    Case-insensitive matching uses the re.IGNORECASE flag instead of lowercasing each name.
+    Used in def search_files_by_pattern (platforms.py)
+    :param patterns: list with patterns like ['*.py?', '*test*']
+    :param case_sensitive: False -> ignore case, True -> distinguish case variations
+    :return: compiled regular expression, use .match(filename)
+    """
+    regex = '|'.join(fnmatch.translate(pattern) for pattern in patterns)
+    return re.compile(regex, 0 if case_sensitive else re.IGNORECASE)
 
 
 def is_supported_filetype(extension: str) -> bool:
@@ -1,21 +1,59 @@
 #!/usr/bin/env python3
 # encoding: utf-8
+import os
+import codecs
+import locale
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterable, Optional, Tuple, TypeVar
 
 from count_files.utils.file_handlers import get_file_extension
-from count_files.settings import SUPPORTED_TYPES
+from count_files.utils.file_sniffing import sniff_header, TEXT_TYPES
+from count_files.settings import SUPPORTED_TYPES, PREVIEW_WORKERS, PREVIEW_PREFETCH, \
+    PREVIEW_BYTES_PER_CHAR, PREVIEW_CHUNK_SIZE, SNIFF_HEADER_SIZE
 
+T = TypeVar('T')
 
-def generic_text_preview(filepath: str, max_size: int) -> str:
+
+def generic_text_preview(filepath: str, max_size: int, encoding: str = None,
+                         sniff: bool = False) -> Optional[str]:
     """Read the first characters of the file and return a string.
 
+    The file is read in binary mode, at most max_size * PREVIEW_BYTES_PER_CHAR bytes
+    (settings.py) in chunks of PREVIEW_CHUNK_SIZE, and the bytes are decoded incrementally,
+    so the reading stops as soon as there are enough characters for the preview.
+    With sniff, the content type is checked on the first chunk (at least SNIFF_HEADER_SIZE bytes),
+    so the file is opened and read only once.
     :param filepath: a string containing the path to the file
     :param max_size: max number of characters to be read from file
+    :param encoding: optional, None(default) -> the locale encoding, as with open() in text mode
+    :param sniff: False(default) or True -> return None if the file is empty or its content is not text
+    (see utils/file_sniffing.py)
     :return: a string with the text preview or error message
     """
     try:
-        with open(filepath, mode='r') as f:
-            return f.read(max_size).replace('\n', ' ')
+        decoder = codecs.getincrementaldecoder(encoding or locale.getpreferredencoding(False))()
+        # one more character, so that a line break \r\n at the end of the preview is not split
+        limit = (max_size + 1) * PREVIEW_BYTES_PER_CHAR
+        text = ''
+        with open(filepath, mode='rb') as f:
+            if sniff:
+                header = f.read(max(SNIFF_HEADER_SIZE, min(PREVIEW_CHUNK_SIZE, limit)))
+                if not header or sniff_header(header[:SNIFF_HEADER_SIZE]) not in TEXT_TYPES:
+                    return None
+                limit -= len(header)
+                text = decoder.decode(header)
+            while len(text) <= max_size and limit > 0:
+                chunk = f.read(min(PREVIEW_CHUNK_SIZE, limit))
+                if not chunk:
+                    text += decoder.decode(b'', final=True)
+                    break
+                limit -= len(chunk)
+                text += decoder.decode(chunk)
+        # universal newlines, as with open() in text mode
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text[:max_size].replace('\n', ' ')
     except Exception as e:
         # DEBUG OSError
         return f"TEXT_PREVIEW_ERROR: {e}"
@@ -38,7 +76,7 @@ def generic_binary_preview(filepath: str, max_size: int) -> bytes or str:
         return ""
 
 
-def generate_preview(filepath: str, max_size: int = 390) -> str:
+def generate_preview(filepath: str, max_size: int = 390, sniff: bool = False) -> str:
     """Generate a human readable text preview.
 
     For text files, the preview will be the first `max_size` characters.
@@ -48,6 +86,8 @@ def generate_preview(filepath: str, max_size: int = 390) -> str:
     For CLI.
     The number of characters for viewing by default depends on the terminal width settings
     and can be changed with the -ps or -preview-size argument.
+    :param sniff: False(default) or True -> files without extension are previewed
+    if their content is text (scripts, JSON and other text, see utils/file_sniffing.py)
     :return: a string with the text preview (without newline characters).
     If the preview is not available for the file, it returns an information message.
     """
@@ -55,11 +95,48 @@ def generate_preview(filepath: str, max_size: int = 390) -> str:
 
     if extension in SUPPORTED_TYPES['text']:
         excerpt = generic_text_preview(filepath, max_size)
+    elif sniff and extension == '.':
+        excerpt = generic_text_preview(filepath, max_size, sniff=True)
+    else:
+        excerpt = None
+    if excerpt is not None:
         if excerpt:
             # return excerpt or error string
             return f"{excerpt}"
         else:
             return "[This file can be empty.]"
     else:
-        # skip the extension if it is not supported
+        # skip the extension if it is not supported or the content is not text
         return "[A preview of this file type is not yet implemented.]"
+
+
+def prefetch_previews(files: Iterable[T], max_size: int = 390, workers: int = PREVIEW_WORKERS,
+                      prefetch: int = PREVIEW_PREFETCH, sniff: bool = False) -> Iterable[Tuple[T, str]]:
+    """Generate the previews of the found files in a pool of threads, in the order of the files.
+
+    While the preview of a file is printed, the previews of the next files (up to prefetch)
+    are already being read, so the slow reads (e.g. from a network file system) overlap.
+    The files are taken from the iterable only as far as they are prefetched
+    (e.g. the search stopped by --limit does not walk further).
+    :param files: paths or os.DirEntry objects of the found files
+    :param max_size: the number of characters of each preview
+    :param workers: number of threads, PREVIEW_WORKERS(default)
+    :param prefetch: max number of previews read ahead, PREVIEW_PREFETCH(default)
+    :param sniff: False(default) or True -> also preview the files without extension with text content
+    :return: object <class 'generator'> with tuples (file, preview), see def generate_preview
+    """
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for f in files:
+                pending.append((f, executor.submit(generate_preview, os.fspath(f), max_size, sniff)))
+                if len(pending) > prefetch:
+                    f, future = pending.popleft()
+                    yield f, future.result()
+            while pending:
+                f, future = pending.popleft()
+                yield f, future.result()
+        finally:
+            # the output was stopped: the previews that are not started yet are not needed
+            for f, future in pending:
+                future.cancel()
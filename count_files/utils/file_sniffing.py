@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""Content sniffing of the files without extension (--sniff).
+
+The first SNIFF_HEADER_SIZE bytes (settings.py) of each file are read once
+and the file is classified by its magic bytes:
+ELF binaries, shebang scripts, gzip and zip archives, PNG images, JSON, other text and binary files.
+The files are counted as '[ELF]', '[SCRIPT]', '[GZIP]', '[ZIP]', '[PNG]', '[JSON]', '[TEXT]' or '[BINARY]'
+instead of '[no extension]', and these names are grouped with the extensions
+(see ext_and_group_dict in group_extensions.py).
+The headers are read in batches by a pool of threads, while the walk goes on
+(one batch is read, while the files of the next one are collected).
+"""
+import os
+import codecs
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
+from count_files.settings import SNIFF_HEADER_SIZE, SNIFF_WORKERS, SNIFF_BATCH_SIZE
+
+# (magic bytes at the beginning of the file, content type)
+MAGIC_NUMBERS = (
+    (b'\x7fELF', 'ELF'),
+    (b'#!', 'SCRIPT'),
+    (b'\x1f\x8b', 'GZIP'),
+    (b'PK\x03\x04', 'ZIP'),
+    (b'PK\x05\x06', 'ZIP'),  # empty archive
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+)
+# content types that can be previewed as text
+TEXT_TYPES = ('SCRIPT', 'JSON', 'TEXT')
+# bytes that are not expected in a text file (control characters except \b, \t, \n, \f, \r, ESC)
+NON_TEXT_BYTES = bytes(set(range(32)) - {8, 9, 10, 12, 13, 27})
+NON_ASCII_BYTES = bytes(range(128, 256))
+
+
+def sniff_header(header: bytes) -> str:
+    """Return the content type for the first bytes of a file.
+
+    :param header: the first bytes of the file (not empty)
+    :return: 'ELF', 'SCRIPT', 'GZIP', 'ZIP', 'PNG', 'JSON', 'TEXT' or 'BINARY'
+    """
+    for magic, content_type in MAGIC_NUMBERS:
+        if header.startswith(magic):
+            return content_type
+    if not is_text(header):
+        return 'BINARY'
+    if header.lstrip(b'\xef\xbb\xbf \t\r\n')[:1] in (b'{', b'['):
+        return 'JSON'
+    return 'TEXT'
+
+
+def is_text(header: bytes) -> bool:
+    """Check whether the bytes look like text.
+
+    Text has no NUL bytes and few control characters, and it is UTF-8
+    (the last character may be cut off by the header size)
+    or a single-byte encoding with mostly ASCII characters.
+    :param header: the first bytes of the file
+    :return: True if the bytes look like text, False otherwise
+    """
+    if b'\0' in header or len(header.translate(None, NON_TEXT_BYTES)) < len(header) * 0.95:
+        return False
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(header, final=False)
+        return True
+    except UnicodeDecodeError:
+        return len(header.translate(None, NON_ASCII_BYTES)) >= len(header) * 0.7
+
+
+def sniff_file(filepath: str, header_size: int = SNIFF_HEADER_SIZE) -> Optional[str]:
+    """Read the first bytes of the file and return its content type.
+
+    :param filepath: full/path/to/file
+    :param header_size: number of bytes to read, SNIFF_HEADER_SIZE(default)
+    :return: content type (see def sniff_header), None if the file is empty or cannot be read
+    """
+    try:
+        with open(filepath, 'rb') as f:
+            header = f.read(header_size)
+    except OSError:
+        return None
+    return sniff_header(header) if header else None
+
+
+class FileSniffer(object):
+    """Counts the files without extension by content type, reading their headers in a pool of threads.
+
+    Usage:
+    with FileSniffer() as sniffer:
+        for root, dirs, files in current_os.walk(path):
+            sniffer.add(f for f in files if not get_name_suffix(f.name))
+    counters.update(sniffer.counts)
+    """
+
+    def __init__(self, workers: int = SNIFF_WORKERS, batch_size: int = SNIFF_BATCH_SIZE):
+        """
+        :param workers: number of threads, SNIFF_WORKERS(default)
+        :param batch_size: number of files read in parallel at once, SNIFF_BATCH_SIZE(default)
+        """
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.batch_size = batch_size
+        self.batch: List[str] = []
+        # content types of the previous batch (the reads in progress)
+        self.pending = None
+        # Counter({'[ELF]': 3, '[TEXT]': 2, '[no extension]': 1}), empty or unreadable files are not classified
+        self.counts = Counter()
+
+    def __enter__(self) -> 'FileSniffer':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, files: Iterable[os.DirEntry]):
+        """Add the files without extension, their headers are read when the batch is full.
+
+        :param files: os.DirEntry objects (or paths) of the files without extension
+        """
+        self.batch.extend(map(os.fspath, files))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Count the previous batch, start reading the headers of the collected files."""
+        self.collect()
+        if self.batch:
+            self.pending = self.executor.map(sniff_file, self.batch)
+            self.batch = []
+
+    def collect(self):
+        """Wait for the reads of the previous batch and count the files by content type."""
+        if self.pending is not None:
+            self.counts.update(f'[{content_type}]' if content_type else '[no extension]'
+                               for content_type in self.pending)
+            self.pending = None
+
+    def close(self):
+        """Count the rest of the files and stop the threads."""
+        self.flush()
+        self.collect()
+        self.executor.shutdown()
@@ -246,5 +246,14 @@ ext_and_group_dict = {
     'qtff': 'videos',
     'swf': 'videos',
     'vob': 'videos',
-    'wmv': 'videos'
+    'wmv': 'videos',
+
+    # content types of the files without extension (--sniff, utils/file_sniffing.py)
+    '[elf]': 'executables',
+    '[script]': 'executables',
+    '[gzip]': 'archives',
+    '[zip]': 'archives',
+    '[png]': 'images',
+    '[json]': 'data',
+    '[text]': 'documents'
 }
@@ -1,5 +1,5 @@
 """HELP SYSTEM EXTENSION TEXT."""
-from count_files.settings import DOCUMENTATION_URL, DEFAULT_PREVIEW_SIZE
+from count_files.settings import DOCUMENTATION_URL, DEFAULT_PREVIEW_SIZE, INDEX_DIR
 from count_files.utils.viewing_modes import show_help_columns
 
 
@@ -51,10 +51,13 @@ arguments = [
              # optional
              'all', 'a', 'case-sensitive', 'c',
              'file-extension', 'fe', 'filename-match', 'fm', 'file-sizes', 'fs',
-             'group', 'g', 'help', 'h', 'help-cmd', 'hc',
+             'group', 'g', 'report', 'rep', 'watch', 'wa', 'duplicates', 'dup', 'lines', 'ln', 'skip-binary', 'sb', 'sniff', 'sn', 'help', 'h', 'help-cmd', 'hc',
              'no-feedback', 'nf', 'no-recursion', 'nr',
              'preview', 'p', 'preview-size', 'ps', 'show-folders', 'sf',
-             'sort-alpha', 'alpha', 'supported-types', 'st', 'total', 't', 'total-size', 'ts', 'version', 'v']
+             'sort-alpha', 'alpha', 'supported-types', 'st', 'total', 't', 'total-size', 'ts', 'folder-sizes', 'fsz', 'size-quantiles', 'sq', 'version', 'v',
+             'workers', 'w', 'ordered', 'ord', 'processes', 'pr', 'index', 'ix',
+             'limit', 'lim', 'exists', 'exs', 'contains', 'ct', 'regex', 're', 'output', 'o', 'null', '0', 'format', 'fmt', 'from-stdin', 'stdin', 'max-depth', 'md', 'exclude', 'ex', 'exclude-from', 'exf', 'gitignore', 'gi',
+             'one-file-system', 'ofs', 'follow-symlinks', 'fsl']
 
 docs_args_text = f"""COUNT FILES HELP(ARGS).
 
@@ -94,12 +97,18 @@ Service arguments: display of help, version of the program etc.
 (h or help, ah or args-help, v or version, st or supported-types)
     help> service
 Common arguments: directory path and sorting settings that are common to search and count.
-(path, a or all, c or case-sensitive, nr or no-recursion, nf or no-feedback)
+(path, a or all, c or case-sensitive, nr or no-recursion, nf or no-feedback,
+w or workers, ord or ordered, pr or processes, ix or index, md or max-depth,
+ex or exclude, exf or exclude-from, gi or gitignore, ofs or one-file-system, fsl or follow-symlinks,
+fmt or format, stdin or from-stdin)
     help> common
 Special arguments: arguments for counting or searching files.
-Count by extension: alpha or sort-alpha, g or group;
-Total number of files: t or total, sf or show-folders, ts or total-size;
-Search by extension: fe or file-extension, fm or filename-match, fs or file-sizes, p or preview, ps or preview-size.
+Count by extension: alpha or sort-alpha, g or group, rep or report, wa or watch, dup or duplicates,
+ln or lines, sb or skip-binary, sn or sniff;
+Total number of files: t or total, sf or show-folders, ts or total-size, fsz or folder-sizes,
+sq or size-quantiles;
+Search by extension: fe or file-extension, fm or filename-match, fs or file-sizes, p or preview, ps or preview-size,
+lim or limit, exs or exists, ct or contains, re or regex, o or output, 0 or null.
     help> special
 
 SORTING ARGUMENTS BY TYPE:
@@ -217,13 +226,149 @@ topics = {
     },
     'no-feedback': {
         'name': '-nf, --no-feedback',
-        'short': "Turns off the program's operating indicator (printing processed file names in one line).",
-        'long': "Don't show the program's operating indicator (printing processed file names in one line). "
+        'short': "Turns off the program's operating indicator (progress line with processed files and folders).",
+        'long': "Don't show the program's operating indicator (progress line with processed files and folders). "
                 'Feedback is available by default for counting files by extension '
                 '(table) and for counting the total number of files (-t or --total). '
+                'The progress line is updated a few times per second on stderr '
+                'and shows the number of processed files and folders, their rate and the elapsed time, '
+                'with --index also the estimated time remaining. '
+                'It is not shown if stderr is not a terminal. '
                 'This option disables it. '
                 'For searching by extension feedback is a list of the found file paths.'
     },
+    'workers': {
+        'name': '-w WORKERS, --workers WORKERS',
+        'short': 'Number of threads listing directories concurrently (default: 1).',
+        'long': 'Number of threads listing directories concurrently. '
+                'By default, directories are listed one by one. '
+                'On network drives and fast SSD storage, listing several directories at once '
+                'can make the scan considerably faster. '
+                'With more than one worker, the order of the found file paths may change between runs; '
+                'use the --ordered argument to get the same order every time. '
+                'Example: count-files --workers 8 ~/Documents <arguments>. '
+                'Common argument for counting and searching by extension '
+                'or counting the total number of files, not available in the watch mode.'
+    },
+    'ordered': {
+        'name': '-ord, --ordered',
+        'short': 'Keep a deterministic order of results when using more than one worker.',
+        'long': 'Keep a deterministic order of results when using more than one worker. '
+                'The found file paths and folders are displayed in the same order '
+                'as with a single worker, so the output of different runs can be compared. '
+                'Directories are still listed concurrently in the background. '
+                'Example: count-files --workers 8 --ordered --file-extension py ~/Documents. '
+                'Common argument for searching by extension or by pattern '
+                'and counting the total number of files.'
+    },
+    'processes': {
+        'name': '-pr PROCESSES, --processes PROCESSES',
+        'short': 'Number of processes used to count files in separate subtrees (default: 1).',
+        'long': 'Number of processes used to count files in separate subtrees. '
+                'The directory tree is split into subtrees (the top-level folders, '
+                'or the folders one or two levels deeper if there are only a few of them), '
+                'which are counted in parallel, and the partial results are merged. '
+                'Useful for very large trees, when the processing of each file, '
+                'not the listing of directories, takes most of the time. '
+                'The feedback shows the processed subtrees instead of file names. '
+                'Example: count-files --processes 8 ~/Documents <arguments>. '
+                'Common argument for recursive counting by extension '
+                'or counting the total number of files, '
+                'not available with the --report, --watch, --duplicates, --lines, '
+                '--file-extension or --filename-match arguments.'
+    },
+    'index': {
+        'name': '-ix, --index',
+        'short': 'Use a persistent scan index, list only the folders modified since the previous scan.',
+        'long': 'Use a persistent scan index. '
+                'The listing of each folder (files, their sizes, and subfolders) is stored '
+                f'in an index file in {INDEX_DIR}. '
+                'On the next scan of the same path with the --index argument, '
+                'only the folders whose modification time has changed are listed again, '
+                'the other listings are taken from the index. '
+                'Creating, deleting or renaming a file changes the modification time of its folder, '
+                'so the found files are always up to date, '
+                'but the sizes of files whose content has changed may be outdated. '
+                'Not available with the --processes argument or in the watch mode. '
+                'Example: count-files --index --total .. ~/Documents <arguments>. '
+                'Common argument for counting and searching by extension or by pattern '
+                'and counting the total number of files.'
+    },
+    'max-depth': {
+        'name': '-md N, --max-depth N',
+        'short': 'Walk at most N levels of folders (1 - only the specified directory, '
+                 'the same as --no-recursion).',
+        'long': 'Walk at most N levels of folders: 1 - only the specified directory '
+                '(the same as --no-recursion), 2 - the specified directory and its subfolders, and so on. '
+                'Deeper folders are never opened, so shallow questions about deep trees '
+                'are answered without walking the whole tree. '
+                'Example: count-files --max-depth 3 /srv <arguments>. '
+                'Common argument for counting and searching by extension or by pattern '
+                'and counting the total number of files.'
+    },
+    'exclude': {
+        'name': '-ex PATTERN, --exclude PATTERN',
+        'short': 'Skip files and folders matching a pattern in the .gitignore format '
+                 '(e.g. node_modules, build/, *.log). Can be repeated.',
+        'long': 'Skip files and folders matching a pattern in the .gitignore format. '
+                'The contents of excluded folders are never scanned. '
+                'A pattern without a slash matches the file or folder name at any level '
+                '(node_modules, __pycache__, *.log), a pattern ending with a slash matches only folders '
+                '(build/), a pattern with a slash at the beginning or in the middle '
+                'is relative to the specified directory (/dist, docs/_build), '
+                '** matches zero or more folders, and !pattern includes again '
+                'the files excluded by a previous pattern. The argument can be repeated, '
+                'an invalid pattern (e.g. the range [z-a]) is reported as an error. '
+                'Example: count-files --exclude node_modules --exclude build/ ~/Projects <arguments>. '
+                'Common argument for counting and searching by extension or by pattern '
+                'and counting the total number of files.'
+    },
+    'exclude-from': {
+        'name': '-exf FILE, --exclude-from FILE',
+        'short': 'Read the exclude patterns from a file, one pattern per line (.gitignore format).',
+        'long': 'Read the exclude patterns from a file, one pattern per line, '
+                'in the same format as the --exclude argument and the .gitignore files. '
+                'Blank lines and lines starting with # are ignored. '
+                'The patterns are relative to the specified directory. The argument can be repeated. '
+                'Example: count-files --exclude-from ~/.count-files-ignore ~/Projects <arguments>. '
+                'Common argument for counting and searching by extension or by pattern '
+                'and counting the total number of files.'
+    },
+    'gitignore': {
+        'name': '-gi, --gitignore',
+        'short': 'Skip the files and folders ignored by the .gitignore files found during the scan.',
+        'long': 'Skip the files and folders ignored by the .gitignore files found during the scan. '
+                'The patterns of each .gitignore file apply to its folder and all subfolders, '
+                'the patterns of deeper .gitignore files take precedence. '
+                'The .git folders are skipped as well. '
+                'Invalid patterns in the .gitignore files are skipped, as git does. '
+                'Only the .gitignore files in the specified directory and below it are read. '
+                'Example: count-files --gitignore ~/Projects/app <arguments>. '
+                'Common argument for counting and searching by extension or by pattern '
+                'and counting the total number of files.'
+    },
+    'one-file-system': {
+        'name': '-ofs, --one-file-system',
+        'short': 'Do not descend into folders on other file systems (mount points).',
+        'long': 'Do not descend into folders on other file systems, like find -xdev. '
+                'Mount points below the specified directory (network shares, /proc-like '
+                'virtual file systems, automounted folders) are skipped with all their contents. '
+                'Example: count-files --one-file-system / <arguments>. '
+                'Common argument for counting and searching by extension or by pattern '
+                'and counting the total number of files.'
+    },
+    'follow-symlinks': {
+        'name': '-fsl, --follow-symlinks',
+        'short': 'Follow symbolic links to folders, each folder is scanned only once.',
+        'long': 'Follow symbolic links to folders. By default, they are not followed. '
+                'Each folder is scanned only once, even if it can be reached by several paths '
+                '(symbolic link loops, bind mounts). '
+                'With this argument, the --processes argument is ignored, and it is not available '
+                'with the --watch argument. '
+                'Example: count-files --follow-symlinks ~/Projects <arguments>. '
+                'Common argument for counting and searching by extension or by pattern '
+                'and counting the total number of files.'
+    },
     'total-group': {
         'name': 'Total number of files',
         'short': 'Displaying the number of files that either have a certain extension or no extension at all.',
@@ -268,8 +413,29 @@ topics = {
         'short': 'Show the total combined size of files found using the -t or --total argument.',
         'long': 'Show the total combined size of files found using the -t or --total argument. '
                 'Additional information: average, minimum and maximum file size. '
+                'Add the --show-folders and --folder-sizes arguments to show the combined size '
+                'of the found files in each folder. '
                 'Example: count-files --total txt --total-size ~/Documents <arguments>.'
     },
+    'folder-sizes': {
+        'name': '-fsz, --folder-sizes',
+        'short': 'Show the combined size of the found files in each folder '
+                 '(with --show-folders and --total-size).',
+        'long': 'Show the combined size of the found files in each folder in the list of folders, '
+                'next to the number of files. The sizes are taken from the same walk. '
+                'Available with the --total, --show-folders and --total-size arguments. '
+                'Example: count-files --total .. --show-folders --total-size --folder-sizes ~/Documents <arguments>.'
+    },
+    'size-quantiles': {
+        'name': '-sq, --size-quantiles',
+        'short': 'Also show the median, 90th and 99th percentiles of the file sizes '
+                 '(with --total-size, --file-sizes or --report).',
+        'long': 'Also show the approximate median, 90th and 99th percentiles of the file sizes. '
+                'The sizes are counted in a histogram with a fixed number of buckets, '
+                'so the memory used does not depend on the number of files. '
+                'Available with the --total-size, --file-sizes or --report arguments. '
+                'Example: count-files --total .. --total-size --size-quantiles ~/Documents <arguments>.'
+    },
     'count-group': {
         'name': 'File counting by extension',
         'short': 'Counting all files in the specified directory, by file extension. '
@@ -281,7 +447,7 @@ topics = {
                 '(e.g.: .txt, .py, .html, .css) and the total number of files found. '
                 'All file extensions in the table will be displayed in uppercase (default). '
                 'Example: count-files <arguments>. '
-                'Usage: count-files [-a, --all] [-alpha, --sort-alpha] [-g, --group] '
+                'Usage: count-files [-a, --all] [-alpha, --sort-alpha] [-g, --group] [-rep, --report] [-wa, --watch] '
                 '[-c, --case-sensitive] [-nr, --no-recursion] [-nf, --no-feedback] [path].'
     },
     'sort-alpha': {
@@ -299,6 +465,85 @@ topics = {
         'long': 'Group file extensions by type: archives, audio, videos, data, documents, '
                 'executables, fonts, images, Python related extensions, videos, and other files. '
                 'Example: count-files --group ~/Documents <optional arguments>.'},
+    'report': {
+        'name': '-rep, --report',
+        'short': 'Combined report in one traversal: table with file extensions, '
+                 'combined size for each extension, total number of files and size info.',
+        'long': 'Combined report collected in one traversal of the directory tree: '
+                'the table with file extensions and their frequency, '
+                'the combined size of the files for each extension, '
+                'the total number of files and size info (total combined size, average, maximum and minimum). '
+                'Use it instead of separate runs of the counting by extension '
+                'and the --total .. --total-size arguments. '
+                'The --sort-alpha and --group arguments change the table as usual. '
+                'With the --show-folders argument, the list of folders and the number of files '
+                'in each folder are also displayed. '
+                'Example: count-files --report --show-folders ~/Documents <arguments>.'},
+    'watch': {
+        'name': '-wa, --watch',
+        'short': 'Keep counting: redraw the table with file extensions as files are created, '
+                 'deleted or renamed (Linux only).',
+        'long': 'Live watch mode for the counting by extension. After the initial count, '
+                'the program subscribes to file system events (inotify, Linux only) '
+                'and updates the counts as files are created, deleted or renamed, '
+                'without scanning the directory tree again. '
+                'The table is redrawn at most once per second, only if the counts have changed. '
+                'Press Ctrl+C to stop watching. '
+                'The --sort-alpha argument changes the table as usual. '
+                'Each watched folder uses one inotify watch, '
+                'the limit is set in /proc/sys/fs/inotify/max_user_watches. '
+                'Not available with the --follow-symlinks, --index or --workers arguments. '
+                'Example: count-files --watch ~/Downloads <arguments>.'},
+    'duplicates': {
+        'name': '-dup, --duplicates',
+        'short': 'Find duplicate files (identical content), '
+                 'show the copies and the wasted space by extension.',
+        'long': 'Find the files with identical content and show them in groups, '
+                'largest wasted space first, then the number of copies and the wasted space '
+                'for each extension (the first file of each group is not counted as a copy). '
+                'The files are compared in stages, so most of them are never read: '
+                'first by size (from the walk), then by a hash of their first and last 4 KiB, '
+                'and only then by a hash of their whole content, in a pool of threads. '
+                'Empty files are left out, hard links to the same file are counted once. '
+                'With the --format argument, one record for each file: group, path, size and extension. '
+                'The --sort-alpha argument sorts the extensions alphabetically. '
+                'Example: count-files --duplicates ~/Pictures <arguments>.'},
+    'lines': {
+        'name': '-ln, --lines',
+        'short': 'Also count the lines of the files for each extension (LINES column in the table).',
+        'long': 'Count the lines of the files for each extension and show them '
+                'in the LINES column of the table with file extensions, next to the number of files. '
+                'The line breaks are counted in large chunks of bytes, the text is not decoded, '
+                'and the files are read in a pool of threads. '
+                'A last line without a line break is also counted. '
+                'Use the --skip-binary argument to count binary files with 0 lines without reading them. '
+                'With the --format argument, the records of extensions have the lines field. '
+                'Not available with the --group, --report, --watch, --duplicates, --sniff '
+                'or --processes arguments. '
+                'Example: count-files --lines --skip-binary ~/projects/myproject <arguments>.'},
+    'skip-binary': {
+        'name': '-sb, --skip-binary',
+        'short': 'With --lines, do not read the lines of binary files (with NUL bytes at the beginning).',
+        'long': 'Do not read the lines of binary files when counting lines with the --lines argument: '
+                'the files with a NUL byte in the first 8000 bytes are still counted in FREQ., '
+                'but with 0 lines in LINES. '
+                'Example: count-files --lines --skip-binary ~/projects/myproject <arguments>.'},
+    'sniff': {
+        'name': '-sn, --sniff',
+        'short': 'Classify the files without extension by their content '
+                 '(ELF, script, gzip, zip, PNG, JSON, text or binary).',
+        'long': 'Read the first bytes of each file without extension and count it by its content type '
+                'instead of [no extension]: [ELF] binaries, [SCRIPT] (files starting with #!), '
+                '[GZIP] and [ZIP] archives, [PNG] images, [JSON], other [TEXT] and [BINARY] files. '
+                'Empty files and the files that cannot be read are still counted as [no extension]. '
+                'With the --group argument, the content types are grouped like the extensions '
+                '(e.g. [ELF] in executables, [GZIP] in archives). '
+                'Each file is read once, the files are read in parallel in a pool of threads. '
+                'With the --preview argument, the files without extension are previewed '
+                'if their content is text (count-files -fe . --preview --sniff). '
+                'Not available with the --total, --report or --watch arguments, '
+                'nor with the --file-extension or --filename-match arguments without --preview. '
+                'Example: count-files --sniff --group /usr/bin <arguments>.'},
     'search-group': {
         'name': 'File searching by extension or by pattern',
         'short': 'Search for files with a given extension or files matching a specific pattern. '
@@ -343,7 +588,7 @@ topics = {
     'filename-match': {
         'name': '-fm PATTERN, --filename-match PATTERN',
         'short': 'Searching and listing files matching a specific pattern, '
-                 'using Unix shell-style wildcards: *, ?, [seq], [!seq].',
+                 'using Unix shell-style wildcards: *, ?, [seq], [!seq]. Can be repeated.',
         'long': 'Searching and listing files matching a specific pattern, '
                 'using Unix shell-style wildcards: *, ?, [seq], [!seq]. '
                 '* - matches everything (zero or more occurrences of any character), '
@@ -354,7 +599,14 @@ topics = {
                 'Example for .pyc, .pyo and similar files: '
                 'count-files --filename-match *.py? ~/Documents <arguments>. '
                 'Example for file names containing the word "test": '
-                'count-files --filename-match *test* ~/Documents <arguments>.'
+                'count-files --filename-match *test* ~/Documents <arguments>. '
+                'The argument can be repeated to search for several patterns in one pass, '
+                'a file is listed once if its name matches any of them. '
+                'Example: count-files -fm *.tmp -fm *.bak -fm *~ ~/Documents <arguments>. '
+                'A pattern with folders is matched against the path relative to the specified directory, '
+                'and ** matches zero or more folders. Folders that cannot contain a matching file '
+                'are not scanned at all. '
+                'Example: count-files -fm "src/**/test_*.py" ~/Projects/app <arguments>.'
     },
     'preview': {
         'name': '-p, --preview',
@@ -389,6 +641,108 @@ topics = {
                 'found file when using --file-extension or --filename-match arguments. '
                 'Additional information: total combined size and average file size. '
                 'Example: count-files --file-extension txt --file-sizes ~/Documents <arguments>.'
+    },
+    'limit': {
+        'name': '-lim N, --limit N',
+        'short': 'Stop the search after N found files '
+                 '(with --file-extension or --filename-match arguments).',
+        'long': 'Stop the search as soon as N files are found. The rest of the directory tree '
+                'is not scanned. Available with the --file-extension or --filename-match arguments. '
+                'Example: count-files --file-extension log --limit 100 /var <arguments>.'
+    },
+    'exists': {
+        'name': '-exs, --exists',
+        'short': 'Quiet mode: only check whether there is at least one matching file, '
+                 'the exit status is 0 if there is and 1 if there is not.',
+        'long': 'Quiet mode for the --file-extension or --filename-match arguments: '
+                'nothing is printed, the exit status is 0 if at least one matching file is found '
+                'and 1 if there is none. The search is stopped at the first matching file. '
+                'Useful in scripts and health checks. '
+                'Example: count-files --file-extension core --exists /var && echo "core files found".'
+    },
+    'contains': {
+        'name': '-ct PATTERN, --contains PATTERN',
+        'short': 'Keep only the found files whose content contains PATTERN '
+                 '(with --file-extension or --filename-match arguments).',
+        'long': 'Search in the content of the files found with the --file-extension '
+                'or --filename-match arguments and keep only the files that contain PATTERN, '
+                'like piping the list to grep -l, but each file is opened only once. '
+                'PATTERN is a literal string, or a regular expression with the --regex argument. '
+                'The search is case-insensitive (ASCII letters only) by default, '
+                'use the --case-sensitive argument to distinguish case variations. '
+                'The files are memory-mapped (or read in large chunks) and searched '
+                'in a pool of threads, the matching files are listed in the order in which they are found. '
+                'If a file cannot be memory-mapped (e.g. a named pipe), a regular expression match '
+                'longer than 4096 bytes can be missed. '
+                'Works with the --limit, --exists, --file-sizes, --preview and --format arguments. '
+                'Example: count-files --file-extension py --contains "import numpy" ~/Documents <arguments>.'
+    },
+    'regex': {
+        'name': '-re, --regex',
+        'short': 'Treat the --contains PATTERN as a regular expression.',
+        'long': 'Treat the --contains PATTERN as a regular expression (Python re syntax, matched against bytes) '
+                'instead of a literal string. The ^ and $ characters match at the beginning '
+                'and at the end of each line. '
+                'Example: count-files --filename-match "*.log" --contains "ERROR|FATAL" --regex /var/log <arguments>.'
+    },
+    'format': {
+        'name': '-fmt {json,ndjson,csv}, --format {json,ndjson,csv}',
+        'short': 'Write the results in a machine-readable format: json, ndjson or csv.',
+        'long': 'Write the results as records in a machine-readable format instead of tables and lists: '
+                'json (one array), ndjson (one JSON object per line) or csv (with a header line). '
+                'Searching by extension or by pattern: one record for each found file '
+                '(path, folder and size with --file-sizes). '
+                'Total number of files: one record for each folder with found files '
+                '(folder, count and size with --total-size). '
+                'Counting by extension and --report: one record for each extension '
+                '(extension, count, size with --report and group with --group). '
+                'The records of found files and folders are written as soon as they are found. '
+                'Nothing else is written to the screen. '
+                'Not available in the watch mode and with the --preview argument. '
+                'Example: count-files --file-extension py --format ndjson ~/Documents | jq .path'
+    },
+    'output': {
+        'name': '-o FILE, --output FILE',
+        'short': 'Write the list of found files to FILE '
+                 '(with --file-extension or --filename-match arguments).',
+        'long': 'Write the list of found files to FILE instead of the screen, '
+                'the summary is still shown on the screen. '
+                'Available with the --file-extension or --filename-match arguments, '
+                'and in all modes with the --format argument. '
+                'The list is written in large blocks, as when the output is redirected. '
+                'If the output is redirected to a pipe or a file without this argument, '
+                'only the list of found files is written (no start message and no summary), '
+                'so that it can be passed to other programs. '
+                'Example: count-files --file-extension py --output py_files.txt ~/Documents <arguments>.'
+    },
+    'null': {
+        'name': '-0, --null',
+        'short': 'End each found file path with a NUL character instead of a line break, '
+                 'for xargs -0 (with --file-extension or --filename-match arguments).',
+        'long': 'End each path in the list of found files with a NUL character instead of a line break, '
+                'so that the paths with spaces or line breaks can be passed to xargs -0 and similar programs. '
+                'Only the paths are written (no start message and no summary). '
+                'Available with the --file-extension or --filename-match arguments and the --output argument, '
+                'not with the --format, --preview, --file-sizes or --exists arguments. '
+                'Example: count-files --file-extension log --null /var/log | xargs -0 gzip'
+    },
+    'from-stdin': {
+        'name': '-stdin, --from-stdin',
+        'short': 'Read the list of file paths from stdin (NUL- or newline-separated) '
+                 'instead of walking the directory.',
+        'long': 'Read the list of file paths from the standard input instead of walking the directory, '
+                'e.g. the output of git ls-files -z or find -print0. '
+                'The paths are separated by NUL characters or by line breaks, '
+                'the separator is detected from the input. '
+                'Available for the total number of files, counting by extension and --report, '
+                'not with the --file-extension, --filename-match, --watch or --index arguments. '
+                'The files in the list are counted as they are: the path argument is not used, '
+                'folders and missing paths are skipped, and the --no-recursion, --max-depth, '
+                '--exclude, --exclude-from, --gitignore, --one-file-system and --follow-symlinks '
+                'arguments are not available. '
+                'Hidden files and the files in hidden folders are ignored, '
+                'unless the --all argument is specified. '
+                'Example: git ls-files -z | count-files --from-stdin --report'
     }
 }
 
@@ -414,6 +768,30 @@ indexes = {
         [topics['case-sensitive']['name'], topics['case-sensitive']['short'], topics['case-sensitive']['long']],
     ('nf', 'no-feedback', 'no', 'feedback', 'common', 'optional'):
         [topics['no-feedback']['name'], topics['no-feedback']['short'], topics['no-feedback']['long']],
+    ('w', 'workers', 'common', 'optional'):
+        [topics['workers']['name'], topics['workers']['short'], topics['workers']['long']],
+    ('ord', 'ordered', 'common', 'optional'):
+        [topics['ordered']['name'], topics['ordered']['short'], topics['ordered']['long']],
+    ('pr', 'processes', 'common', 'optional'):
+        [topics['processes']['name'], topics['processes']['short'], topics['processes']['long']],
+    ('ix', 'index', 'common', 'optional'):
+        [topics['index']['name'], topics['index']['short'], topics['index']['long']],
+    ('md', 'max-depth', 'max', 'depth', 'common', 'optional'):
+        [topics['max-depth']['name'], topics['max-depth']['short'], topics['max-depth']['long']],
+    ('ex', 'exclude', 'common', 'optional'):
+        [topics['exclude']['name'], topics['exclude']['short'], topics['exclude']['long']],
+    ('exf', 'exclude-from', 'exclude', 'from', 'common', 'optional'):
+        [topics['exclude-from']['name'], topics['exclude-from']['short'], topics['exclude-from']['long']],
+    ('gi', 'gitignore', 'common', 'optional'):
+        [topics['gitignore']['name'], topics['gitignore']['short'], topics['gitignore']['long']],
+    ('ofs', 'one-file-system', 'mount', 'common', 'optional'):
+        [topics['one-file-system']['name'], topics['one-file-system']['short'], topics['one-file-system']['long']],
+    ('fsl', 'follow-symlinks', 'symlinks', 'common', 'optional'):
+        [topics['follow-symlinks']['name'], topics['follow-symlinks']['short'], topics['follow-symlinks']['long']],
+    ('fmt', 'format', 'json', 'ndjson', 'csv', 'common', 'optional'):
+        [topics['format']['name'], topics['format']['short'], topics['format']['long']],
+    ('stdin', 'from-stdin', 'from', 'common', 'optional'):
+        [topics['from-stdin']['name'], topics['from-stdin']['short'], topics['from-stdin']['long']],
 
     ('total-group', 'groups', 'total', 'tg'):
         [topics['total-group']['name'], topics['total-group']['short'], topics['total-group']['long']],
@@ -423,6 +801,10 @@ indexes = {
         [topics['show-folders']['name'], topics['show-folders']['short'], topics['show-folders']['long']],
     ('ts', 'total-size', 'total', 'size', 'special', 'optional'):
         [topics['total-size']['name'], topics['total-size']['short'], topics['total-size']['long']],
+    ('fsz', 'folder-sizes', 'folders', 'total', 'size', 'special', 'optional'):
+        [topics['folder-sizes']['name'], topics['folder-sizes']['short'], topics['folder-sizes']['long']],
+    ('sq', 'size-quantiles', 'total', 'size', 'special', 'optional'):
+        [topics['size-quantiles']['name'], topics['size-quantiles']['short'], topics['size-quantiles']['long']],
 
     ('count-group', 'groups', 'count', 'cg'):
         [topics['count-group']['name'], topics['count-group']['short'], topics['count-group']['long']],
@@ -430,6 +812,18 @@ indexes = {
         [topics['sort-alpha']['name'], topics['sort-alpha']['short'], topics['sort-alpha']['long']],
     ('g', 'group', 'count', 'special', 'optional'):
         [topics['group']['name'], topics['group']['short'], topics['group']['long']],
+    ('rep', 'report', 'count', 'special', 'optional'):
+        [topics['report']['name'], topics['report']['short'], topics['report']['long']],
+    ('wa', 'watch', 'count', 'special', 'optional'):
+        [topics['watch']['name'], topics['watch']['short'], topics['watch']['long']],
+    ('dup', 'duplicates', 'count', 'special', 'optional'):
+        [topics['duplicates']['name'], topics['duplicates']['short'], topics['duplicates']['long']],
+    ('ln', 'lines', 'count', 'special', 'optional'):
+        [topics['lines']['name'], topics['lines']['short'], topics['lines']['long']],
+    ('sb', 'skip-binary', 'skip', 'binary', 'count', 'special', 'optional'):
+        [topics['skip-binary']['name'], topics['skip-binary']['short'], topics['skip-binary']['long']],
+    ('sn', 'sniff', 'count', 'special', 'optional'):
+        [topics['sniff']['name'], topics['sniff']['short'], topics['sniff']['long']],
 
     ('search-group', 'groups', 'search', 'sg'):
         [topics['search-group']['name'], topics['search-group']['short'], topics['search-group']['long']],
@@ -442,7 +836,19 @@ indexes = {
     ('ps', 'preview-size', 'preview', 'size', 'search', 'special', 'optional'):
         [topics['preview-size']['name'], topics['preview-size']['short'], topics['preview-size']['long']],
     ('fs', 'file-sizes', 'file', 'sizes', 'search', 'special', 'optional'):
-        [topics['file-sizes']['name'], topics['file-sizes']['short'], topics['file-sizes']['long']]
+        [topics['file-sizes']['name'], topics['file-sizes']['short'], topics['file-sizes']['long']],
+    ('lim', 'limit', 'search', 'special', 'optional'):
+        [topics['limit']['name'], topics['limit']['short'], topics['limit']['long']],
+    ('exs', 'exists', 'search', 'special', 'optional'):
+        [topics['exists']['name'], topics['exists']['short'], topics['exists']['long']],
+    ('ct', 'contains', 'grep', 'content', 'search', 'special', 'optional'):
+        [topics['contains']['name'], topics['contains']['short'], topics['contains']['long']],
+    ('re', 'regex', 'grep', 'content', 'search', 'special', 'optional'):
+        [topics['regex']['name'], topics['regex']['short'], topics['regex']['long']],
+    ('o', 'output', 'search', 'special', 'optional'):
+        [topics['output']['name'], topics['output']['short'], topics['output']['long']],
+    ('0', 'null', 'search', 'special', 'optional'):
+        [topics['null']['name'], topics['null']['short'], topics['null']['long']]
 }
 
 
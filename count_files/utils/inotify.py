@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""Minimal wrapper for the Linux inotify API, based on ctypes.
+
+Used in the watch mode (--watch) to keep the file counts up to date
+without rescanning the directory tree. No third-party packages or daemons are needed.
+See: man 7 inotify
+"""
+import os
+import errno
+import struct
+import select
+from typing import List, Tuple
+try:
+    import ctypes
+    import ctypes.util
+except ImportError:
+    ctypes = None
+
+from count_files.settings import INOTIFY_BUFFER_SIZE
+
+# events (inotify.h)
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+# special flags
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+# events needed to count the files in a directory
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR | IN_DONT_FOLLOW
+
+# struct inotify_event: int wd, uint32_t mask, uint32_t cookie, uint32_t len, char name[]
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class Inotify(object):
+    """inotify instance with a set of watched directories.
+
+    Raises OSError if inotify is not available (e.g. not Linux).
+    """
+
+    def __init__(self):
+        if ctypes is None:
+            raise OSError(errno.ENOSYS, 'ctypes is not available')
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        try:
+            self.libc_init = libc.inotify_init1
+            self.libc_add_watch = libc.inotify_add_watch
+            self.libc_rm_watch = libc.inotify_rm_watch
+        except AttributeError:
+            raise OSError(errno.ENOSYS, 'inotify is not available on this system')
+        self.libc_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.libc_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = self.libc_init(IN_CLOEXEC)
+        if self.fd < 0:
+            self.raise_errno()
+
+    @staticmethod
+    def raise_errno(filename: str = None):
+        err = ctypes.get_errno()
+        if filename is None:
+            raise OSError(err, os.strerror(err))
+        raise OSError(err, os.strerror(err), filename)
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        """Start watching a directory.
+
+        :param path: full/path/to/folder
+        :param mask: inotify events to watch
+        :return: watch descriptor
+        """
+        wd = self.libc_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            self.raise_errno(path)
+        return wd
+
+    def rm_watch(self, wd: int):
+        """Stop watching a directory. Errors are ignored (the watch may already be removed)."""
+        self.libc_rm_watch(self.fd, wd)
+
+    def read_events(self, timeout: float = None) -> List[Tuple[int, int, int, str]]:
+        """Wait for events and read all of them that are available.
+
+        :param timeout: seconds to wait, None -> wait until there are events
+        :return: list with tuples (wd, mask, cookie, name), empty if there are no events
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.fd, INOTIFY_BUFFER_SIZE)
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            events.append((wd, mask, cookie, name))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""Counting the lines of the files by extension (--lines).
+
+The files are read in binary mode in chunks of LINES_CHUNK_SIZE (settings.py)
+and the line breaks (b'\\n') are counted in each chunk at once with bytes.count(),
+so the text is never decoded and there is no loop over the lines in Python.
+The last line is counted even if it does not end with a line break.
+With skip_binary, the lines of binary files (with a NUL byte in the first LINES_BINARY_PROBE bytes)
+are not counted, the files are counted with 0 lines.
+The files are read in batches by a pool of threads, while the walk goes on.
+"""
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+from count_files.settings import LINES_WORKERS, LINES_CHUNK_SIZE, LINES_BATCH_SIZE, LINES_BINARY_PROBE
+
+
+def count_lines(filepath: str, skip_binary: bool = False, chunk_size: int = LINES_CHUNK_SIZE) -> Optional[int]:
+    """Count the lines of the file.
+
+    :param filepath: full/path/to/file
+    :param skip_binary: False(default) or True -> return None for binary files
+    :param chunk_size: size of each read, LINES_CHUNK_SIZE(default)
+    :return: number of lines (0 if the file is empty or cannot be read), None for skipped binary files
+    """
+    lines = 0
+    last = b'\n'
+    try:
+        with open(filepath, 'rb') as f:
+            chunk = f.read(chunk_size)
+            if skip_binary and b'\0' in chunk[:LINES_BINARY_PROBE]:
+                return None
+            while chunk:
+                lines += chunk.count(b'\n')
+                last = chunk[-1:]
+                chunk = f.read(chunk_size)
+    except OSError:
+        return 0
+    # the last line without a line break
+    return lines if last == b'\n' else lines + 1
+
+
+class LineCounter(object):
+    """Counts the files and their lines by extension, reading the files in a pool of threads.
+
+    Usage:
+    with LineCounter() as counter:
+        for root, dirs, files in current_os.walk(path):
+            counter.add((extension_of(f), f) for f in files)
+    counter.files, counter.lines
+    """
+
+    def __init__(self, skip_binary: bool = False, workers: int = LINES_WORKERS,
+                 batch_size: int = LINES_BATCH_SIZE):
+        """
+        :param skip_binary: False(default) or True -> binary files are counted with 0 lines
+        :param workers: number of threads, LINES_WORKERS(default)
+        :param batch_size: number of files read in parallel at once, LINES_BATCH_SIZE(default)
+        """
+        self.skip_binary = skip_binary
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.batch_size = batch_size
+        self.batch: List[Tuple[str, str]] = []
+        # extensions and the number of lines of the previous batch (the reads in progress)
+        self.pending = None
+        # Counter() with extensions and the number of files / lines
+        self.files = Counter()
+        self.lines = Counter()
+
+    def __enter__(self) -> 'LineCounter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, files: Iterable[Tuple[str, os.DirEntry]]):
+        """Add the files, their lines are counted when the batch is full.
+
+        :param files: tuples (extension, os.DirEntry object or path)
+        """
+        self.batch.extend((extension, os.fspath(f)) for extension, f in files)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Count the previous batch, start reading the collected files."""
+        self.collect()
+        if self.batch:
+            extensions, paths = zip(*self.batch)
+            self.pending = extensions, self.executor.map(count_lines, paths, [self.skip_binary] * len(paths))
+            self.batch = []
+
+    def collect(self):
+        """Wait for the reads of the previous batch and add the numbers of files and lines."""
+        if self.pending is not None:
+            extensions, results = self.pending
+            for extension, lines in zip(extensions, results):
+                self.files[extension] += 1
+                # binary files skipped with skip_binary are counted with 0 lines
+                self.lines[extension] += lines or 0
+            self.pending = None
+
+    def close(self):
+        """Count the rest of the files and stop the threads."""
+        self.flush()
+        self.collect()
+        self.executor.shutdown()
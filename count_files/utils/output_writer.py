@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""Buffered writer for the lists of found files.
+
+On a terminal, each line is written as soon as it is found.
+If the output is redirected (a pipe or a file, --output), the lines are collected
+and written in large blocks (OUTPUT_BUFFER_SIZE in settings.py),
+so that writing millions of paths is not dominated by the cost of each write call,
+and the messages meant for the screen (start message, summary) are left out of the list.
+"""
+import sys
+from typing import TextIO
+
+from count_files.settings import OUTPUT_BUFFER_SIZE
+
+
+class OutputWriter(object):
+    """Line-oriented writer to stdout or to a file.
+
+    Usage:
+    with OutputWriter(filename=args.output) as output:
+        for f in files:
+            output.write_line(f.path)
+    """
+
+    def __init__(self, filename: str = None, stream: TextIO = None, terminal: bool = None,
+                 buffer_size: int = OUTPUT_BUFFER_SIZE, terminator: str = '\n'):
+        """
+        :param filename: optional, the file for the output, None(default) -> write to the stream
+        :param stream: optional, the stream for the output, sys.stdout(default)
+        :param terminal: optional, True -> write each line at once,
+        False -> write in blocks of buffer_size characters, None(default) -> True if the stream is a terminal
+        :param buffer_size: number of characters collected before they are written, OUTPUT_BUFFER_SIZE(default)
+        :param terminator: the end of each line, '\n'(default) or '\0' (--null)
+        """
+        self.filename = filename
+        if filename is not None:
+            self.stream = open(filename, 'w', encoding='utf-8', errors='surrogateescape')
+        else:
+            self.stream = sys.stdout if stream is None else stream
+        if terminal is None:
+            try:
+                terminal = filename is None and self.stream.isatty()
+            except (AttributeError, ValueError):
+                terminal = False
+        self.terminal = terminal
+        # the list goes to a pipe or a redirected stdout: only the lines are written
+        self.piped = filename is None and not terminal
+        self.buffer_size = 1 if terminal else buffer_size
+        self.terminator = terminator
+        self.lines = []
+        self.size = 0
+
+    def __enter__(self) -> 'OutputWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_line(self, text: str):
+        """Add one line to the output (the terminator is added here).
+
+        :param text: line without the terminator
+        """
+        self.lines.append(text)
+        self.size += len(text) + 1
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write the collected lines with one write call."""
+        if self.lines:
+            self.lines.append('')
+            self.stream.write(self.terminator.join(self.lines))
+            self.lines = []
+            self.size = 0
+        self.stream.flush()
+
+    def close(self):
+        """Write the collected lines, close the file (if the output is a file)."""
+        if self.stream.closed:
+            return
+        self.flush()
+        if self.filename is not None:
+            self.stream.close()
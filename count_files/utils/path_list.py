@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""Lists of file paths read from the standard input (--from-stdin).
+
+The paths are separated by NUL characters (git ls-files -z, find -print0)
+or by line breaks. The separator is detected from the input itself.
+The paths are grouped by their folders and processed like the directory listings
+of the walk (see def walk in platforms.py), so no directory is listed.
+"""
+import os
+import stat
+from typing import BinaryIO, Callable, Iterable, List, Tuple
+
+from count_files.settings import PATH_LIST_CHUNK_SIZE
+
+
+class PathEntry(object):
+    """A file from a list of paths.
+
+    Provides the attributes and methods of os.DirEntry used in platforms.py,
+    so that the paths from the list and from os.scandir() can be processed in the same way.
+    The stat info is read on the first call of def stat (e.g. for the file type or the sizes) and cached.
+    """
+
+    __slots__ = ('name', 'path', '_stat')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        self._stat = None
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f'<PathEntry {self.name!r}>'
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return self.has_mode(stat.S_ISDIR)
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        return self.has_mode(stat.S_ISREG)
+
+    def has_mode(self, check: Callable[[int], bool]) -> bool:
+        """Check the file type, False if the path does not exist or cannot be accessed.
+
+        :param check: function like stat.S_ISREG
+        :return: True or False
+        """
+        try:
+            return check(self.stat().st_mode)
+        except OSError:
+            return False
+
+    def is_symlink(self) -> bool:
+        return False
+
+    def stat(self, follow_symlinks: bool = True) -> os.stat_result:
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+
+def read_paths(stream: BinaryIO, chunk_size: int = PATH_LIST_CHUNK_SIZE) -> Iterable[str]:
+    """Read NUL- or newline-separated paths.
+
+    The separator is NUL if there is a NUL character before the first line break.
+    Empty paths are skipped, with line breaks the trailing \\r is removed.
+    :param stream: binary stream, e.g. sys.stdin.buffer
+    :param chunk_size: number of bytes read at once, PATH_LIST_CHUNK_SIZE(default)
+    :return: object <class 'generator'> with paths (decoded as os.fsdecode does)
+    """
+    separator = None
+    rest = b''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        rest += chunk
+        if separator is None:
+            nul, newline = rest.find(b'\0'), rest.find(b'\n')
+            if nul == -1 and newline == -1:
+                continue
+            separator = b'\0' if nul != -1 and (newline == -1 or nul < newline) else b'\n'
+        *paths, rest = rest.split(separator)
+        yield from decode_paths(paths, separator)
+    yield from decode_paths([rest], separator)
+
+
+def decode_paths(paths: List[bytes], separator: bytes) -> Iterable[str]:
+    """Decode the paths, skip the empty ones.
+
+    Used in def read_paths.
+    :param paths: list with paths in bytes
+    :param separator: b'\\0', b'\\n' or None
+    :return: object <class 'generator'> with paths
+    """
+    for path in paths:
+        if separator != b'\0':
+            path = path.rstrip(b'\r')
+        if path:
+            yield os.fsdecode(path)
+
+
+def group_paths(paths: Iterable[str]) -> Iterable[Tuple[str, List[PathEntry]]]:
+    """Group the consecutive paths of files in the same folder.
+
+    Lists like those of git ls-files or find are ordered by folders,
+    so there is usually one group for each folder.
+    :param paths: file paths
+    :return: object <class 'generator'> with tuples (root, files),
+    root - path/to/folder ('.' for relative paths without a folder), files - list with PathEntry objects
+    """
+    root = None
+    files = []
+    for path in paths:
+        # the files in the current directory: '.' instead of an empty folder name
+        folder = os.path.dirname(path) or os.curdir
+        if folder != root:
+            if files:
+                yield root, files
+            root, files = folder, []
+        files.append(PathEntry(path))
+    if files:
+        yield root, files
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""Unix shell-style wildcard patterns for paths, with support for '**'.
+
+A path pattern is matched against the path of a file relative to the searched folder,
+one folder name at a time: src/*/test_*.py, docs/**/*.md, **/migrations/*.py.
+* - matches everything inside one file or folder name, ? - matches any single character,
+[seq] - matches any character in seq, [!seq] - matches any character not in seq,
+** - matches zero or more folders.
+A pattern without folders (*.py) matches the file name in any folder, as before.
+
+While walking the tree, the state of a folder is the set of pattern positions
+that can be reached by its path. Folders with an empty state can never contain
+a matching file, so they are removed from the walk (see def search_files_by_pattern, platforms.py).
+"""
+import os
+import re
+import fnmatch
+from typing import Iterable, Callable, FrozenSet, Tuple, Dict
+
+
+def is_path_pattern(pattern: str) -> bool:
+    """Return True if the pattern contains folders (e.g. src/*.py), False for file name patterns."""
+    return '/' in pattern or os.sep in pattern
+
+
+class PathPatterns(object):
+    """Compiled path patterns for one search.
+
+    Usage:
+    patterns = PathPatterns(['src/**/test_*.py'])
+    state = patterns.start
+    state = patterns.enter(state, 'src')  # empty state -> do not walk the folder
+    patterns.file_matcher(state)('test_walk.py')  # -> match object or None
+    """
+
+    def __init__(self, patterns: Iterable[str], case_sensitive: bool = False):
+        """
+        :param patterns: list with path patterns or file name patterns
+        :param case_sensitive: False(default) -> ignore case, True -> distinguish case variations
+        """
+        self.flags = 0 if case_sensitive else re.IGNORECASE
+        # parts: list with one list for each pattern, '**' or translated regex for each folder or file name
+        self.parts = []
+        for pattern in patterns:
+            parts = [part for part in pattern.replace(os.sep, '/').split('/') if part not in ('', '.')]
+            if not parts:
+                continue
+            if not is_path_pattern(pattern):
+                # file name pattern, matches in any folder
+                parts.insert(0, '**')
+            self.parts.append([part if part == '**' else fnmatch.translate(part) for part in parts])
+        self.matchers = {(n, i): re.compile(part, self.flags).match
+                         for n, parts in enumerate(self.parts)
+                         for i, part in enumerate(parts) if part != '**'}
+        self.file_matchers = {}  # type: Dict[FrozenSet[Tuple[int, int]], Callable]
+        self.start = self.closure((n, 0) for n in range(len(self.parts)))
+
+    def closure(self, positions: Iterable[Tuple[int, int]]) -> FrozenSet[Tuple[int, int]]:
+        """Add the positions after '**', as '**' also matches zero folders.
+
+        :param positions: tuples (pattern number, part number)
+        :return: state of a folder
+        """
+        result = set()
+        for n, i in positions:
+            result.add((n, i))
+            while self.parts[n][i] == '**' and i + 1 < len(self.parts[n]):
+                i += 1
+                result.add((n, i))
+        return frozenset(result)
+
+    def enter(self, state: FrozenSet[Tuple[int, int]], name: str) -> FrozenSet[Tuple[int, int]]:
+        """Return the state of a subfolder.
+
+        :param state: state of the parent folder
+        :param name: subfolder name
+        :return: state of the subfolder, empty if no file below it can match
+        """
+        positions = []
+        for n, i in state:
+            if self.parts[n][i] == '**':
+                positions.append((n, i))
+            elif i + 1 < len(self.parts[n]) and self.matchers[(n, i)](name):
+                positions.append((n, i + 1))
+        return self.closure(positions)
+
+    def file_matcher(self, state: FrozenSet[Tuple[int, int]]) -> Callable[[str], object]:
+        """Return a function matching the file names of a folder with the given state.
+
+        The last parts of all patterns reached by the state are combined into one regex,
+        cached for each state.
+        :param state: state of the folder
+        :return: function, call it with a file name, returns a true value if the name matches
+        """
+        matcher = self.file_matchers.get(state)
+        if matcher is None:
+            last_parts = {self.parts[n][i] for n, i in state if i + 1 == len(self.parts[n])}
+            if '**' in last_parts:
+                # src/** matches all files below src
+                matcher = lambda name: True
+            elif last_parts:
+                matcher = re.compile('|'.join(sorted(last_parts)), self.flags).match
+            else:
+                matcher = lambda name: None
+            self.file_matchers[state] = matcher
+        return matcher
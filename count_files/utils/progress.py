@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""Progress line shown while the directory tree is walked (feedback).
+
+The line is written to stderr, so it does not mix with the results,
+and it is redrawn at most once per PROGRESS_INTERVAL (settings.py),
+however many files and folders are processed in the meantime.
+Nothing is written if stderr is not a terminal (e.g. redirected to a file).
+If the number of folders from the previous scan is known (scan index),
+the estimated time remaining is also shown.
+"""
+import sys
+import time
+from typing import TextIO
+
+from count_files.settings import TERM_WIDTH, PROGRESS_INTERVAL
+
+
+def format_duration(seconds: float) -> str:
+    """Return the duration in a string like '01:05' or '1:02:03'.
+
+    :param seconds: duration in seconds
+    :return: minutes:seconds or hours:minutes:seconds
+    """
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f'{hours}:{minutes:02}:{seconds:02}'
+    return f'{minutes:02}:{seconds:02}'
+
+
+class Progress(object):
+    """Throttled progress line with the numbers of processed files and folders.
+
+    Usage:
+    with Progress(enabled=not no_feedback) as progress:
+        for root, dirs, files in current_os.walk(path):
+            progress.update(files=len(files))
+    """
+
+    def __init__(self, enabled: bool = True, stream: TextIO = None, interval: float = PROGRESS_INTERVAL,
+                 expected_dirs: int = None, term_width: int = TERM_WIDTH):
+        """
+        :param enabled: True(default) or False -> nothing is shown
+        :param stream: optional, the stream for the progress line, sys.stderr(default)
+        :param interval: minimal interval between two redraws in seconds, PROGRESS_INTERVAL(default)
+        :param expected_dirs: optional, the number of folders from the previous scan (for the ETA),
+        None(default) -> don't show the ETA
+        :param term_width: the maximal width of the line
+        """
+        self.stream = sys.stderr if stream is None else stream
+        try:
+            self.enabled = enabled and self.stream.isatty()
+        except (AttributeError, ValueError):
+            self.enabled = False
+        self.interval = interval
+        self.expected_dirs = expected_dirs or None
+        self.term_width = term_width
+        self.files = 0
+        self.dirs = 0
+        self.start = time.monotonic()
+        self.next_time = self.start + interval
+        self.shown = False
+
+    def __enter__(self) -> 'Progress':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def update(self, files: int = 0, dirs: int = 1):
+        """Add the processed files and folders, redraw the line if the interval has passed.
+
+        :param files: number of processed files
+        :param dirs: number of processed folders, 1(default) -> one directory listing
+        """
+        self.files += files
+        self.dirs += dirs
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now >= self.next_time:
+            self.next_time = now + self.interval
+            self.show(now)
+
+    def line(self, now: float) -> str:
+        """Return the text of the progress line.
+
+        :param now: time.monotonic() value
+        :return: '1200 files (600/s), 30 folders (15/s), 00:02 elapsed, ETA 00:10'
+        """
+        elapsed = max(now - self.start, 1e-9)
+        parts = [f'{self.files} files ({self.files / elapsed:.0f}/s)']
+        # the folders are not counted in worker processes
+        if self.dirs:
+            parts.append(f'{self.dirs} folders ({self.dirs / elapsed:.0f}/s)')
+        parts.append(f'{format_duration(elapsed)} elapsed')
+        if self.expected_dirs and self.dirs:
+            remaining = max(self.expected_dirs - self.dirs, 0) * elapsed / self.dirs
+            parts.append(f'ETA {format_duration(remaining)}')
+        return ', '.join(parts)
+
+    def show(self, now: float):
+        """Redraw the progress line.
+
+        :param now: time.monotonic() value
+        """
+        self.stream.write("\r" + self.line(now)[:self.term_width - 1].ljust(self.term_width - 1))
+        self.stream.flush()
+        self.shown = True
+
+    def close(self):
+        """Clean the progress line before proceeding (if it was shown)."""
+        if self.shown:
+            self.stream.write("\r" + " " * (self.term_width - 1) + "\r")
+            self.stream.flush()
+            self.shown = False
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""Machine-readable output formats (--format): JSON, NDJSON and CSV.
+
+The results are written as records (dicts with the same keys), one record for each:
+search (-fe, -fm) - found file: path, folder, size (with --file-sizes);
+total (-t) - folder with found files: folder, count, size (with --total-size);
+count (table) - extension: extension, count, lines (with --lines), group (with --group);
+report (--report) - extension: extension, count, size, group (with --group);
+duplicates (--duplicates) - duplicate file: group, path, size, extension.
+
+NDJSON and CSV records are written as soon as they are produced (one line each),
+JSON records are written in the same way, as the items of one array.
+The lines go through the output writer (utils/output_writer.py),
+so they are written in large blocks if the output is redirected.
+"""
+import os
+import io
+import csv
+import json
+from typing import Iterable, List, Tuple, Dict, Optional
+
+from count_files.utils.output_writer import OutputWriter
+from count_files.utils.size_stats import SizeStats, get_file_size
+from count_files.utils.file_handlers import get_name_suffix, normalize_extension
+
+
+class RecordWriter(object):
+    """Writes records in one of the OUTPUT_FORMATS (settings.py).
+
+    Usage:
+    with RecordWriter('csv', ['path', 'folder'], output) as writer:
+        writer.write({'path': 'full/path/to/file.txt', 'folder': 'full/path/to'})
+    """
+
+    def __init__(self, fmt: str, fields: List[str], output: OutputWriter):
+        """
+        :param fmt: 'json', 'ndjson' or 'csv'
+        :param fields: the keys of the records (the columns of the CSV header)
+        :param output: OutputWriter object
+        """
+        self.fmt = fmt
+        self.fields = fields
+        self.output = output
+        self.count = 0
+        self.closed = False
+        # JSON: the previous item is written when the next one (or the end of the array) is known
+        self.pending = None
+        if fmt == 'csv':
+            # each row is formatted in the buffer, the fields with line breaks (\r or \n) are quoted
+            self.csv_buffer = io.StringIO()
+            self.csv = csv.writer(self.csv_buffer, lineterminator='\r\n')
+            self.write_csv_row(fields)
+
+    def __enter__(self) -> 'RecordWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, record: dict):
+        """Write one record.
+
+        :param record: dict with the keys from self.fields
+        """
+        self.count += 1
+        if self.fmt == 'csv':
+            self.write_csv_row([record.get(field, '') for field in self.fields])
+        elif self.fmt == 'ndjson':
+            self.output.write_line(json.dumps(record))
+        else:
+            if self.pending is None:
+                self.output.write_line('[')
+            else:
+                self.output.write_line(f'{self.pending},')
+            self.pending = json.dumps(record)
+
+    def write_csv_row(self, row: list):
+        """Format one CSV row and write it as one line (ending with \\n instead of \\r\\n).
+
+        :param row: list with the values of the fields
+        """
+        self.csv.writerow(row)
+        line = self.csv_buffer.getvalue()
+        self.csv_buffer.seek(0)
+        self.csv_buffer.truncate()
+        self.output.write_line(line[:-2])
+
+    def write_all(self, records: Iterable[dict]) -> int:
+        """Write all records.
+
+        :param records: object <class 'generator'> with dicts
+        :return: number of written records
+        """
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def close(self):
+        """End the JSON array and write the collected lines."""
+        if self.closed:
+            return
+        if self.fmt == 'json':
+            if self.pending is None:
+                self.output.write_line('[]')
+            else:
+                self.output.write_line(self.pending)
+                self.output.write_line(']')
+        self.output.flush()
+        self.closed = True
+
+
+def file_records(files: Iterable[os.DirEntry], file_sizes: bool = False) -> Iterable[dict]:
+    """Records of the found files (search by extension or by pattern).
+
+    :param files: os.DirEntry objects (or full paths) of the found files
+    :param file_sizes: True -> add the size in bytes, False(default) -> don't add
+    :return: object <class 'generator'> with dicts like {'path': ..., 'folder': ..., 'size': ...}
+    """
+    for f in files:
+        path = os.fspath(f)
+        record = {'path': path, 'folder': os.path.dirname(path)}
+        if file_sizes:
+            record['size'] = get_file_size(f)
+        yield record
+
+
+def folder_records(folders: Iterable[Tuple[str, int, Optional[SizeStats]]],
+                   total_size: bool = False) -> Iterable[dict]:
+    """Records of the folders with found files (total number of files).
+
+    :param folders: tuples (root, files_amount, sizes) from def search_folders (platforms.py)
+    :param total_size: True -> add the combined size in bytes, False(default) -> don't add
+    :return: object <class 'generator'> with dicts like {'folder': ..., 'count': ..., 'size': ...}
+    """
+    for root, amount, sizes in folders:
+        record = {'folder': root, 'count': amount}
+        if total_size:
+            record['size'] = sizes.total
+        yield record
+
+
+def extension_records(data: List[Tuple[str, int]], ext_sizes: Dict[str, int] = None,
+                      ext_and_group: Dict[str, str] = None, ext_lines: Dict[str, int] = None) -> Iterable[dict]:
+    """Records of the extensions (counting files by extension, report).
+
+    :param data: list with items like [('txt', 25), ('png', 8), ...]
+    :param ext_sizes: optional, dict with the combined size of the files of each extension
+    :param ext_and_group: optional, dict with items like {'png': 'image', ...} -> add the group
+    :param ext_lines: optional, dict with the number of lines of the files of each extension
+    :return: object <class 'generator'> with dicts like {'extension': ..., 'count': ..., 'size': ...}
+    """
+    for ext, freq in data:
+        record = {'extension': ext, 'count': freq}
+        if ext_sizes is not None:
+            record['size'] = ext_sizes[ext]
+        if ext_lines is not None:
+            record['lines'] = ext_lines[ext]
+        if ext_and_group is not None:
+            record['group'] = ext_and_group.get(ext.lower(), 'other')
+        yield record
+
+
+def duplicate_records(groups: List[Tuple[int, List[str]]], case_sensitive: bool = False) -> Iterable[dict]:
+    """Records of the duplicate files (all the files of each group).
+
+    :param groups: list with tuples (size, paths) from def find_duplicates (platforms.py)
+    :param case_sensitive: False(default) -> ignore case in extensions, True -> distinguish case variations
+    :return: object <class 'generator'> with dicts like {'group': 1, 'path': ..., 'size': ..., 'extension': ...},
+    the groups are numbered from 1
+    """
+    for number, (size, paths) in enumerate(groups, 1):
+        for path in paths:
+            yield {'group': number, 'path': path, 'size': size,
+                   'extension': normalize_extension(get_name_suffix(os.path.basename(path)), case_sensitive,
+                                                    '[no extension]')}
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""Persistent on-disk scan index.
+
+The index stores the listing of each directory found during a scan:
+the modification time of the directory, its files (name, size, hidden)
+and its subdirectories (name, hidden, symbolic link).
+On the next scan of the same path, only the directories whose modification time
+has changed are listed again, the listings of all other directories are taken from the index.
+Creating, deleting or renaming a file changes the modification time of its directory,
+so the file names (and the counts by extension) are always up to date.
+Changing the content of a file does not, so the sizes of such files may be outdated.
+
+One index file (JSON) is created for each scanned path in INDEX_DIR (settings.py).
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import List, Tuple, Optional, Callable
+
+from count_files.settings import INDEX_DIR, INDEX_VERSION, INDEX_RACY_MTIME_NS
+
+
+class IndexEntry(object):
+    """A file or directory restored from the scan index.
+
+    Provides the attributes and methods of os.DirEntry used in platforms.py,
+    so that the listings from the index and from os.scandir() can be processed in the same way.
+    """
+
+    __slots__ = ('name', 'path', 'size', 'hidden', 'symlink', 'directory')
+
+    def __init__(self, root: str, name: str, size: int = 0, hidden: bool = False,
+                 symlink: bool = False, directory: bool = False):
+        self.name = name
+        self.path = os.path.join(root, name)
+        self.size = size
+        self.hidden = hidden
+        self.symlink = symlink
+        self.directory = directory
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f'<IndexEntry {self.name!r}>'
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return self.directory
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        return not self.directory
+
+    def is_symlink(self) -> bool:
+        return self.symlink
+
+    def stat(self, follow_symlinks: bool = True) -> os.stat_result:
+        """Return a stat result with the file size stored in the index (other fields are 0)."""
+        return os.stat_result((0, 0, 0, 0, 0, 0, self.size, 0, 0, 0))
+
+
+class ScanIndex(object):
+    """Persistent index of directory listings for one scanned path.
+
+    Usage:
+    index = ScanIndex(path)
+    current_os.count_files_by_extension(path, index=index)
+    index.save()
+    """
+
+    def __init__(self, path: str, index_dir: str = INDEX_DIR):
+        """
+        :param path: full/path/to/folder to be scanned
+        :param index_dir: folder for the index files, INDEX_DIR(default)
+        """
+        self.path = os.path.abspath(os.path.expanduser(path))
+        name = hashlib.sha1(self.path.encode('utf-8', 'surrogateescape')).hexdigest()
+        self.filename = os.path.join(index_dir, f'{name}.json')
+        # dirs: dict with items like {'full/path/to/folder': [mtime_ns, files, dirs]}
+        # files: [[name, size, hidden], ...], dirs: [[name, hidden, symlink], ...]
+        self.dirs = {}
+        self.changed = False
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Read the index file, if it exists and has the current INDEX_VERSION."""
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == INDEX_VERSION and data.get('path') == self.path:
+            self.dirs = data.get('dirs', {})
+
+    def save(self):
+        """Write the index file, if anything has changed since it was loaded.
+
+        The file is replaced atomically, so an interrupted run cannot corrupt it.
+        """
+        if not self.changed:
+            return
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        tmp_filename = f'{self.filename}.{os.getpid()}.tmp'
+        with open(tmp_filename, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'path': self.path, 'dirs': self.dirs}, f,
+                      separators=(',', ':'))
+        os.replace(tmp_filename, self.filename)
+        self.changed = False
+
+    def scan_dir(self, root: str, scan: Callable[[str], Optional[Tuple[list, list]]],
+                 is_hidden: Callable[[os.DirEntry], bool]
+                 ) -> Optional[Tuple[List[IndexEntry], List[IndexEntry]]]:
+        """Return the listing of a directory from the index, or list it again if it has changed.
+
+        :param root: full/path/to/folder
+        :param scan: function listing the directory with all entries, returns (dirs, files) or None
+        :param is_hidden: function determining whether the os.DirEntry itself is hidden
+        :return: tuple (dirs, files) with IndexEntry objects
+        or None if the directory cannot be listed
+        """
+        try:
+            mtime = os.stat(root).st_mtime_ns
+        except OSError:
+            with self.lock:
+                self.forget(root)
+            return None
+        record = self.dirs.get(root)
+        if record is None or record[0] is None or record[0] != mtime:
+            listing = scan(root)
+            if listing is None:
+                with self.lock:
+                    self.forget(root)
+                return None
+            record = self.update(root, mtime, listing[0], listing[1], is_hidden)
+        files = [IndexEntry(root, name, size=size, hidden=hidden) for name, size, hidden in record[1]]
+        dirs = [IndexEntry(root, name, hidden=hidden, symlink=symlink, directory=True)
+                for name, hidden, symlink in record[2]]
+        return dirs, files
+
+    def update(self, root: str, mtime: int, dirs: List[os.DirEntry], files: List[os.DirEntry],
+               is_hidden: Callable[[os.DirEntry], bool]) -> list:
+        """Store a new listing of a directory.
+
+        The records of subdirectories that no longer exist are removed.
+        If the directory was modified very recently (INDEX_RACY_MTIME_NS),
+        a later change in the same clock tick would not change its modification time,
+        so the listing is stored without mtime and will be listed again on the next scan.
+        :return: the stored record [mtime_ns, files, dirs]
+        """
+        file_records = []
+        for f in files:
+            try:
+                size = f.stat().st_size
+            except OSError:
+                size = 0
+            file_records.append([f.name, size, is_hidden(f)])
+        dir_records = []
+        for d in dirs:
+            try:
+                symlink = d.is_symlink()
+            except OSError:
+                symlink = False
+            dir_records.append([d.name, is_hidden(d), symlink])
+        if int(time.time() * 10 ** 9) - mtime < INDEX_RACY_MTIME_NS:
+            mtime = None
+        record = [mtime, file_records, dir_records]
+        with self.lock:
+            old = self.dirs.get(root)
+            if old is not None:
+                removed = {name for name, hidden, symlink in old[2]} - {d.name for d in dirs}
+                for name in removed:
+                    self.forget(os.path.join(root, name))
+            self.dirs[root] = record
+            self.changed = True
+        return record
+
+    def forget(self, root: str):
+        """Remove the records of a directory and all of its subdirectories.
+
+        Must be called with self.lock acquired.
+        """
+        record = self.dirs.pop(root, None)
+        if record is None:
+            return
+        self.changed = True
+        for name, hidden, symlink in record[2]:
+            self.forget(os.path.join(root, name))
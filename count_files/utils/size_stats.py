@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+"""Size statistics of the found files, collected in constant memory.
+
+The sizes are not stored: only the number of files, the total, the maximum and the minimum
+are updated for each file. Optionally, the sizes are also counted in a histogram
+with logarithmic buckets (2**SIZE_HISTOGRAM_BITS buckets for each power of two),
+which gives the approximate quantiles (median, 90th percentile, ...).
+The histogram has at most a few hundred buckets, whatever the number of files.
+Statistics collected in worker processes are combined with def merge.
+"""
+import os
+import math
+from collections import Counter
+from typing import Optional, Union
+
+from count_files.settings import SIZE_HISTOGRAM_BITS
+
+SUB_BUCKETS = 1 << SIZE_HISTOGRAM_BITS
+
+
+def get_file_size(f: Union[str, os.PathLike]) -> int:
+    """Return the size of a found file.
+
+    For os.DirEntry objects, the stat info cached by os.scandir() is used
+    (on Windows, no system call is needed), IndexEntry objects store the size in the scan index.
+    Raises OSError if the file does not exist anymore.
+    :param f: full/path/to/file, os.DirEntry or IndexEntry object
+    :return: size in bytes
+    """
+    if isinstance(f, str):
+        return os.path.getsize(f)
+    return f.stat().st_size
+
+
+def size_bucket(size: int) -> int:
+    """Return the number of the histogram bucket for a size.
+
+    Sizes below SUB_BUCKETS have a bucket each, larger sizes share
+    SUB_BUCKETS buckets for each power of two.
+    :param size: size in bytes
+    :return: bucket number
+    """
+    if size < SUB_BUCKETS:
+        return size
+    shift = size.bit_length() - 1 - SIZE_HISTOGRAM_BITS
+    return ((shift + 1) << SIZE_HISTOGRAM_BITS) + (size >> shift) - SUB_BUCKETS
+
+
+def bucket_bounds(bucket: int) -> tuple:
+    """Return the smallest and the largest size in a histogram bucket (see def size_bucket).
+
+    :param bucket: bucket number
+    :return: tuple (lowest, highest) in bytes
+    """
+    if bucket < SUB_BUCKETS:
+        return bucket, bucket
+    shift = (bucket >> SIZE_HISTOGRAM_BITS) - 1
+    lowest = ((bucket & (SUB_BUCKETS - 1)) + SUB_BUCKETS) << shift
+    return lowest, lowest + (1 << shift) - 1
+
+
+class SizeStats(object):
+    """Running statistics of file sizes.
+
+    Usage:
+    sizes = SizeStats(quantiles=True)
+    sizes.add(1024)
+    sizes.total, sizes.max, sizes.min, sizes.average(), sizes.quantile(0.5)
+    """
+
+    def __init__(self, quantiles: bool = False):
+        """
+        :param quantiles: False(default) or True -> also count the sizes in a histogram
+        """
+        self.count = 0
+        self.total = 0
+        self.max = None
+        self.min = None
+        # histogram: Counter({bucket number: number of files}) or None
+        self.histogram = Counter() if quantiles else None
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __repr__(self) -> str:
+        return f'SizeStats(count={self.count}, total={self.total}, max={self.max}, min={self.min})'
+
+    def add(self, size: int):
+        """Add the size of one file.
+
+        :param size: size in bytes
+        """
+        self.count += 1
+        self.total += size
+        if self.max is None or size > self.max:
+            self.max = size
+        if self.min is None or size < self.min:
+            self.min = size
+        if self.histogram is not None:
+            self.histogram[size_bucket(size)] += 1
+
+    def merge(self, other: 'SizeStats') -> 'SizeStats':
+        """Add the statistics of other files (e.g. from a worker process).
+
+        :param other: SizeStats object
+        :return: self
+        """
+        if not other:
+            return self
+        self.count += other.count
+        self.total += other.total
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        if self.histogram is not None and other.histogram is not None:
+            self.histogram.update(other.histogram)
+        return self
+
+    def average(self) -> int:
+        """Return the average size in bytes, 0 if no sizes were added."""
+        return self.total // self.count if self.count else 0
+
+    def quantile(self, q: float) -> Optional[int]:
+        """Return the approximate quantile of the sizes.
+
+        The size is taken from the middle of the histogram bucket containing the quantile,
+        within the bounds of the minimum and maximum size.
+        :param q: 0.5 -> median, 0.9 -> 90th percentile, etc.
+        :return: size in bytes or None if there is no histogram or no sizes were added
+        """
+        if self.histogram is None or not self:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+            if seen >= rank:
+                lowest, highest = bucket_bounds(bucket)
+                return min(max((lowest + highest) // 2, self.min), self.max)
+        return self.max
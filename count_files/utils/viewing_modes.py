@@ -15,6 +15,16 @@ search - def show_result_for_search_files
     preview, total number of files and size info(summary)
 total - def show_result_for_total
     total number of all found file paths
+total - def show_total_summary
+    total number of files, folders and size info (summary)
+total - def show_size_quantiles
+    approximate quantiles of the file sizes (median, 90th and 99th percentiles)
+report - def show_report
+    extension table, sizes by extension, folders and totals collected in one traversal
+duplicates - def show_duplicates
+    groups of identical files, copies and wasted space by extension
+watch - def show_watch_table
+    extension table redrawn in place each time the counts change
 help extension - def show_help_columns
     table with the specified number of columns to display available help topics
     (argument or group name, sort words)
@@ -26,14 +36,23 @@ def show_start_message
 Other utilities:
 def human_mem_size
     return a human readable memory size in a string for os.path.getsize(file_path)
+def folder_line
+    return one line of the list of folders (folder path, number of files, combined size)
 """
 import os
-from typing import Iterable, List, Tuple, Dict
+import sys
+import time
+from typing import Iterable, List, Tuple, Dict, Optional
+from collections import Counter
 from textwrap import wrap
 
-from count_files.utils.file_preview import generate_preview
+from count_files.utils.file_preview import prefetch_previews
 from count_files.utils.file_handlers import group_ext_by_type
-from count_files.settings import TERM_WIDTH, DEFAULT_PREVIEW_SIZE
+from count_files.utils.size_stats import SizeStats, get_file_size
+from count_files.utils.progress import Progress
+from count_files.utils.output_writer import OutputWriter
+from count_files.utils.duplicates import duplicates_by_extension
+from count_files.settings import TERM_WIDTH, DEFAULT_PREVIEW_SIZE, SIZE_QUANTILES
 from count_files.settings import DEFAULT_EXTENSION_COL_WIDTH
 from count_files.settings import DEFAULT_FREQ_COL_WIDTH, MAX_TABLE_WIDTH
 
@@ -168,7 +187,7 @@ def show_start_message(value: [None, str], case_sensitive: bool, recursive: bool
 
 def show_2columns(data: List[tuple],
                   max_word_width: int, total_occurrences: int,
-                  term_width: int = TERM_WIDTH):
+                  term_width: int = TERM_WIDTH, lines: Dict[str, int] = None):
     """Displays a sorted table with file extensions.
 
     :param data: list with tuples
@@ -177,6 +196,8 @@ def show_2columns(data: List[tuple],
     :param max_word_width: the longest extension name
     :param total_occurrences: total number of files found
     :param term_width: the size of the terminal window
+    :param lines: optional, dict with the number of lines for each extension (--lines),
+    None(default) -> no LINES column
     :return: the processed data as text to the screen.
     """
     if not data:
@@ -185,22 +206,43 @@ def show_2columns(data: List[tuple],
 
     max_word_width = max(DEFAULT_EXTENSION_COL_WIDTH, max_word_width)
     freq_col_width = max(DEFAULT_FREQ_COL_WIDTH, len(str(total_occurrences)))
-    ext_col_width = min((term_width - freq_col_width - 5),
+    # the FREQ. column, and the LINES column with "|", 1 space before and 1 space after the number
+    right_col_width = freq_col_width
+    if lines is not None:
+        total_lines = sum(lines.values())
+        lines_col_width = max(DEFAULT_FREQ_COL_WIDTH, len(str(total_lines)))
+        right_col_width += lines_col_width + 3
+    ext_col_width = min((term_width - right_col_width - 5),
                         max_word_width,
                         MAX_TABLE_WIDTH)
 
-    # handle the extreme case when (term_width - freq_col_width - 5) becomes 0 or a negative value
+    # handle the extreme case when (term_width - right_col_width - 5) becomes 0 or a negative value
     # focus on freq and total_occurferences, long extensions are handled with textwrap wrap() below
-    if (term_width - freq_col_width - 5) <= 0:
+    if (term_width - right_col_width - 5) <= 0:
         header = '+ EXTENSION: FREQ.'
         total = f'  Found {total_occurrences} file(s).'
+        if lines is not None:
+            header = '+ EXTENSION: FREQ. (LINES)'
+            data = [(word, f'{freq} ({lines.get(word, 0)})') for word, freq in data]
+            total = f'  Found {total_occurrences} file(s), {total_lines} line(s).'
         return show_group_ext_and_freq(data=data, header=header,
                                        term_width=term_width, end_message=total)
 
-    header = f" {'EXTENSION'.ljust(ext_col_width)} | {'FREQ.'.ljust(freq_col_width)} "
+    header_freq = 'FREQ.'
+    sep_right = (freq_col_width + 2) * '-'
+    if lines is not None:
+        # the FREQ. and LINES columns are joined into one string for each row
+        data = [(word, f"{str(freq).rjust(freq_col_width)} | {str(lines.get(word, 0)).rjust(lines_col_width)}")
+                for word, freq in data]
+        header_freq = f"{'FREQ.'.ljust(freq_col_width)} | {'LINES'.ljust(lines_col_width)}"
+        total_occurrences = f"{str(total_occurrences).rjust(freq_col_width)} | " \
+                            f"{str(total_lines).rjust(lines_col_width)}"
+        sep_right += "+" + (lines_col_width + 2) * '-'
+        freq_col_width = right_col_width
+
+    header = f" {'EXTENSION'.ljust(ext_col_width)} | {header_freq.ljust(freq_col_width)} "
     sep_left = (ext_col_width + 2) * '-'
     sep_center = "+"
-    sep_right = (freq_col_width + 2) * '-'
     sep = sep_left + sep_center + sep_right
     print(header)
     print(sep)
@@ -228,14 +270,26 @@ def show_2columns(data: List[tuple],
 def show_result_for_search_files(files: Iterable[str],
                                  file_sizes: bool = False,
                                  preview: bool = False,
-                                 preview_size: int = DEFAULT_PREVIEW_SIZE) -> int:
+                                 preview_size: int = DEFAULT_PREVIEW_SIZE,
+                                 size_quantiles: bool = False, output: OutputWriter = None,
+                                 sniff: bool = False) -> int:
     """Print list of all found file paths(with sizes),
     preview, total number of files and size info(summary).
 
-    :param files: list with paths
+    The size info is collected in constant memory (utils/size_stats.py),
+    the sizes of os.DirEntry objects are taken from their stat info.
+    The list is written with the output writer (utils/output_writer.py),
+    if the list goes to a pipe, the summary is left out.
+    The previews are read ahead in a pool of threads (def prefetch_previews),
+    and printed in the order of the files.
+    :param files: list with paths or os.DirEntry objects
     :param file_sizes: True -> show size info, False -> don't show size info
     :param preview: optional, args.preview, True or False
     :param preview_size: optional, args.preview_size, number
+    :param size_quantiles: optional, True -> also show the quantiles of the file sizes
+    :param output: optional, OutputWriter object for the list,
+    None(default) -> each line is written to stdout at once
+    :param sniff: optional, args.sniff, True -> preview the files without extension with text content
     :return: len(files), print list with paths(default),
     get preview and file_sizes if specified.
 
@@ -249,56 +303,70 @@ def show_result_for_search_files(files: Iterable[str],
     Total combined size: ... KiB.
     Average file size: ... KiB (max: ... KiB, min: ... B).
     """
+    if output is None:
+        output = OutputWriter(terminal=True)
     files_amount = 0
-    sizes = []
+    sizes = SizeStats(quantiles=size_quantiles)
+    if preview:
+        files = prefetch_previews(files, max_size=preview_size, sniff=sniff)
     try:
-        for f_path in files:
+        for f in files:
+            if preview:
+                f, f_preview = f
             files_amount += 1
+            f_path = os.fspath(f)
             if file_sizes:
-                file_size = os.path.getsize(f_path)
-                sizes.append(file_size)
-                s = f'({human_mem_size(file_size)})'
-            filepath = str(f_path).strip("\r")
-            print(f'{os.path.normpath(filepath)} {s if file_sizes else ""}')
+                file_size = get_file_size(f)
+                sizes.add(file_size)
+                output.write_line(f'{f_path} ({human_mem_size(file_size)})')
+            else:
+                output.write_line(f_path)
             if preview:
-                print('–––––––––––––––––––––––––––––––––––')
-                print(generate_preview(str(f_path), max_size=preview_size))
-                print("–––––––––––––––––––––––––––––––––––\n")
+                output.write_line('–––––––––––––––––––––––––––––––––––')
+                output.write_line(f_preview)
+                output.write_line("–––––––––––––––––––––––––––––––––––\n")
     except StopIteration:
+        output.flush()
         print(f"\nNo files were found in the specified directory.\n")
         return 0
+    output.flush()
+    if output.piped:
+        return files_amount
     if files_amount == 0:
         print(f"\nNo files were found in the specified directory.\n")
         return 0
     print(f"\n   Found {files_amount} file(s).", end="\n")
     if file_sizes:
-        total_size = sum(sizes)
-        h_total_size = human_mem_size(total_size)
-        avg_size = human_mem_size(int(total_size / files_amount))
+        h_total_size = human_mem_size(sizes.total)
+        avg_size = human_mem_size(sizes.average())
 
-        h_max = human_mem_size(max(sizes))
-        h_min = human_mem_size(min(sizes))
+        h_max = human_mem_size(sizes.max)
+        h_min = human_mem_size(sizes.min)
 
         print(f"   Total combined size: {h_total_size}.")
         print(f"   Average file size: {avg_size} (max: {h_max}, min: {h_min}).",
-              end="\n\n")
+              end="\n" if size_quantiles else "\n\n")
+        show_size_quantiles(sizes)
     else:
         print("")
     return files_amount
 
 
-def show_result_for_total(files: Iterable[str], show_folders: bool = False,
-                          total_size: bool = False, no_feedback: bool = False,
-                          recursive: bool = True) -> int:
+def show_result_for_total(folders: Iterable[Tuple[str, int, Optional[SizeStats]]], show_folders: bool = False,
+                          total_size: bool = False, progress: Progress = None,
+                          recursive: bool = True, size_quantiles: bool = False,
+                          folder_sizes: bool = False) -> int:
     """Prints feedback and the total number of all files found for Parser total_group.
 
     Prints a list of folders in which the found files are located,
-    the number of found files in each folder
+    the number of found files in each folder (and their combined size, if specified)
     and the total combined size of the found files (if specified).
     When recursively counting all files(--total ..) and using the --show-folders argument,
     all folders containing files are displayed.
+    The folders are printed as soon as they are walked, the list is not kept in memory.
 
-    :param files: object <class 'generator'> with full paths to all found files
+    :param folders: object <class 'generator'> with tuples (root, files_amount, sizes)
+    from def search_folders or def search_folders_in_processes (platforms.py)
     :param show_folders: optional, args.show_folders
     True - show the list of folders in which the found files are located,
     and the number of found files in each folder,
@@ -306,17 +374,21 @@ def show_result_for_total(files: Iterable[str], show_folders: bool = False,
     :param total_size: optional, args.total_size
     True - show the total combined size of files found, average, minimum and maximum file size
     False(default) - don't show
-    :param no_feedback: optional, args.no_feedback
-    True - disable feedback
-    False(default) - prints processed file paths in one line
+    :param progress: optional, Progress object (utils/progress.py) updated by the search,
+    its line is cleaned before each folder and when the search is done,
+    None(default) - no feedback
     :param recursive: default recursive search or count if args.no_recursion is not selected
+    :param size_quantiles: optional, True -> also show the quantiles of the file sizes
+    :param folder_sizes: optional, args.folder_sizes
+    True - with show_folders and total_size, show the combined size of the found files in each folder,
+    False(default) - don't show
     :return: files amount - Found ... file(s).
     print list with folder paths if show_folders, and total combined size of files found if specified.
 
     File(s) found in the following folder(s):
     –––––––––––––––––––––––––––––––––––-----
     full/path/to/folder1 (2 files)
-    full/path/to/folder2 (1 file)
+    full/path/to/folder2 (1 file, ... KiB)
     ...
     –––––––––––––––––––––––––––––––––––-----
 
@@ -325,58 +397,203 @@ def show_result_for_total(files: Iterable[str], show_folders: bool = False,
     Average file size: ... KiB (max: ... KiB, min: ... B).
     """
     files_amount = 0
-    sizes = []
-    folders = {}
-    try:
-        for f_path in files:
-            if not no_feedback:
-                print("\r" + f_path[:TERM_WIDTH - 1].ljust(TERM_WIDTH - 1), end="")
-            files_amount += 1
-            if total_size:
-                file_size = os.path.getsize(f_path)
-                sizes.append(file_size)
-            if show_folders and recursive:
-                root, filename = str(f_path).strip("\r").rsplit(os.sep, maxsplit=1)
-                if root not in folders.keys():
-                    folders.update({root: 1})
-                else:
-                    folders[root] += 1
-            else:
-                pass
-        if not no_feedback:
-            print("\r".ljust(TERM_WIDTH))  # Clean the feedback text before proceeding.
-    except StopIteration:
-        print(f"\nNo files were found in the specified directory.\n")
-        return 0
+    # running statistics, the sizes are not stored
+    sizes = SizeStats(quantiles=size_quantiles) if total_size else None
+    list_folders = show_folders and recursive
+    show_folder_sizes = folder_sizes and total_size
+    for root, amount, sizes_in_folder in folders:
+        if list_folders:
+            if progress is not None:
+                progress.close()
+            if not files_amount:
+                print('File(s) found in the following folder(s):')
+                print('–––––––––––––––––––––––––––––––––––-----')
+            print(folder_line(root, amount, sizes_in_folder if show_folder_sizes else None))
+        files_amount += amount
+        if total_size:
+            sizes.merge(sizes_in_folder)
+    if progress is not None:
+        progress.close()
+    if list_folders and files_amount:
+        print('–––––––––––––––––––––––––––––––––––-----')
+    return show_total_summary(files_amount, sizes=sizes)
+
+
+def folder_line(folder: str, files_amount: int, sizes: SizeStats = None) -> str:
+    """Return one line of the list of folders.
+
+    Used in def show_result_for_total and def show_total_summary.
+    :param folder: full/path/to/folder
+    :param files_amount: number of files found in the folder
+    :param sizes: optional, SizeStats object (utils/size_stats.py) with the sizes of these files
+    :return: 'full/path/to/folder (2 files)' or 'full/path/to/folder (2 files, ... KiB)'
+    """
+    text = f'{files_amount} {"file" if files_amount == 1 else "files"}'
+    if sizes is not None:
+        text += f', {human_mem_size(sizes.total)}'
+    return f'{folder} ({text})'
+
+
+def show_total_summary(files_amount: int, folders: Dict[str, int] = None,
+                       sizes: SizeStats = None) -> int:
+    """Prints the total number of files found, the folders and the size info.
+
+    Used in def show_result_for_total and def show_report.
+    :param files_amount: number of files found
+    :param folders: optional, dict with items like {'full/path/to/folder': files_amount},
+    None(default) - don't show the list of folders
+    :param sizes: optional, SizeStats object (utils/size_stats.py),
+    None(default) - don't show the size info
+    :return: files amount
+    """
     if files_amount == 0:
         print(f"\nNo files were found in the specified directory.\n")
         return 0
-    if show_folders:
-        if recursive:
-            print('File(s) found in the following folder(s):')
-            print('–––––––––––––––––––––––––––––––––––-----')
-            for folder, f in folders.items():
-                print(f'{folder} ({f} {"file" if f == 1 else "files"})')
-            print('–––––––––––––––––––––––––––––––––––-----')
-        else:
-            pass  # count/search in one folder
+    if folders is not None:
+        print('File(s) found in the following folder(s):')
+        print('–––––––––––––––––––––––––––––––––––-----')
+        for folder, f in folders.items():
+            print(folder_line(folder, f))
+        print('–––––––––––––––––––––––––––––––––––-----')
     print(f"\n   Found {files_amount} file(s).", end="\n")
-    if total_size:
-        total_fsize = sum(sizes)
-        h_total_size = human_mem_size(total_fsize)
-        avg_size = human_mem_size(int(total_fsize / files_amount))
+    if sizes:
+        h_total_size = human_mem_size(sizes.total)
+        avg_size = human_mem_size(sizes.average())
 
-        h_max = human_mem_size(max(sizes))
-        h_min = human_mem_size(min(sizes))
+        h_max = human_mem_size(sizes.max)
+        h_min = human_mem_size(sizes.min)
 
         print(f"   Total combined size of files found: {h_total_size}.")
         print(f"   Average file size: {avg_size} (max: {h_max}, min: {h_min}).",
-              end="\n\n")
+              end="\n" if sizes.histogram is not None else "\n\n")
+        show_size_quantiles(sizes)
     else:
         print("")
     return files_amount
 
 
+def show_size_quantiles(sizes: SizeStats):
+    """Prints the approximate quantiles of the file sizes (SIZE_QUANTILES in settings.py).
+
+    Used in def show_result_for_search_files and def show_total_summary.
+    Nothing is printed if the sizes were collected without the histogram.
+    :param sizes: SizeStats object (utils/size_stats.py)
+    :return:
+    """
+    if sizes.histogram is None or not sizes:
+        return
+    quantiles = ', '.join(f'{q:.0%}: {human_mem_size(sizes.quantile(q))}' for q in SIZE_QUANTILES)
+    print(f"   File size quantiles: {quantiles}.", end="\n\n")
+
+
+def show_report(report: dict, sort_alpha: bool = False, group: bool = False,
+                ext_and_group: Dict[str, str] = None, term_width: int = TERM_WIDTH) -> int:
+    """Displays the combined report collected in one traversal.
+
+    Table with file extensions (or extensions grouped by type),
+    the combined size of the files for each extension,
+    the list of folders (if collected), the total number of files and size info.
+    :param report: dict from def collect_report (platforms.py)
+    :param sort_alpha: True -> sort extensions alphabetically, False(default) -> by frequency
+    :param group: True -> group extensions by type, False(default) -> table
+    :param ext_and_group: dict with items like {'png': 'image', 'txt': documents, ...}, used with group
+    :param term_width: the size of the terminal window
+    :return: files amount
+    """
+    extensions = report['extensions']
+    if not extensions:
+        print(f"\nNo files were found in the specified directory.\n")
+        return 0
+    if sort_alpha:
+        # sort extensions alphabetically, with uppercase versions on top
+        data = sorted(extensions.items(), key=lambda item: (item[0].casefold(), item[0]))
+    else:
+        data = extensions.most_common()
+    if group:
+        show_ext_grouped_by_type(data=data, ext_and_group=ext_and_group, term_width=term_width)
+        print()
+    else:
+        show_2columns(data, max(map(len, extensions.keys())), report['files'], term_width=term_width)
+    size_data = [(ext, human_mem_size(report['ext_sizes'][ext])) for ext, freq in data]
+    show_group_ext_and_freq(size_data, header='+ EXTENSION: COMBINED SIZE', term_width=term_width)
+    print()
+    return show_total_summary(report['files'], folders=report['folders'] or None, sizes=report['sizes'])
+
+
+def show_duplicates(groups: List[Tuple[int, List[str]]], case_sensitive: bool = False,
+                    sort_alpha: bool = False, term_width: int = TERM_WIDTH) -> int:
+    """Displays the groups of duplicate files, the copies by extension and the wasted space.
+
+    :param groups: list with tuples (size, paths) from def find_duplicates (platforms.py)
+    :param case_sensitive: False(default) -> ignore case in extensions, True -> distinguish case variations
+    :param sort_alpha: True -> sort extensions alphabetically, False(default) -> by wasted space
+    :param term_width: the size of the terminal window
+    :return: number of copies (duplicate files, not counting the first file of each group)
+
+    Duplicate files (largest wasted space first):
+    –––––––––––––––––––––––––––––––––––-----
+    ... KiB x 2 files:
+       full/path/to/file1.extension
+       full/path/to/copy/of/file1.extension
+    ...
+    –––––––––––––––––––––––––––––––––––-----
+    + EXTENSION: COPIES (WASTED SPACE)
+       TXT: 1 (... KiB)
+
+       Found ... duplicate file(s) in ... group(s).
+       Wasted space: ... KiB.
+    """
+    if not groups:
+        print(f"\nNo duplicate files were found in the specified directory.\n")
+        return 0
+    print('Duplicate files (largest wasted space first):')
+    print('–––––––––––––––––––––––––––––––––––-----')
+    for size, paths in groups:
+        print(f'{human_mem_size(size)} x {len(paths)} files:')
+        for path in paths:
+            print(f'   {path}')
+    print('–––––––––––––––––––––––––––––––––––-----')
+    copies, wasted = duplicates_by_extension(groups, case_sensitive=case_sensitive)
+    if sort_alpha:
+        # sort extensions alphabetically, with uppercase versions on top
+        extensions = sorted(copies, key=lambda ext: (ext.casefold(), ext))
+    else:
+        extensions = [ext for ext, size in wasted.most_common()]
+    data = [(ext, f'{copies[ext]} ({human_mem_size(wasted[ext])})') for ext in extensions]
+    show_group_ext_and_freq(data, header='+ EXTENSION: COPIES (WASTED SPACE)', term_width=term_width)
+    copies_amount = sum(copies.values())
+    print(f"\n   Found {copies_amount} duplicate file(s) in {len(groups)} group(s).")
+    print(f"   Wasted space: {human_mem_size(sum(wasted.values()))}.", end="\n\n")
+    return copies_amount
+
+
+def show_watch_table(data: Counter, sort_alpha: bool = False, term_width: int = TERM_WIDTH) -> int:
+    """Displays the current table with file extensions in the watch mode.
+
+    If the output is a terminal, the screen is cleared before each table,
+    so the table is redrawn in place. Otherwise the tables are appended one after another.
+    :param data: Counter() from def watch_files_by_extension (platforms.py)
+    :param sort_alpha: True -> sort extensions alphabetically, False(default) -> by frequency
+    :param term_width: the size of the terminal window
+    :return: files amount
+    """
+    if sys.stdout.isatty():
+        print('\033[H\033[J', end='')
+    print(f"Updated at {time.strftime('%H:%M:%S')}. Press Ctrl+C to stop watching.\n")
+    if not data:
+        print("No files were found in the specified directory.\n", flush=True)
+        return 0
+    if sort_alpha:
+        # sort extensions alphabetically, with uppercase versions on top
+        sorted_data = sorted(data.items(), key=lambda item: (item[0].casefold(), item[0]))
+    else:
+        sorted_data = data.most_common()
+    total_occurrences = sum(data.values())
+    show_2columns(sorted_data, max(map(len, data.keys())), total_occurrences, term_width=term_width)
+    sys.stdout.flush()
+    return total_occurrences
+
+
 def show_help_columns(column_version: List[str], list_version: List[str],
                       num_columns: int = 2, term_width: int = TERM_WIDTH) -> str:
     """Displays a table with the specified number of columns.
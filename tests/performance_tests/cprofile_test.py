@@ -18,6 +18,7 @@ import os
 import sys
 
 from count_files.utils.viewing_modes import show_result_for_search_files, show_2columns, show_result_for_total
+from count_files.utils.progress import Progress
 from count_files.__main__ import main_flow
 from count_files.platforms import get_current_os
 
@@ -52,11 +53,12 @@ if __name__ == "__main__":
                  "file_sizes=False, preview=False)",
                  sort='name')"""
 
-    # generator and get total files, return list, feedback - file paths
-    """cProfile.run("data = current_os.search_files(dirpath=location, extension='..', "
-                 "recursive=True, include_hidden=True, case_sensitive=False);"
-                 "len_files = show_result_for_total(files=data, "
-                 "no_feedback=False)",
+    # generator and get total files, return list, feedback - progress line
+    """cProfile.run("progress = Progress();"
+                 "data = current_os.search_folders(dirpath=location, extension='..', "
+                 "recursive=True, include_hidden=True, case_sensitive=False, progress=progress);"
+                 "len_files = show_result_for_total(folders=data, "
+                 "progress=progress)",
                  sort='name')"""
 
     # count
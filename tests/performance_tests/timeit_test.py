@@ -52,10 +52,10 @@ show_2columns(data, max_word_width, total_occurrences)
 """
 
 total_and_extension = """
-data = current_os.search_files(dirpath=location, extension='..',
-recursive=True, include_hidden=False, case_sensitive=False)
-len_files = show_result_for_total(files=data, show_folders=True, 
-total_size=True, no_feedback=False, recursive=True)
+data = current_os.search_folders(dirpath=location, extension='..',
+recursive=True, include_hidden=False, case_sensitive=False, total_size=True)
+len_files = show_result_for_total(folders=data, show_folders=True, 
+total_size=True, recursive=True)
 """
 
 search_by_pattern = """
@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
 import unittest
 import os
+import tempfile
+import json
+import csv
+import io
+import sys
+from unittest import mock
+from contextlib import redirect_stdout
 
 from count_files.__main__ import main_flow
+from count_files.utils.content_search import filter_by_content
 from count_files.platforms import get_current_os
 
 
@@ -66,6 +74,335 @@ class TestArgumentParser(unittest.TestCase):
             with self.subTest(k=k, v=v):
                 self.assertEqual(main_flow([location, '-fe', f'{k}', '-p', '-ps', '5']), v)
 
+    def test_countfiles_workers(self):
+        """Testing def main_flow.
+
+        Equivalent to
+        "count-files ~/.../tests/data_for_tests -w 4 -t .."
+        and "count-files ~/.../tests/data_for_tests -w 4 -ord -fe py"
+        Expected behavior: the same results as with a single worker.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        self.assertEqual(main_flow([location, '-w', '4', '-t', '..']), 16)
+        self.assertEqual(main_flow([location, '-w', '4', '-ord', '-fe', 'py']), 2)
+        self.assertEqual(main_flow([location, '-w', '4', '-fm', '*.md']), 2)
+        self.assertEqual(main_flow([location, '-w', '4', '-fm', '*.md', '-fm', '*.py']), 4)
+        self.assertEqual(main_flow([location, '-w', '4', '-fm', '**/*.md']), 2)
+
+    def test_countfiles_exclude(self):
+        """Testing def main_flow.
+
+        Equivalent to
+        "count-files ~/.../tests/data_for_tests -t .. -ex '*.md'"
+        Expected behavior: the excluded files and folders are not counted,
+        exit with an error if a pattern is not valid.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        all_files = main_flow([location, '-t', '..'])
+        md_files = main_flow([location, '-t', 'md'])
+        self.assertEqual(main_flow([location, '-t', '..', '-ex', '*.md']), all_files - md_files)
+        self.assertEqual(main_flow([location, '-fe', 'md', '-ex', '*.md']), 0)
+        self.assertEqual(main_flow([location, '-t', '..', '-ex', '*', '-pr', '2']), 0)
+        with self.assertRaises(SystemExit) as cm:
+            main_flow([location, '-t', '..', '-ex', '[z-a]'])
+        self.assertEqual(cm.exception.code, 1)
+
+    def test_countfiles_max_depth(self):
+        """Testing def main_flow.
+
+        Equivalent to
+        "count-files ~/.../tests/data_for_tests -t .. -md 1"
+        Expected behavior: the same result as with --no-recursion.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        self.assertEqual(main_flow([location, '-t', '..', '-md', '1']), main_flow([location, '-t', '..', '-nr']))
+        self.assertEqual(main_flow([location, '-fe', '..', '-md', '1']), main_flow([location, '-fe', '..', '-nr']))
+        self.assertEqual(main_flow([location, '-t', '..', '-md', '2', '-pr', '2']),
+                         main_flow([location, '-t', '..', '-md', '2']))
+
+    def test_countfiles_one_file_system(self):
+        """Testing def main_flow.
+
+        Equivalent to
+        "count-files ~/.../tests/data_for_tests -t .. -ofs"
+        "count-files ~/.../tests/data_for_tests -t .. -fsl -pr 2"
+        Expected behavior: the same total, there are no mount points or symbolic links in the folder.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        self.assertEqual(main_flow([location, '-t', '..', '-ofs']), main_flow([location, '-t', '..']))
+        self.assertEqual(main_flow([location, '-t', '..', '-fsl', '-pr', '2']), main_flow([location, '-t', '..']))
+        self.assertEqual(main_flow([location, '-fe', '..', '-ofs', '-fsl']), main_flow([location, '-fe', '..']))
+
+    def test_countfiles_limit(self):
+        """Testing def main_flow.
+
+        Equivalent to
+        "count-files ~/.../tests/data_for_tests -fe .. -lim 3"
+        "count-files ~/.../tests/data_for_tests -fe txt -exs"
+        Expected behavior: the search is stopped after 3 files (reported only if there are more files),
+        --exists returns the exit status 0 if there is a matching file and 1 if there is none.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        self.assertEqual(main_flow([location, '-fe', '..', '-lim', '3']), 3)
+        self.assertEqual(main_flow([location, '-fm', '*.gz', '-lim', '100']), 3)
+        for args, stopped in (([location, '-fe', 'gz', '-lim', '3'], False), ([location, '-fe', 'gz', '-lim', '2'], True),
+                              ([location, '-fm', '*.gz', '-lim', '3'], False)):
+            with self.subTest(args=args):
+                # the messages are shown on a terminal only
+                with redirect_stdout(mock.Mock(wraps=io.StringIO(), isatty=lambda: True)) as stdout:
+                    main_flow(args)
+                self.assertEqual('The search was stopped' in stdout.getvalue(), stopped)
+        for args, status in (([location, '-fe', 'gz', '-exs'], 0),
+                             ([location, '-fm', '*.gz', '-exs'], 0),
+                             ([location, '-fe', 'not_exists', '-exs'], 1),
+                             ([location, '-fm', 'not_exists*', '-exs'], 1)):
+            with self.subTest(args=args):
+                with self.assertRaises(SystemExit) as cm:
+                    main_flow(args)
+                self.assertEqual(cm.exception.code, status)
+
+    def test_countfiles_output(self):
+        """Testing def main_flow.
+
+        Equivalent to
+        "count-files ~/.../tests/data_for_tests -fe py -o FILE"
+        Expected behavior: the output file contains only the list of found files,
+        --output is not available without a list of found files.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'output.txt')
+            self.assertEqual(main_flow([location, '-fe', 'py', '-o', filename]), 2)
+            with open(filename, encoding='utf-8') as f:
+                self.assertEqual(sorted(f.read().splitlines()),
+                                 sorted(get_current_os().search_files(location, extension='py')))
+            self.assertEqual(main_flow([location, '-fm', '*.gz', '-o', filename]), 3)
+            with open(filename, encoding='utf-8') as f:
+                self.assertEqual(len(f.read().splitlines()), 3)
+            for args in ([location, '-t', '..', '-o', filename], [location, '-fe', 'py', '-exs', '-o', filename]):
+                with self.subTest(args=args):
+                    with self.assertRaises(SystemExit) as cm:
+                        main_flow(args)
+                    self.assertEqual(cm.exception.code, 1)
+
+    def test_countfiles_format(self):
+        """Testing def main_flow.
+
+        Equivalent to
+        "count-files ~/.../tests/data_for_tests -fe .. -fmt ndjson -o FILE"
+        "count-files ~/.../tests/data_for_tests -t .. -fmt csv -o FILE"
+        "count-files ~/.../tests/data_for_tests -rep -fmt json -o FILE"
+        Expected behavior: one record for each found file, folder or extension.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'output')
+            self.assertEqual(main_flow([location, '-fe', '..', '-fs', '-fmt', 'ndjson', '-o', filename]), 16)
+            with open(filename, encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual(len(records), 16)
+            self.assertEqual({record['folder'] for record in records},
+                             {os.path.dirname(record['path']) for record in records})
+            self.assertEqual(sum(record['size'] for record in records),
+                             sum(os.path.getsize(record['path']) for record in records))
+            self.assertEqual(main_flow([location, '-t', '..', '-fmt', 'csv', '-pr', '2', '-o', filename]), 16)
+            with open(filename, encoding='utf-8', newline='') as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(sum(int(row['count']) for row in rows), 16)
+            self.assertEqual(main_flow([location, '-rep', '-fmt', 'json', '-o', filename]), 16)
+            with open(filename, encoding='utf-8') as f:
+                records = json.load(f)
+            self.assertEqual({record['extension']: record['count'] for record in records},
+                             get_current_os().count_files_by_extension(location, no_feedback=True))
+            with self.assertRaises(SystemExit) as cm:
+                main_flow([location, '-wa', '-fmt', 'json'])
+            self.assertEqual(cm.exception.code, 1)
+
+    def test_countfiles_null_and_from_stdin(self):
+        """Testing def main_flow.
+
+        Equivalent to
+        "count-files ~/.../tests/data_for_tests -fe .. -0 -o FILE"
+        "find ~/.../tests/data_for_tests -type f -print0 | count-files --from-stdin -t .."
+        Expected behavior: NUL-terminated paths without the summary,
+        the files from the list of paths are counted as in the walk.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'output')
+            self.assertEqual(main_flow([location, '-fe', '..', '-0', '-o', filename]), 16)
+            with open(filename, encoding='utf-8') as f:
+                text = f.read()
+        self.assertTrue(text.endswith('\0'))
+        paths = text.split('\0')[:-1]
+        self.assertEqual(len(paths), 16)
+        self.assertTrue(all(os.path.isfile(path) for path in paths))
+        stdin = mock.Mock(buffer=io.BytesIO('\0'.join(paths).encode('utf-8', 'surrogateescape')))
+        with mock.patch.object(sys, 'stdin', stdin):
+            self.assertEqual(main_flow(['--from-stdin', '-t', '..', '-ts', '-sf']), 16)
+        stdin = mock.Mock(buffer=io.BytesIO('\n'.join(paths[:3]).encode('utf-8', 'surrogateescape')))
+        with mock.patch.object(sys, 'stdin', stdin):
+            self.assertEqual(main_flow(['--from-stdin', '-rep', '-nf']), 3)
+        for args in (['--from-stdin', '-fe', 'py'], ['--from-stdin', '-wa'], ['-t', '..', '-0'],
+                     [location, '-fe', 'py', '-0', '-fs'], ['--from-stdin', '-ex', '*.py'],
+                     ['--from-stdin', '-gi'], ['--from-stdin', '-md', '1'], ['--from-stdin', '-fsl']):
+            with self.subTest(args=args):
+                with self.assertRaises(SystemExit) as cm:
+                    main_flow(args)
+                self.assertEqual(cm.exception.code, 1)
+
+    def test_countfiles_sniff(self):
+        """Testing def main_flow.
+
+        Equivalent to
+        "count-files ~/.../tests/data_for_tests --sniff -g -fmt json -o FILE"
+        "count-files ~/.../tests/data_for_tests -fe . --preview --sniff"
+        Expected behavior: the file without extension is counted as text
+        (the empty one is still counted as [no extension]), the preview of files without extension.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'output')
+            with self.assertRaises(SystemExit) as cm:
+                main_flow([location, '--sniff', '-g', '-fmt', 'json', '-o', filename])
+            self.assertEqual(cm.exception.code, 0)
+            with open(filename, encoding='utf-8') as f:
+                records = {record['extension']: record for record in json.load(f)}
+        self.assertEqual(sum(record['count'] for record in records.values()), 16)
+        self.assertEqual(records['[TEXT]']['group'], 'documents')
+        self.assertEqual(records['[TEXT]']['count'], 1)
+        self.assertEqual(records['[no extension]']['count'], 1)
+        self.assertEqual(main_flow([location, '-fe', '.', '--preview', '--sniff']), 2)
+        for args in ([location, '-fe', '.', '--preview'], [location, '-t', '..', '--sniff'],
+                     [location, '-fe', '.', '--sniff'], [location, '-fm', '*', '--sniff']):
+            with self.subTest(args=args):
+                with self.assertRaises(SystemExit) as cm:
+                    main_flow(args)
+                self.assertEqual(cm.exception.code, 1)
+
+    def test_countfiles_contains(self):
+        """Testing def main_flow.
+
+        Equivalent to
+        "count-files ~/.../tests/data_for_tests -fe py --contains "python3"
+        "count-files ~/.../tests/data_for_tests -fm *.* --contains "^#!" --regex --exists"
+        Expected behavior: only the files with matching content are listed,
+        the content search is stopped with the walk by --exists or --limit.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        py_files = main_flow([location, '-fe', 'py'])
+        self.assertEqual(main_flow([location, '-fe', 'py', '--contains', 'python3']), py_files)
+        self.assertEqual(main_flow([location, '-fe', '..', '--contains', 'PYTHON3', '-c']), 0)
+        self.assertEqual(main_flow([location, '-fe', 'py', '--contains', 'no such text in the files']), 0)
+        with self.assertRaises(SystemExit) as cm:
+            main_flow([location, '-fm', '*.*', '--contains', '^#!', '--regex', '--exists'])
+        self.assertEqual(cm.exception.code, 0)
+        for args in ([location, '-fe', '..', '--contains', 'x', '--exists'],
+                     [location, '-fm', '*', '--contains', 'x', '-lim', '1']):
+            with self.subTest(args=args):
+                searches = []
+                with mock.patch('count_files.__main__.filter_by_content',
+                                side_effect=lambda *a: searches.append(filter_by_content(*a)) or searches[-1]):
+                    try:
+                        main_flow(args)
+                    except SystemExit:
+                        pass
+                # the generator is closed, so the searches started ahead are cancelled
+                self.assertIsNone(searches[0].gi_frame)
+        for args in ([location, '-t', '..', '--contains', 'import'], [location, '-fe', 'py', '--regex'],
+                     [location, '-fe', 'py', '--contains', '(', '--regex']):
+            with self.subTest(args=args):
+                with self.assertRaises(SystemExit) as cm:
+                    main_flow(args)
+                self.assertEqual(cm.exception.code, 1)
+
+    def test_countfiles_duplicates(self):
+        """Testing def main_flow.
+
+        Equivalent to
+        "count-files ~/.../tests/data_for_tests --duplicates"
+        "count-files ~/.../tests/data_for_tests --duplicates -fmt ndjson -o FILE"
+        Expected behavior: the number of copies, one record for each file of each group.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        copies = main_flow([location, '--duplicates', '-nf'])
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'output')
+            self.assertEqual(main_flow([location, '--duplicates', '-fmt', 'ndjson', '-o', filename]), copies)
+            with open(filename, encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual(len(records) - len({record['group'] for record in records}), copies)
+        with self.assertRaises(SystemExit) as cm:
+            main_flow([location, '--duplicates', '-t', '..'])
+        self.assertEqual(cm.exception.code, 1)
+
+    def test_countfiles_lines(self):
+        """Testing def main_flow.
+
+        Equivalent to
+        "count-files ~/.../tests/data_for_tests --lines -fmt json -o FILE"
+        "count-files ~/.../tests/data_for_tests --lines --skip-binary"
+        Expected behavior: the number of lines for each extension, the same number of files.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'output')
+            with self.assertRaises(SystemExit) as cm:
+                main_flow([location, '--lines', '-fmt', 'json', '-o', filename])
+            self.assertEqual(cm.exception.code, 0)
+            with open(filename, encoding='utf-8') as f:
+                records = {record['extension']: record for record in json.load(f)}
+        self.assertEqual(sum(record['count'] for record in records.values()), 16)
+        with open(os.path.join(location, 'py_file_for_tests.py'), 'rb') as f:
+            self.assertTrue(records['PY']['lines'] >= f.read().count(b'\n'))
+        for args, code in (([location, '--lines', '--skip-binary', '-nf'], 0), ([location, '--lines', '-g'], 1),
+                           ([location, '--skip-binary'], 1), ([location, '--lines', '-pr', '2'], 1)):
+            with self.subTest(args=args):
+                with self.assertRaises(SystemExit) as cm:
+                    main_flow(args)
+                self.assertEqual(cm.exception.code, code)
+
+    def test_countfiles_processes(self):
+        """Testing def main_flow.
+
+        Equivalent to
+        "count-files ~/.../tests/data_for_tests -pr 2 -t .. -ts -sf"
+        Expected behavior: the same total as in a single process.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        self.assertEqual(main_flow([location, '-pr', '2', '-t', '..', '-ts', '-sf']), 16)
+        self.assertEqual(main_flow([location, '-pr', '2', '-t', '..', '-ts', '-sq']), 16)
+        self.assertEqual(main_flow([location, '-t', '..', '-ts', '-sq']), 16)
+        self.assertEqual(main_flow([location, '-pr', '2', '-t', '..', '-ts', '-sf', '-fsz']), 16)
+        self.assertEqual(main_flow([location, '-fe', '..', '-fs', '-sq', '-nr']),
+                         main_flow([location, '-fe', '..', '-nr']))
+        self.assertEqual(main_flow([location, '-pr', '2', '-t', 'gz']), 3)
+
+    def test_countfiles_report(self):
+        """Testing def main_flow.
+
+        Equivalent to
+        "count-files ~/.../tests/data_for_tests -rep -sf -nf"
+        Expected behavior: the total number of files found in one traversal.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        self.assertEqual(main_flow([location, '-rep', '-sf', '-nf']), 16)
+        self.assertEqual(main_flow([location, '-rep', '-g', '-alpha', '-nr', '-nf']), 6)
+
     # tests for hidden files: Windows, Linux, Mac OS, iOS, Haiku; skip: BaseOS
     def test_for_hidden(self):
         """Testing def main_flow.
@@ -108,6 +445,12 @@ class TestArgumentParser(unittest.TestCase):
         1-2-3)The path does not exist, or there may be a typo in it.
         4)Preview for an unsupported file type(no extension).
         5)Preview for an unsupported file type(not in SUPPORTED_TYPES).
+        6-7)The number of workers or processes is not a positive integer.
+        8)The exclude file cannot be read.
+        9)The maximum depth is not a positive integer.
+        10-11)The limit is not a positive integer or used without -fe or -fm.
+        12)Following symbolic links in the watch mode.
+        13)Size quantiles without the size info.
         :return:
         """
         args_dict = {(self.get_locations('not_exists'),): 1,
@@ -115,7 +458,24 @@ class TestArgumentParser(unittest.TestCase):
                      (self.get_locations('not_exists'), '-fe', '..'): 1,
                      # -fe used, no preview to count and -t
                      (self.get_locations('data_for_tests'), '-fe', '.', '-p'): 1,
-                     (self.get_locations('data_for_tests'), '-fe', 'woff', '-p'): 1}
+                     (self.get_locations('data_for_tests'), '-fe', 'woff', '-p'): 1,
+                     # the number of workers must be positive
+                     (self.get_locations('data_for_tests'), '-w', '0'): 1,
+                     (self.get_locations('data_for_tests'), '-pr', '0'): 1,
+                     (self.get_locations('data_for_tests'), '-rep', '-pr', '2'): 1,
+                     (self.get_locations('data_for_tests'), '-wa', '-pr', '2'): 1,
+                     (self.get_locations('data_for_tests'), '-wa', '-ix'): 1,
+                     (self.get_locations('data_for_tests'), '-wa', '-w', '4'): 1,
+                     (self.get_locations('data_for_tests'), '-t', '..', '-ix', '-pr', '2'): 1,
+                     (self.get_locations('data_for_tests'), '-dup', '-pr', '2'): 1,
+                     (self.get_locations('data_for_tests'), '-fe', 'py', '-pr', '2'): 1,
+                     (self.get_locations('data_for_tests'), '-exf', self.get_locations('not_exists')): 1,
+                     (self.get_locations('data_for_tests'), '-md', '0'): 1,
+                     (self.get_locations('data_for_tests'), '-fe', '..', '-lim', '0'): 1,
+                     (self.get_locations('data_for_tests'), '-t', '..', '-lim', '3'): 1,
+                     (self.get_locations('data_for_tests'), '-wa', '-fsl'): 1,
+                     (self.get_locations('data_for_tests'), '-t', '..', '-sq'): 1,
+                     (self.get_locations('data_for_tests'), '-t', '..', '-sf', '-fsz'): 1}
         for k, v in args_dict.items():
             with self.subTest(k=k, v=v):
                 try:
@@ -2,11 +2,28 @@
 import unittest
 import os
 import sys
+import shutil
+import tempfile
+import io
+import csv
+import json
 from collections import Counter
+from unittest import mock
 
-from count_files.utils.file_handlers import get_file_extension, group_ext_by_type
+from count_files.utils.file_handlers import get_file_extension, group_ext_by_type, count_extensions
 from count_files.platforms import get_current_os
-from count_files.utils.file_preview import generate_preview, generic_text_preview
+from count_files.utils.file_preview import generate_preview, generic_text_preview, prefetch_previews
+from count_files.utils.scan_index import ScanIndex
+from count_files.utils.exclude_rules import ExcludeRules
+from count_files.utils.size_stats import SizeStats, size_bucket, bucket_bounds
+from count_files.utils.progress import Progress, format_duration
+from count_files.utils.output_writer import OutputWriter
+from count_files.utils.record_formats import RecordWriter
+from count_files.utils.path_list import read_paths, group_paths
+from count_files.utils.file_sniffing import sniff_header, sniff_file, FileSniffer
+from count_files.utils.content_search import compile_content_pattern, file_contains, filter_by_content
+from count_files.utils.duplicates import partial_hash, full_hash, duplicates_by_extension
+from count_files.utils.line_counts import count_lines
 
 
 current_os = get_current_os()
@@ -35,6 +52,556 @@ class TestSomeFunctions(unittest.TestCase):
             with self.subTest(k=k, v=v):
                 self.assertEqual(get_file_extension(k, case_sensitive=True), v)
 
+    def test_count_extensions(self):
+        """Testing def count_extensions.
+
+        Expected behavior: the same extensions as def get_file_extension,
+        files without extension are counted as '[no extension]'.
+        :return:
+        """
+        names = ['file.py', '.gitignore', 'image.JPG', 'image.jpg', 'file', '..txt', 'file.',
+                 '.hidden.file.txt', 'select2.3805311d5fc1.css.gz']
+        self.assertEqual(count_extensions(names),
+                         Counter({'[no extension]': 4, 'JPG': 2, 'PY': 1, 'TXT': 1, 'GZ': 1}))
+        self.assertEqual(count_extensions(names, case_sensitive=True),
+                         Counter({'[no extension]': 4, 'JPG': 1, 'jpg': 1, 'py': 1, 'txt': 1, 'gz': 1}))
+
+    def test_walk(self):
+        """Testing def walk.
+
+        Expected behavior: the same roots, subdirectories and files as os.walk,
+        in the same order, with regular files only.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        expected = [(root, dirs, sorted(files)) for root, dirs, files in os.walk(location)]
+        result = [(root, [d.name for d in dirs], sorted(f.name for f in files))
+                  for root, dirs, files in current_os.walk(location)]
+        self.assertEqual(result, expected)
+        non_recursive = list(current_os.walk(location, recursive=False))
+        self.assertEqual(len(non_recursive), 1)
+        self.assertEqual(non_recursive[0][0], location)
+        self.assertEqual(list(current_os.walk(self.get_locations('not_exists'))), [])
+
+    def test_walk_workers(self):
+        """Testing def walk, workers and ordered params.
+
+        Expected behavior: the same directories and files as a single-threaded walk,
+        in the same order if ordered=True.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+
+        def listing(**kwargs):
+            return [(root, [d.name for d in dirs], [f.name for f in files])
+                    for root, dirs, files in current_os.walk(location, **kwargs)]
+
+        expected = listing()
+        self.assertEqual(sorted(listing(workers=4)), sorted(expected))
+        self.assertEqual(listing(workers=4, ordered=True), expected)
+        # early exit from the generator stops the threads
+        walker = current_os.walk(location, workers=4)
+        self.assertEqual(next(walker)[0], location)
+        walker.close()
+        counter = current_os.count_files_by_extension(location, no_feedback=True, workers=4)
+        self.assertEqual(counter, current_os.count_files_by_extension(location, no_feedback=True))
+
+    def test_walk_workers_error(self):
+        """Testing def walk_parallel and def walk_ordered, an exception raised while listing a folder.
+
+        Expected behavior: the exception is re-raised in the caller, the walk does not hang.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+
+        def scan(root):
+            if root != location:
+                raise ValueError(root)
+            return current_os.scan_dir(root)
+
+        for walker in (current_os.walk_parallel, current_os.walk_ordered):
+            with self.subTest(walker=walker.__name__):
+                with self.assertRaises(ValueError):
+                    list(walker(location, scan, workers=4))
+
+    def test_walk_max_depth(self):
+        """Testing def walk, def count_files_by_extension and def search_folders_in_processes, max_depth param.
+
+        Expected behavior: the folders deeper than max_depth levels are not listed,
+        with any number of workers or processes.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        depth_of = lambda root: 1 if root == location else os.path.relpath(root, location).count(os.sep) + 2
+        all_roots = [root for root, dirs, files in current_os.walk(location)]
+        for max_depth in (1, 2, 3):
+            with self.subTest(max_depth=max_depth):
+                expected = [root for root in all_roots if depth_of(root) <= max_depth]
+                self.assertEqual([root for root, dirs, files in current_os.walk(location, max_depth=max_depth)],
+                                 expected)
+                self.assertEqual(sorted(root for root, dirs, files in current_os.walk(location, workers=4,
+                                                                                       max_depth=max_depth)),
+                                 sorted(expected))
+                self.assertEqual([root for root, dirs, files in current_os.walk(location, workers=4, ordered=True,
+                                                                                max_depth=max_depth)],
+                                 expected)
+                counters = current_os.count_files_by_extension(location, no_feedback=True, max_depth=max_depth)
+                self.assertEqual(current_os.count_files_by_extension(location, no_feedback=True, processes=2,
+                                                                     max_depth=max_depth), counters)
+                records = current_os.search_folders_in_processes(location, extension='..', processes=2,
+                                                                 max_depth=max_depth)
+                self.assertEqual(sum(amount for root, amount, sizes in records), sum(counters.values()))
+        listing = lambda **kwargs: [(root, [d.name for d in dirs], [f.name for f in files])
+                                    for root, dirs, files in current_os.walk(location, **kwargs)]
+        self.assertEqual(listing(max_depth=1), listing(recursive=False))
+
+    @unittest.skipIf(sys.platform.startswith('win'), 'symbolic links need privileges on Windows')
+    def test_walk_symlinks(self):
+        """Testing def walk, follow_symlinks and one_file_system params.
+
+        Expected behavior: symbolic links to folders are not followed by default,
+        with follow_symlinks each folder is listed once, even with a symlink loop,
+        folders on other devices are skipped with one_file_system.
+        :return:
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, 'a', 'b'))
+            open(os.path.join(tmp, 'a', 'b', 'file.txt'), 'w').close()
+            os.symlink(tmp, os.path.join(tmp, 'a', 'b', 'loop'))
+            os.symlink(os.path.join(tmp, 'a'), os.path.join(tmp, 'link_to_a'))
+            roots = lambda **kwargs: sorted(root for root, dirs, files in current_os.walk(tmp, **kwargs))
+            self.assertEqual(roots(), [tmp, os.path.join(tmp, 'a'), os.path.join(tmp, 'a', 'b')])
+            for workers, ordered in ((1, False), (4, False), (4, True)):
+                with self.subTest(workers=workers, ordered=ordered):
+                    # a and link_to_a are the same folder, it is listed once under one of the paths
+                    followed = roots(follow_symlinks=True, workers=workers, ordered=ordered)
+                    self.assertEqual(len(followed), 3)
+                    self.assertEqual(sorted(os.path.realpath(root) for root in followed),
+                                     sorted(os.path.realpath(root) for root in roots()))
+            self.assertEqual(sum(current_os.count_files_by_extension(tmp, no_feedback=True, processes=2,
+                                                                     follow_symlinks=True).values()), 1)
+            self.assertEqual(roots(one_file_system=True), roots())
+            dirs, files = current_os.scan_dir(tmp)
+            self.assertEqual(current_os.subdirs_to_walk(dirs, device=-1), [])
+
+    def test_processes(self):
+        """Testing def count_files_by_extension and def search_folders_in_processes, processes param.
+
+        Expected behavior: the merged results of all subtrees
+        are the same as the results of a single process.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        for case_sensitive in (False, True):
+            with self.subTest(case_sensitive=case_sensitive):
+                self.assertEqual(current_os.count_files_by_extension(location, no_feedback=True,
+                                                                     case_sensitive=case_sensitive,
+                                                                     processes=2),
+                                 current_os.count_files_by_extension(location, no_feedback=True,
+                                                                     case_sensitive=case_sensitive))
+        records = list(current_os.search_folders_in_processes(location, extension='..', total_size=True,
+                                                              show_folders=True, processes=2))
+        sizes = SizeStats()
+        for root, amount, folder_sizes in records:
+            sizes.merge(folder_sizes)
+        folders = {root: amount for root, amount, folder_sizes in records}
+        paths = list(current_os.search_files(location, extension='..'))
+        file_sizes = [os.path.getsize(f) for f in paths]
+        self.assertEqual((sizes.count, sizes.total, sizes.max, sizes.min),
+                         (len(paths), sum(file_sizes), max(file_sizes), min(file_sizes)))
+        self.assertEqual(sum(folders.values()), len(paths))
+        self.assertEqual(set(folders), {os.path.dirname(f) for f in paths})
+
+    def test_search_folders(self):
+        """Testing def search_folders and def search_folders_in_processes.
+
+        Expected behavior: one record for each folder with found files,
+        the same folders, numbers and sizes as for the paths of def search_files.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        paths = list(current_os.search_files(location, extension='..'))
+        folders = Counter(os.path.dirname(f) for f in paths)
+        records = list(current_os.search_folders(location, extension='..', total_size=True))
+        self.assertEqual({root: amount for root, amount, sizes in records}, folders)
+        self.assertEqual(len(records), len(folders))
+        for root, amount, sizes in records:
+            self.assertEqual(sizes.total, sum(os.path.getsize(f) for f in paths if os.path.dirname(f) == root))
+        records = current_os.search_folders_in_processes(location, extension='..', show_folders=True,
+                                                         processes=2)
+        self.assertEqual({root: amount for root, amount, sizes in records}, folders)
+        records = list(current_os.search_folders_in_processes(location, extension='..', processes=2))
+        self.assertEqual(sum(amount for root, amount, sizes in records), len(paths))
+
+    def test_size_stats(self):
+        """Testing class SizeStats and def size_bucket.
+
+        Expected behavior: the same total, max and min as for a list of sizes,
+        quantiles within the relative error of the histogram, partial statistics can be merged.
+        :return:
+        """
+        for size in list(range(4096)) + [10 ** 6, 2 ** 40 - 1, 2 ** 40]:
+            lowest, highest = bucket_bounds(size_bucket(size))
+            self.assertTrue(lowest <= size <= highest)
+        file_sizes = [size * 37 % 100003 for size in range(10000)]
+        first, second, whole = SizeStats(quantiles=True), SizeStats(quantiles=True), SizeStats(quantiles=True)
+        for n, size in enumerate(file_sizes):
+            (first if n % 2 else second).add(size)
+            whole.add(size)
+        as_tuple = lambda stats: (stats.count, stats.total, stats.max, stats.min, stats.average())
+        self.assertEqual(as_tuple(whole), (len(file_sizes), sum(file_sizes), max(file_sizes), min(file_sizes),
+                                           sum(file_sizes) // len(file_sizes)))
+        merged = first.merge(second)
+        self.assertEqual(as_tuple(merged), as_tuple(whole))
+        self.assertEqual(merged.histogram, whole.histogram)
+        for q in (0.5, 0.9, 0.99):
+            with self.subTest(q=q):
+                exact = sorted(file_sizes)[int(q * len(file_sizes)) - 1]
+                self.assertLessEqual(abs(whole.quantile(q) - exact), exact / 8)
+        self.assertIsNone(SizeStats().quantile(0.5))
+        self.assertEqual(SizeStats().average(), 0)
+
+    def test_progress(self):
+        """Testing class Progress and def format_duration.
+
+        Expected behavior: nothing is written if the stream is not a terminal,
+        the line is redrawn at most once per interval, the ETA is shown if the folders are expected.
+        :return:
+        """
+        class Terminal(io.StringIO):
+            def isatty(self):
+                return True
+
+        self.assertEqual(format_duration(65), '01:05')
+        self.assertEqual(format_duration(3723), '1:02:03')
+        stream = io.StringIO()
+        with Progress(stream=stream, interval=0) as progress:
+            progress.update(files=10)
+        self.assertEqual(stream.getvalue(), '')
+        stream = Terminal()
+        with Progress(stream=stream, interval=3600) as progress:
+            for _ in range(1000):
+                progress.update(files=10)
+        self.assertEqual((progress.files, progress.dirs), (10000, 1000))
+        self.assertEqual(stream.getvalue(), '')
+        with Progress(stream=stream, interval=0, expected_dirs=4, term_width=200) as progress:
+            progress.update(files=10)
+            self.assertIn('10 files', stream.getvalue())
+            self.assertIn('1 folders', stream.getvalue())
+            self.assertIn('ETA', stream.getvalue())
+        self.assertTrue(stream.getvalue().endswith('\r'))
+
+    def test_output_writer(self):
+        """Testing class OutputWriter.
+
+        Expected behavior: on a terminal each line is written at once,
+        otherwise the lines are written in blocks, all lines are written on close.
+        :return:
+        """
+        lines = [f'line {n}' for n in range(100)]
+        stream = io.StringIO()
+        output = OutputWriter(stream=stream, buffer_size=200)
+        self.assertTrue(output.piped)
+        for line in lines:
+            output.write_line(line)
+            self.assertTrue(len(stream.getvalue()) <= len(''.join(lines)))
+            self.assertTrue(output.size < 200)
+        output.close()
+        self.assertEqual(stream.getvalue(), '\n'.join(lines) + '\n')
+        stream = io.StringIO()
+        with OutputWriter(stream=stream, terminal=True) as output:
+            output.write_line('line')
+            self.assertEqual(stream.getvalue(), 'line\n')
+            self.assertFalse(output.piped)
+
+    def test_record_writer(self):
+        """Testing class RecordWriter.
+
+        Expected behavior: the same records are read back from each format,
+        an empty JSON array or a CSV header if there are no records.
+        :return:
+        """
+        records = [{'path': 'a, "b".txt', 'size': 1}, {'path': 'c\nd', 'size': 20}]
+        for fmt in ('json', 'ndjson', 'csv'):
+            with self.subTest(fmt=fmt):
+                stream = io.StringIO()
+                with RecordWriter(fmt, ['path', 'size'], OutputWriter(stream=stream)) as writer:
+                    self.assertEqual(writer.write_all(iter(records)), 2)
+                text = stream.getvalue()
+                if fmt == 'json':
+                    self.assertEqual(json.loads(text), records)
+                elif fmt == 'ndjson':
+                    self.assertEqual([json.loads(line) for line in text.splitlines()], records)
+                else:
+                    self.assertEqual([dict(row, size=int(row['size'])) for row in csv.DictReader(io.StringIO(text))],
+                                     records)
+        stream = io.StringIO()
+        RecordWriter('json', ['path'], OutputWriter(stream=stream)).close()
+        self.assertEqual(json.loads(stream.getvalue()), [])
+
+    def test_path_list(self):
+        """Testing def read_paths and def group_paths.
+
+        Expected behavior: NUL- or newline-separated paths (the separator is detected),
+        split across the chunks, grouped by consecutive folders,
+        the same files are counted as in the walk, folders and missing paths are skipped.
+        :return:
+        """
+        paths = ['a/one.txt', 'a/two words.py', 'b/three.py', 'a/four.py']
+        for separator in (b'\0', b'\n', b'\r\n'):
+            with self.subTest(separator=separator):
+                stream = io.BytesIO(separator.join(os.fsencode(p) for p in paths) + separator)
+                self.assertEqual(list(read_paths(stream, chunk_size=3)), paths)
+        self.assertEqual(list(read_paths(io.BytesIO(b'a\nb\0c'))), ['a', 'b\0c'])
+        self.assertEqual(list(read_paths(io.BytesIO(b''))), [])
+        self.assertEqual([(root, [f.name for f in files]) for root, files in group_paths(paths)],
+                         [('a', ['one.txt', 'two words.py']), ('b', ['three.py']), ('a', ['four.py'])])
+        self.assertEqual([(root, [f.name for f in files]) for root, files in group_paths(['x.txt', 'y.py'])],
+                         [(os.curdir, ['x.txt', 'y.py'])])
+        location = self.get_locations('data_for_tests')
+        walked = [f.path for root, dirs, files in current_os.walk(location) for f in files]
+        self.assertEqual(current_os.count_files_by_extension(location, no_feedback=True, paths=iter(walked)),
+                         current_os.count_files_by_extension(location, no_feedback=True))
+        self.assertEqual(sum(amount for root, amount, sizes in
+                             current_os.search_folders(location, '..', total_size=True, paths=iter(walked))),
+                         len(walked))
+        # folders (find -print0 lists them too) and missing files are skipped
+        folders = [root for root, dirs, files in current_os.walk(location)]
+        listed = folders + walked + [os.path.join(location, 'missing.txt')]
+        self.assertEqual(current_os.count_files_by_extension(location, no_feedback=True, paths=iter(listed)),
+                         current_os.count_files_by_extension(location, no_feedback=True))
+
+    def test_sniffing(self):
+        """Testing def sniff_header, class FileSniffer and def count_files_by_extension with sniff.
+
+        Expected behavior: the files without extension are counted by their content type,
+        empty files are still counted as '[no extension]'.
+        :return:
+        """
+        headers = {b'\x7fELF\x02\x01': 'ELF', b'#!/bin/sh\n': 'SCRIPT', b'\x1f\x8b\x08\x00': 'GZIP',
+                   b'PK\x03\x04\x14': 'ZIP', b'\x89PNG\r\n\x1a\n\x00': 'PNG', b'\xef\xbb\xbf {"a": 1}': 'JSON',
+                   b'caf\xc3': 'TEXT', b'caf\xe9 cr\xe8me': 'TEXT', b'\x00\x01\x02': 'BINARY', b'\x01\x02\x03': 'BINARY'}
+        for header, content_type in headers.items():
+            with self.subTest(header=header):
+                self.assertEqual(sniff_header(header), content_type)
+        with tempfile.TemporaryDirectory() as tmp:
+            for n, header in enumerate(headers):
+                with open(os.path.join(tmp, f'file{n}'), 'wb') as f:
+                    f.write(header)
+            open(os.path.join(tmp, 'empty'), 'w').close()
+            open(os.path.join(tmp, 'empty.txt'), 'w').close()
+            self.assertIsNone(sniff_file(os.path.join(tmp, 'empty')))
+            expected = Counter(f'[{content_type}]' for content_type in headers.values())
+            expected.update(['[no extension]', 'TXT'])
+            self.assertEqual(current_os.count_files_by_extension(tmp, no_feedback=True, sniff=True), expected)
+            with FileSniffer(workers=2, batch_size=3) as sniffer:
+                for entry in os.scandir(tmp):
+                    sniffer.add([entry])
+            self.assertEqual(sum(sniffer.counts.values()), len(headers) + 2)
+
+    def test_content_search(self):
+        """Testing def compile_content_pattern, def file_contains and def filter_by_content.
+
+        Expected behavior: literal strings and regular expressions are found in the content,
+        also across two reads, the matching files are kept in the order of the files.
+        :return:
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'file.txt')
+            with open(path, 'wb') as f:
+                f.write(b'x' * 100 + b'Needle (1)\nsecond line\n')
+            literal = compile_content_pattern('needle (1)')
+            self.assertTrue(file_contains(path, literal))
+            self.assertTrue(file_contains(path, literal, chunk_size=7))
+            self.assertFalse(file_contains(path, compile_content_pattern('needle (1)', case_sensitive=True)))
+            self.assertTrue(file_contains(path, compile_content_pattern(r'^second \w+$', regex=True)))
+            self.assertFalse(file_contains(path, compile_content_pattern('^line', regex=True)))
+            self.assertFalse(file_contains(os.path.join(tmp, 'no'), literal))
+            empty = os.path.join(tmp, 'empty')
+            open(empty, 'w').close()
+            self.assertFalse(file_contains(empty, literal))
+            # files that cannot be memory-mapped are read in chunks, a long literal string across the reads
+            needle = 'n' + 'e' * 5000 + 'dle'
+            with open(path, 'wb') as f:
+                f.write(b'x' * 100 + needle.encode() + b'x' * 100)
+            with mock.patch('mmap.mmap', side_effect=ValueError):
+                self.assertTrue(file_contains(path, compile_content_pattern(needle), chunk_size=1000))
+                self.assertFalse(file_contains(path, compile_content_pattern(needle + 'x' * 101), chunk_size=1000))
+        location = self.get_locations('data_for_tests')
+        files = sorted(f.path for root, dirs, files in current_os.walk(location) for f in files)
+        pattern = compile_content_pattern('import')
+        self.assertEqual(list(filter_by_content(iter(files), pattern, workers=3, prefetch=2)),
+                         [f for f in files if file_contains(f, pattern)])
+
+    def test_find_duplicates(self):
+        """Testing def find_duplicates and def duplicates_by_extension.
+
+        Expected behavior: only the files with identical content are grouped,
+        the files that differ in the middle are told apart by the full hash,
+        hard links and empty files are not duplicates.
+        :return:
+        """
+        block = b'a' * 10000
+        contents = {'one.txt': block + b'1' + block, 'copy.TXT': block + b'1' + block, 'b/copy': block + b'1' + block,
+                    'middle.txt': block + b'2' + block, 'end.txt': block + block + b'3',
+                    'small.py': b'print()', 'small_copy.py': b'print()', 'other.py': b'print(1)',
+                    'empty': b'', 'empty2': b''}
+        with tempfile.TemporaryDirectory() as tmp:
+            os.mkdir(os.path.join(tmp, 'b'))
+            for name, content in contents.items():
+                with open(os.path.join(tmp, name), 'wb') as f:
+                    f.write(content)
+            one, middle = os.path.join(tmp, 'one.txt'), os.path.join(tmp, 'middle.txt')
+            self.assertEqual(partial_hash(one, len(contents['one.txt'])),
+                             partial_hash(middle, len(contents['middle.txt'])))
+            self.assertNotEqual(full_hash(one, 0), full_hash(middle, 0))
+            if hasattr(os, 'link'):
+                os.link(os.path.join(tmp, 'other.py'), os.path.join(tmp, 'link.py'))
+            groups = current_os.find_duplicates(tmp, no_feedback=True)
+            self.assertEqual(groups, [(len(block) * 2 + 1, sorted(os.path.join(tmp, name) for name in
+                                                                  ('one.txt', 'copy.TXT', os.path.join('b', 'copy')))),
+                                      (7, [os.path.join(tmp, 'small.py'), os.path.join(tmp, 'small_copy.py')])])
+        copies, wasted = duplicates_by_extension(groups)
+        self.assertEqual(sum(copies.values()), 3)
+        self.assertEqual(sum(wasted.values()), (len(block) * 2 + 1) * 2 + 7)
+
+    def test_count_lines(self):
+        """Testing def count_lines and def count_lines_by_extension.
+
+        Expected behavior: the line breaks are counted across the chunks,
+        the last line without a line break is counted, binary files are counted with 0 lines if skipped.
+        :return:
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            contents = {'a.txt': b'one\ntwo\r\nthree', 'b.txt': b'1\n2\n', 'c.py': b'\n' * 1000,
+                        'empty.py': b'', 'data.bin': b'\0\n\n'}
+            for name, content in contents.items():
+                with open(os.path.join(tmp, name), 'wb') as f:
+                    f.write(content)
+            self.assertEqual(count_lines(os.path.join(tmp, 'a.txt'), chunk_size=2), 3)
+            self.assertEqual(count_lines(os.path.join(tmp, 'c.py'), chunk_size=7), 1000)
+            self.assertEqual(count_lines(os.path.join(tmp, 'empty.py')), 0)
+            self.assertEqual(count_lines(os.path.join(tmp, 'data.bin')), 2)
+            self.assertIsNone(count_lines(os.path.join(tmp, 'data.bin'), skip_binary=True))
+            self.assertEqual(count_lines(os.path.join(tmp, 'no')), 0)
+            files, lines = current_os.count_lines_by_extension(tmp, no_feedback=True)
+            self.assertEqual(files, current_os.count_files_by_extension(tmp, no_feedback=True))
+            self.assertEqual(lines, Counter({'TXT': 5, 'PY': 1000, 'BIN': 2}))
+            files, lines = current_os.count_lines_by_extension(tmp, no_feedback=True, skip_binary=True)
+            self.assertEqual(files, current_os.count_files_by_extension(tmp, no_feedback=True))
+            self.assertEqual(lines['BIN'], 0)
+            self.assertIn('BIN', lines)
+
+    def test_collect_report(self):
+        """Testing def collect_report.
+
+        Expected behavior: the same extension counts, totals and folders
+        as def count_files_by_extension and def search_folders.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        report = current_os.collect_report(location, show_folders=True, no_feedback=True)
+        self.assertEqual(report['extensions'],
+                         current_os.count_files_by_extension(location, no_feedback=True))
+        self.assertEqual(sum(report['ext_sizes'].values()), report['sizes'].total)
+        records = list(current_os.search_folders(location, extension='..', total_size=True))
+        sizes = SizeStats()
+        for root, amount, folder_sizes in records:
+            sizes.merge(folder_sizes)
+        self.assertEqual((report['files'], report['sizes'].total, report['sizes'].max, report['sizes'].min),
+                         (sizes.count, sizes.total, sizes.max, sizes.min))
+        self.assertEqual(report['folders'], {root: amount for root, amount, folder_sizes in records})
+
+    def test_scan_index(self):
+        """Testing def walk with ScanIndex, index param.
+
+        Expected behavior: the listings of directories with unchanged modification time
+        are taken from the index, modified directories are listed again.
+        :return:
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            location = os.path.join(tmp, 'tree')
+            os.makedirs(os.path.join(location, 'sub', 'deep'))
+            for name in ('a.txt', os.path.join('sub', 'b.py'), os.path.join('sub', 'deep', 'c.py')):
+                with open(os.path.join(location, name), 'w') as f:
+                    f.write('data')
+            old_time = 1500000000
+            for root in (location, os.path.join(location, 'sub'), os.path.join(location, 'sub', 'deep')):
+                os.utime(root, (old_time, old_time))
+            index_dir = os.path.join(tmp, 'index')
+            index = ScanIndex(location, index_dir=index_dir)
+            expected = Counter({'PY': 2, 'TXT': 1})
+            self.assertEqual(current_os.count_files_by_extension(location, no_feedback=True, index=index),
+                             expected)
+            index.save()
+            self.assertTrue(os.path.exists(index.filename))
+
+            # the new file is not seen while the directory keeps the same modification time
+            with open(os.path.join(location, 'sub', 'deep', 'd.py'), 'w') as f:
+                f.write('data')
+            os.utime(os.path.join(location, 'sub', 'deep'), (old_time, old_time))
+            index = ScanIndex(location, index_dir=index_dir)
+            self.assertEqual(sum(len(record[1]) for record in index.dirs.values()), 3)
+            self.assertEqual(current_os.count_files_by_extension(location, no_feedback=True, index=index),
+                             expected)
+            # the modified directory is listed again
+            os.utime(os.path.join(location, 'sub', 'deep'), (old_time + 1, old_time + 1))
+            self.assertEqual(current_os.count_files_by_extension(location, no_feedback=True, index=index),
+                             Counter({'PY': 3, 'TXT': 1}))
+            sizes = [os.path.getsize(f) for f in current_os.search_files(location, '..', index=index)]
+            self.assertEqual(sizes, [4, 4, 4, 4])
+            # records of removed directories are dropped
+            shutil.rmtree(os.path.join(location, 'sub'))
+            self.assertEqual(list(current_os.search_files(location, '..', index=index)),
+                             [os.path.join(location, 'a.txt')])
+            self.assertEqual(set(index.dirs), {location})
+
+    def test_exclude_rules(self):
+        """Testing def walk with ExcludeRules, exclude param.
+
+        Expected behavior: excluded files are not found, excluded folders are not listed,
+        the rules of .gitignore files apply to their folders (with --gitignore only).
+        :return:
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ('a.js', 'debug.log', 'keep.log', os.path.join('node_modules', 'x', 'b.js'),
+                         os.path.join('src', 'c.js'), os.path.join('src', 'build', 'd.js'),
+                         os.path.join('build', 'e.js'), os.path.join('app', 'f.js'),
+                         os.path.join('app', 'gen', 'g.js'), os.path.join('app', 'gen', 'h.py')):
+                os.makedirs(os.path.join(tmp, os.path.dirname(name)), exist_ok=True)
+                with open(os.path.join(tmp, name), 'w'):
+                    pass
+            os.makedirs(os.path.join(tmp, 'src', 'build.txt'))
+            with open(os.path.join(tmp, 'app', '.gitignore'), 'w') as f:
+                f.write('# generated\ngen/**/*.js\n')
+
+            def found(exclude, **kwargs):
+                return sorted(os.path.relpath(f, tmp)
+                              for f in current_os.search_files(tmp, '..', include_hidden=True, exclude=exclude,
+                                                               **kwargs))
+
+            exclude = ExcludeRules(tmp, ['node_modules', '/build/', '*.log', '!keep.log'])
+            roots = [root for root, dirs, files in current_os.walk(tmp, exclude=exclude)]
+            self.assertNotIn(os.path.join(tmp, 'node_modules'), roots)
+            expected = sorted([os.path.join('app', '.gitignore'), os.path.join('app', 'f.js'),
+                               os.path.join('app', 'gen', 'g.js'), os.path.join('app', 'gen', 'h.py'),
+                               'a.js', 'keep.log', os.path.join('src', 'build', 'd.js'), os.path.join('src', 'c.js')])
+            self.assertEqual(found(exclude), expected)
+            self.assertEqual(found(exclude, workers=4), expected)
+            gitignore = ExcludeRules(tmp, ['node_modules', 'build/'], gitignore=True)
+            expected = sorted([os.path.join('app', '.gitignore'), os.path.join('app', 'f.js'),
+                               os.path.join('app', 'gen', 'h.py'), 'a.js', 'debug.log', 'keep.log',
+                               os.path.join('src', 'c.js')])
+            self.assertEqual(found(gitignore), expected)
+            counters = current_os.count_files_by_extension(tmp, no_feedback=True, include_hidden=True,
+                                                           processes=2, exclude=gitignore)
+            self.assertEqual(counters, Counter({'JS': 3, 'LOG': 2, 'PY': 1, '[no extension]': 1}))
+            # invalid rules are skipped, the other rules of the file still apply
+            with open(os.path.join(tmp, 'app', '.gitignore'), 'w') as f:
+                f.write('[z-a]\ngen/**/*.js\n')
+            self.assertEqual(found(gitignore, workers=4), expected)
+            self.assertEqual(ExcludeRules(tmp, ['[z-a]', '*.log']).invalid, ['[z-a]'])
+
     # test case_sensitive param (search, count, total)
     def test_search_files_case_sensitive(self):
         """Testing def search_files, case_sensitive param. For all OS.
@@ -118,6 +685,58 @@ class TestSomeFunctions(unittest.TestCase):
         self.assertEqual(current_os.is_hidden_file_or_dir(
             self.get_locations('test_hidden_linux', '.ebookreader', 'not_hidden.txt')), True)
 
+    @unittest.skipUnless(sys.platform.startswith('linux')
+                         or sys.platform.startswith('darwin') or sys.platform.startswith('haiku'), 'for Linux, Mac OS')
+    def test_walk_prunes_hidden_lin_mac(self):
+        """Testing def walk and def is_hidden_entry, include_hidden param.
+
+        Expected behavior: hidden folders are removed from the walk itself,
+        so their contents are never listed.
+        :return:
+        """
+        location = self.get_locations('test_hidden_linux')
+        with os.scandir(location) as entries:
+            hidden = {e.name: current_os.is_hidden_entry(e) for e in entries}
+        self.assertEqual(hidden, {'.hidden_for_linux': True, '.ebookreader': True,
+                                  'not_hidden_folder': False, 'not_hidden.txt': False})
+        roots = [root for root, dirs, files in current_os.walk(location, include_hidden=False)]
+        self.assertEqual(roots, [location, os.path.join(location, 'not_hidden_folder')])
+        self.assertEqual(list(current_os.walk(os.path.join(location, '.ebookreader'),
+                                              include_hidden=False)), [])
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'for Linux')
+    def test_watch_files_by_extension_linux(self):
+        """Testing def watch_files_by_extension (inotify).
+
+        Expected behavior: the counts are updated as files and folders are created,
+        renamed and deleted, hidden files are not counted.
+        :return:
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, 'a.txt'), 'w'):
+                pass
+            watch = current_os.watch_files_by_extension(tmp, interval=0)
+            try:
+                self.assertEqual(next(watch), Counter({'TXT': 1}))
+                os.makedirs(os.path.join(tmp, 'sub'))
+                with open(os.path.join(tmp, 'sub', 'b.py'), 'w'):
+                    pass
+                with open(os.path.join(tmp, '.hidden.py'), 'w'):
+                    pass
+                counts = next(watch)
+                while counts != Counter({'TXT': 1, 'PY': 1}):
+                    counts = next(watch)
+                os.rename(os.path.join(tmp, 'a.txt'), os.path.join(tmp, 'a'))
+                counts = next(watch)
+                while counts != Counter({'[no extension]': 1, 'PY': 1}):
+                    counts = next(watch)
+                shutil.rmtree(os.path.join(tmp, 'sub'))
+                counts = next(watch)
+                while counts != Counter({'[no extension]': 1}):
+                    counts = next(watch)
+            finally:
+                watch.close()
+
     # tests related to preview
     # TODO
     def test_generate_preview(self):
@@ -145,6 +764,65 @@ class TestSomeFunctions(unittest.TestCase):
         self.assertEqual(empty_file, '')
         self.assertEqual(excerpt_result, '#')
 
+    def test_generic_text_preview_bounded(self):
+        """Testing def generic_text_preview.
+
+        Expected behavior: line breaks are replaced with spaces (also \\r\\n),
+        multibyte characters split between the reads are decoded,
+        at most (max_size + 1) * PREVIEW_BYTES_PER_CHAR bytes are read.
+        :return:
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'text.txt')
+            with open(path, 'wb') as f:
+                f.write('línea 1\r\nlínea 2\n'.encode('utf-8') * 1000)
+            self.assertEqual(generic_text_preview(path, 16, encoding='utf-8'), 'línea 1 línea 2 ')
+            self.assertEqual(generic_text_preview(path, 7, encoding='utf-8'), 'línea 1')
+            with open(path, 'wb') as f:
+                f.write(b'\xff' * 100)
+            self.assertIn('TEXT_PREVIEW_ERROR', generic_text_preview(path, 5, encoding='utf-8'))
+            self.assertEqual(generic_text_preview(path, 5, encoding='latin-1'), '\xff' * 5)
+
+    def test_generate_preview_sniff(self):
+        """Testing def generate_preview, sniff param.
+
+        Expected behavior: the files without extension are previewed if their content is text,
+        the file is opened only once.
+        :return:
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, data in (('script', b'#!/bin/sh\necho 1\n'), ('binary', b'\x7fELF\x02\x01\x00'),
+                               ('empty', b'')):
+                with open(os.path.join(tmp, name), 'wb') as f:
+                    f.write(data)
+            with mock.patch('count_files.utils.file_preview.open', create=True, wraps=open) as opened:
+                self.assertEqual(generate_preview(os.path.join(tmp, 'script'), max_size=9, sniff=True), '#!/bin/sh')
+            self.assertEqual(opened.call_count, 1)
+            for name in ('binary', 'empty'):
+                with self.subTest(name=name):
+                    self.assertEqual(generate_preview(os.path.join(tmp, name), sniff=True),
+                                     '[A preview of this file type is not yet implemented.]')
+            self.assertEqual(generate_preview(os.path.join(tmp, 'script')),
+                             '[A preview of this file type is not yet implemented.]')
+
+    def test_prefetch_previews(self):
+        """Testing def prefetch_previews.
+
+        Expected behavior: the previews of all files in the order of the files,
+        the files are taken only as far as they are prefetched.
+        :return:
+        """
+        location = self.get_locations('data_for_tests')
+        files = sorted(f.path for root, dirs, files in current_os.walk(location) for f in files)
+        result = list(prefetch_previews(iter(files), max_size=20, workers=3, prefetch=2))
+        self.assertEqual([f for f, preview in result], files)
+        self.assertEqual([preview for f, preview in result], [generate_preview(f, max_size=20) for f in files])
+        taken = []
+        previews = prefetch_previews((taken.append(f) or f for f in files), max_size=20, prefetch=2)
+        self.assertEqual(next(previews)[0], files[0])
+        previews.close()
+        self.assertEqual(taken, files[:3])
+
     # tests related to hidden folders and files (search, count, total)
     @unittest.skipUnless(sys.platform.startswith('win'), 'for Windows')
     def test_search_files_win(self):
@@ -291,6 +969,11 @@ class TestSomeFunctions(unittest.TestCase):
         upper_case_result1 = list(current_os.search_files_by_pattern(dirpath=self.get_locations('data_for_tests'),
                                                                      pattern='*.MD', recursive=True,
                                                                      include_hidden=False, case_sensitive=True))
+        # several patterns in one walk, a file matching more than one pattern is found once
+        multi_result = list(current_os.search_files_by_pattern(dirpath=self.get_locations('data_for_tests'),
+                                                               pattern=['*.????', '*test*', '*.MD', '*.html'],
+                                                               recursive=True, include_hidden=False,
+                                                               case_sensitive=False))
         self.assertEqual(len(ext_result), 3)
         self.assertEqual(len(word_result), 3)
         self.assertEqual(len(case_result), 4)
@@ -298,6 +981,50 @@ class TestSomeFunctions(unittest.TestCase):
         self.assertEqual(len(partial_case_result1), 2)
         self.assertEqual(len(upper_case_result), 2)
         self.assertEqual(len(upper_case_result1), 0)
+        self.assertEqual(sorted(multi_result), sorted(set(ext_result + word_result + upper_case_result)))
+
+    def test_search_files_by_path_pattern(self):
+        """Testing def search_files_by_pattern with path patterns.
+
+        Expected behavior: patterns with folders and ** are matched against the relative path,
+        folders that cannot contain a matching file are not listed,
+        the folders that are not walked do not stop the search.
+        :return:
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in (os.path.join('src', 'test_a.py'), os.path.join('src', 'pkg', 'test_b.py'),
+                         os.path.join('src', 'pkg', 'b.py'), os.path.join('docs', 'test_c.py'),
+                         os.path.join('docs', 'deep', 'README.MD'), 'test_d.py'):
+                os.makedirs(os.path.join(tmp, os.path.dirname(name)), exist_ok=True)
+                with open(os.path.join(tmp, name), 'w'):
+                    pass
+            this_os = get_current_os()
+            listed = []
+            scan_dir = this_os.scan_dir
+            this_os.scan_dir = lambda root, include_hidden=True: listed.append(root) or scan_dir(root, include_hidden)
+
+            def search(*patterns, **kwargs):
+                del listed[:]
+                return sorted(os.path.relpath(f, tmp)
+                              for f in this_os.search_files_by_pattern(tmp, list(patterns), **kwargs))
+
+            self.assertEqual(search('src/**/test_*.py'),
+                             [os.path.join('src', 'pkg', 'test_b.py'), os.path.join('src', 'test_a.py')])
+            self.assertNotIn(os.path.join(tmp, 'docs'), listed)
+            self.assertEqual(search('src/*/test_*.py', workers=4), [os.path.join('src', 'pkg', 'test_b.py')])
+            self.assertEqual(search('./test_*.py'), ['test_d.py'])
+            self.assertEqual(listed, [tmp])
+            self.assertEqual(search('docs/**'), [os.path.join('docs', 'deep', 'README.MD'),
+                                                 os.path.join('docs', 'test_c.py')])
+            self.assertEqual(search('**/deep/*.md', 'b.py'), [os.path.join('docs', 'deep', 'README.MD'),
+                                                              os.path.join('src', 'pkg', 'b.py')])
+            self.assertEqual(search('**/deep/*.md', case_sensitive=True), [])
+            # the folders below max_depth and the folders that cannot be listed are skipped
+            expected = [os.path.join('docs', 'test_c.py'), os.path.join('src', 'test_a.py'), 'test_d.py']
+            self.assertEqual(search('**/*.py', max_depth=2), expected)
+            this_os.scan_dir = lambda root, include_hidden=True: \
+                None if os.path.basename(root) == 'pkg' else scan_dir(root, include_hidden)
+            self.assertEqual(search('**/*.py', 'src/pkg/*.py'), expected)
 
     def test_group_ext_by_type_default(self):
         from count_files.utils.group_extensions import ext_and_group_dict
@@ -265,12 +265,12 @@ class TestViewingModes(unittest.TestCase):
         self.generate_standard_file_for_total()
         print('A standard file for total is generated.')
         # count-files -t md -sf -ts ~\Count-files\tests\data_for_tests
-        data = self.current_os.search_files(dirpath=self.get_locations('data_for_tests'), extension='md',
-                                            include_hidden=False, recursive=True, case_sensitive=False)
-        # files: Iterable[str], show_folders: bool = False, total_size: bool = False,
-        # no_feedback: bool = False, recursive: bool = True
-        params = {'files': data, 'show_folders': True, 'total_size': True,
-                  'no_feedback': True, 'recursive': True}
+        data = self.current_os.search_folders(dirpath=self.get_locations('data_for_tests'), extension='md',
+                                              include_hidden=False, recursive=True, case_sensitive=False,
+                                              total_size=True)
+        # folders: Iterable[Tuple[str, int, Optional[SizeStats]]], show_folders: bool = False,
+        # total_size: bool = False, progress: Progress = None, recursive: bool = True
+        params = {'folders': data, 'show_folders': True, 'total_size': True, 'recursive': True}
         self.write_to_test_file(self.test_file_total, show_result_for_total, **params)
         self.assertEqual(filecmp.cmp(self.test_file_total, self.standard_file_total,
                                      shallow=False), True)